@@ -1,6 +1,9 @@
 from django.contrib import admin
 
-from .models import Character, Bond, Vow, CharacterAsset, CharacterAssetAbility, CharacterAssetComponent, Debility, MinorQuest
+from ironsworn.shard_admin import ShardedModelAdmin
+
+from .models import Character, Bond, Vow, CharacterAsset, CharacterAssetAbility, CharacterAssetComponent, Debility, MinorQuest, VowSimulationResult
+from .services import add_assets
 
 
 class BondInline(admin.TabularInline):
@@ -26,11 +29,27 @@ class QuestInline(admin.TabularInline):
 
 
 @admin.register(Character)
-class CharacterAdmin(admin.ModelAdmin):
+class CharacterAdmin(ShardedModelAdmin):
 	list_display = ("name", "user")
-	search_fields = ("name", "user__username")
+	# users are in the default database, they can't be joined to characters of other shards
+	list_select_related = ()
+	search_fields = ("name",)
 	inlines = [BondInline, VowInline, AssetInline, DebilityInline, QuestInline]
 
+	def save_formset(self, request, form, formset, change):
+		"""new assets are populated in bulk by ``characters.services.add_assets``"""
+		if formset.model is not CharacterAsset:
+			return super().save_formset(request, form, formset, change)
+
+		instances = formset.save(commit=False)
+		for obj in formset.deleted_objects:
+			obj.delete()
+		for obj in instances:
+			if obj.pk is not None:
+				obj.save()
+		add_assets([obj for obj in instances if obj.pk is None])
+		formset.save_m2m()
+
 class CharacterAssetAbilityInline(admin.TabularInline):
     model = CharacterAssetAbility
     extra = 0
@@ -40,5 +59,17 @@ class CharacterAssetComponentInline(admin.TabularInline):
     extra = 0
 
 @admin.register(CharacterAsset)
-class CharacterAssetAdmin(admin.ModelAdmin):
-	inlines = [CharacterAssetAbilityInline, CharacterAssetComponentInline]
\ No newline at end of file
+class CharacterAssetAdmin(ShardedModelAdmin):
+	inlines = [CharacterAssetAbilityInline, CharacterAssetComponentInline]
+
+	def save_model(self, request, obj, form, change):
+		"""new assets are populated by ``characters.services.add_assets``"""
+		if change:
+			super().save_model(request, obj, form, change)
+		else:
+			add_assets([obj])
+
+@admin.register(VowSimulationResult)
+class VowSimulationResultAdmin(admin.ModelAdmin):
+	list_display = ("difficulty", "strategy", "trials", "mean_milestones", "fulfill_rate", "simulated_at")
+	list_filter = ("strategy",)
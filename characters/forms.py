@@ -1,6 +1,6 @@
 from django import forms
 from .models import Character, Vow, CharacterAsset, Bond, MinorQuest
-from rules.models import AssetDefinition
+from rules.registry import get_registry
 
 class CharBaseInfoForm(forms.Form):
     name = forms.CharField(max_length=100, label="Character Name")
@@ -89,9 +89,9 @@ class InitialAssetsForm(forms.Form):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Populate choices from AssetDefinition instances
-        assets = AssetDefinition.objects.all()
-        choices = [('', '--- Select an asset ---')] + [(asset.pk, asset.title) for asset in assets]
+        # Populate choices from the rules registry, without querying AssetDefinition
+        assets = get_registry().assets
+        choices = [('', '--- Select an asset ---')] + [(asset.id, asset.title) for asset in assets]
         
         self.fields['asset_definition_1'].choices = choices
         self.fields['asset_definition_2'].choices = choices
@@ -131,19 +131,36 @@ class BondForm(forms.ModelForm):
         fields = ["description"]
 
 class CharacterAssetEditForm(forms.Form):
+    """
+    Component values and inactive abilities of a character asset.
+
+    Expects an asset with prefetched ``components`` and ``abilities``; titles are
+    read from the rules registry, so building the form runs no queries.
+    """
     def __init__(self, character_asset, *args, **kwargs):
         super().__init__(*args, **kwargs)
         for component in character_asset.components.all():
-            self.fields["component_"+component.definition.title] = forms.CharField(
-                label=component.definition.title,   
+            self.fields["component_"+component.rules.title] = forms.CharField(
+                label=component.rules.title,   
                 initial=component.value)
         
         for ability in character_asset.abilities.all():
             if not ability.is_active:
-                self.fields["ability_"+ability.definition.title] = forms.BooleanField(
-                    label=ability.definition.title,
+                self.fields["ability_"+ability.rules.title] = forms.BooleanField(
+                    label=ability.rules.title,
                     initial=ability.is_active,
                     required=False)
+
+    def edits(self) -> tuple[dict[str, str], list[str]]:
+        """Returns submitted component values by title and titles of abilities to activate"""
+        component_values = {}
+        activated_abilities = []
+        for name, value in self.cleaned_data.items():
+            if name.startswith("component_"):
+                component_values[name.removeprefix("component_")] = value
+            elif name.startswith("ability_") and value:
+                activated_abilities.append(name.removeprefix("ability_"))
+        return component_values, activated_abilities
             
 class NewMinorQuestForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,48 @@
+"""
+Loaders fetching a character together with everything a page renders.
+
+Related data is fetched up front with ``select_related`` and ``Prefetch``
+objects, so the number of queries is fixed and doesn't grow with the number
+of vows, quests or assets a character holds.
+"""
+from django.db.models import Prefetch, QuerySet
+
+from .models import Character, Vow, MinorQuest, CharacterAsset
+
+# queries run by `character_sheet_queryset().get()`:
+# character, active vows, latest quest, assets, asset components, asset abilities
+SHEET_QUERIES = 6
+
+
+def character_assets_queryset() -> QuerySet:
+    """
+    Character assets with their components and abilities.
+
+    Definitions are not fetched: assets, components and abilities read them
+    from the rules registry through their ``rules`` property.
+    """
+    return CharacterAsset.objects.prefetch_related("components", "abilities")
+
+def character_sheet_queryset() -> QuerySet:
+    """
+    Characters with everything rendered on the character sheet.
+
+    Prefetched data is available as:
+    - ``active_vows``: list of vows, fulfilled ones are archived
+    - ``latest_quests``: list holding the last modified minor quest, if any
+    - ``assets.all``: assets with ``components.all`` and ``abilities.all``
+    """
+    return Character.objects.prefetch_related(
+        Prefetch("vows", queryset=Vow.objects.all(), to_attr="active_vows"),
+        Prefetch("quests", queryset=MinorQuest.objects.order_by("-modified_at", "-pk")[:1], to_attr="latest_quests"),
+        Prefetch("assets", queryset=character_assets_queryset()),
+    )
+
+def load_character_sheet(pk: int) -> Character:
+    """
+    Fetch a character with everything rendered on the character sheet in ``SHEET_QUERIES`` queries.
+
+    Raises:
+        Character.DoesNotExist: If there is no character with such ``pk``.
+    """
+    return character_sheet_queryset().get(pk=pk)
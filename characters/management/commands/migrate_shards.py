@@ -0,0 +1,18 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from ironsworn import routers, shards
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply migrations to the default database and to every shard database, "
+        "and reserve the id range of each shard. See ironsworn.routers."
+    )
+
+    def handle(self, *args, **options):
+        for shard in routers.shard_aliases():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"Migrating {shard}"))
+            call_command("migrate", database=shard, interactive=False,
+                         verbosity=options["verbosity"], stdout=self.stdout, stderr=self.stderr)
+            shards.reserve_ids(shard)
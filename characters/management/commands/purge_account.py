@@ -0,0 +1,33 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from ironsworn import deletion, routers
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete user accounts with all their worlds, stories, events and characters, "
+        "in small set-based chunks. See ironsworn.deletion."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("usernames", nargs="+")
+        parser.add_argument("--dry-run", action="store_true",
+            help="Only report what would be deleted")
+
+    def handle(self, *args, **options):
+        users = list(User.objects.filter(username__in=options["usernames"]))
+        missing = set(options["usernames"]) - {user.username for user in users}
+        if missing:
+            raise CommandError(f"No such users: {', '.join(sorted(missing))}")
+
+        for user in users:
+            if options["dry_run"]:
+                with routers.use_user_shard(user.pk):
+                    self.stdout.write(
+                        f"{user.username}: {user.world_set.count()} worlds, "#type: ignore
+                        f"{user.characters.count()} characters"#type: ignore
+                    )
+                continue
+            deleted = deletion.delete_user(user)
+            self.stdout.write(self.style.SUCCESS(f"Purged {user.username}: {deleted} rows"))
@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from ironsworn import routers, shards
+
+
+class Command(BaseCommand):
+    help = (
+        "Move the characters and worlds of users to their shard after a change of SHARD_COUNT. "
+        "Run it while the site is down, after migrate_shards. See ironsworn.shards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--from-count", type=int, required=True,
+            help="SHARD_COUNT the data was placed with")
+        parser.add_argument("--dry-run", action="store_true",
+            help="Only report which users would move")
+
+    def handle(self, *args, **options):
+        from_count = options["from_count"]
+        if from_count < 1:
+            raise CommandError("--from-count must be at least 1")
+        missing = set(routers.shard_aliases(from_count)) - set(settings.DATABASES)
+        if missing:
+            raise CommandError(f"Databases of the old shards aren't configured: {', '.join(sorted(missing))}")
+
+        moved_users = 0
+        for user_id in User.objects.order_by("pk").values_list("pk", flat=True).iterator():
+            source = routers.shard_for_user(user_id, from_count)
+            target = routers.shard_for_user(user_id)
+            if source == target:
+                continue
+            moved_users += 1
+            if options["dry_run"]:
+                self.stdout.write(f"User {user_id}: {source} -> {target}")
+                continue
+            try:
+                copied = shards.move_user(user_id, source, target)
+            except ValueError as error:
+                raise CommandError(str(error)) from error
+            self.stdout.write(f"User {user_id}: moved {copied} rows from {source} to {target}")
+
+        verb = "would move" if options["dry_run"] else "moved"
+        self.stdout.write(self.style.SUCCESS(f"Rebalanced shards, {verb} {moved_users} users"))
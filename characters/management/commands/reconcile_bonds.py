@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from characters.models import Bond, Character
+from ironsworn import routers
+
+
+class Command(BaseCommand):
+    help = "Recount bonds and fix characters whose maintained bonds_ticks drifted from the actual number of bonds."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true",
+            help="Only report drifted characters, don't fix them")
+
+    def handle(self, *args, **options):
+        for shard in routers.shard_aliases():
+            with routers.use_shard(shard):
+                self.reconcile(options["dry_run"])
+
+    def reconcile(self, dry_run: bool):
+        bonds_count = Coalesce(Subquery(
+            Bond.objects.filter(character=OuterRef("pk"))
+                .values("character")
+                .annotate(count=Count("pk"))
+                .values("count")
+        ), Value(0))
+
+        drifted = Character.objects.annotate(actual_ticks=bonds_count).exclude(bonds_ticks=F("actual_ticks"))
+        for character in drifted.only("pk", "name", "bonds_ticks"):
+            self.stdout.write(f"{character.name}({character.pk}): {character.bonds_ticks} ticks, {character.actual_ticks} bonds")#type: ignore
+
+        if dry_run:
+            return
+
+        fixed = drifted.update(bonds_ticks=bonds_count)
+        self.stdout.write(self.style.SUCCESS(f"Reconciled bonds progress of {fixed} characters"))
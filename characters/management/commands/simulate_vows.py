@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from domain import simulation
+
+from characters.models import VowSimulationResult
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the Monte Carlo vow-completion simulation for every difficulty in "
+        "TICK_PER_DIFFICULTY and store the results in VowSimulationResult."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--trials", type=int, default=1_000_000,
+            help="Number of simulated vows per difficulty and strategy")
+        parser.add_argument("--workers", type=int, default=None,
+            help="Number of worker processes, defaults to the number of cores")
+        parser.add_argument("--strategy", choices=list(simulation.STRATEGIES), action="append",
+            help="Strategy to simulate, can be repeated. Defaults to all strategies")
+        parser.add_argument("--seed", type=int, default=None,
+            help="Seed for reproducible results")
+
+    def handle(self, *args, **options):
+        strategies = options["strategy"] or list(simulation.STRATEGIES)
+
+        for difficulty, ticks in sorted(settings.TICK_PER_DIFFICULTY.items()):
+            for strategy in strategies:
+                result = simulation.simulate_vow(ticks, strategy, options["trials"],
+                                                 workers=options["workers"], seed=options["seed"])
+                stored = VowSimulationResult.store(difficulty, result)
+
+                low, high = result.milestones_ci
+                self.stdout.write(
+                    f"{stored.get_difficulty_display()}, {strategy}: "
+                    f"{result.mean_milestones:.2f} milestones ({low:.2f}-{high:.2f}), "
+                    f"fulfilled on first roll {result.fulfill_rate:.1%}"
+                )
+
+        self.stdout.write(self.style.SUCCESS("Vow simulations stored"))
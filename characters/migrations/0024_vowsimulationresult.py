@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0023_vow_is_fulfilled'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VowSimulationResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('difficulty', models.IntegerField(choices=[(1, 'troublesome'), (2, 'dangerous'), (3, 'formidable'), (4, 'extreme'), (5, 'epic')])),
+                ('strategy', models.CharField(choices=[('patient', 'Patient'), ('steady', 'Steady'), ('bold', 'Bold'), ('reckless', 'Reckless')], help_text='Progress score at which the fulfill roll is first attempted, see `domain.simulation.STRATEGIES`', max_length=20)),
+                ('trials', models.PositiveIntegerField()),
+                ('mean_milestones', models.FloatField()),
+                ('milestones_ci_low', models.FloatField()),
+                ('milestones_ci_high', models.FloatField()),
+                ('fulfill_rate', models.FloatField(help_text='Share of vows fulfilled by the first fulfill roll')),
+                ('fulfill_ci_low', models.FloatField()),
+                ('fulfill_ci_high', models.FloatField()),
+                ('strong_hit_rate', models.FloatField(help_text='Share of first fulfill rolls that were a strong hit')),
+                ('milestones_histogram', models.JSONField(help_text='Number of trials fulfilled after N milestones, indexed by N')),
+                ('simulated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['difficulty', 'strategy'],
+                'unique_together': {('difficulty', 'strategy')},
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-18 16:23
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_bonds(apps, schema_editor):
+    db = schema_editor.connection.alias
+    Character = apps.get_model("characters", "Character")
+    Bond = apps.get_model("characters", "Bond")
+    Character.objects.using(db).update(bonds_ticks=Coalesce(Subquery(
+        Bond.objects.filter(character=OuterRef("pk"))
+            .values("character")
+            .annotate(count=Count("pk"))
+            .values("count")
+    ), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0024_vowsimulationresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='character',
+            name='bonds_ticks',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='ticks, not progress boxes. Maintained on bond creation and deletion, see `reconcile_bonds` command', verbose_name='Bonds progress'),
+        ),
+        migrations.RunPython(count_bonds, migrations.RunPython.noop),
+    ]
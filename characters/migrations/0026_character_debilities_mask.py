@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-18 16:24
+
+from django.db import migrations, models
+
+# `Debility.DEBILITIES` order at the time of this migration
+DEBILITY_NAMES = ["wounded", "shaken", "unprepared", "encumbered", "maimed", "corrupted", "cursed", "tormented"]
+
+
+def fill_debilities_mask(apps, schema_editor):
+    db = schema_editor.connection.alias
+    Character = apps.get_model("characters", "Character")
+    Debility = apps.get_model("characters", "Debility")
+
+    masks = {}
+    for character_id, name in Debility.objects.using(db).values_list("character_id", "name"):
+        masks[character_id] = masks.get(character_id, 0) | 1 << DEBILITY_NAMES.index(name)
+
+    characters = list(Character.objects.using(db).filter(pk__in=masks).only("pk"))
+    for character in characters:
+        character.debilities_mask = masks[character.pk]
+    Character.objects.using(db).bulk_update(characters, ["debilities_mask"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0025_character_bonds_ticks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='character',
+            name='debilities_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text="One bit per debility in `Debility.DEBILITIES`. Kept in sync with the character's debilities", verbose_name='Marked debilities'),
+        ),
+        migrations.RunPython(fill_debilities_mask, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 6.0 on 2026-10-18 16:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def archive_fulfilled_vows(apps, schema_editor):
+    """move vows fulfilled so far to the archive"""
+    db = schema_editor.connection.alias
+    Vow = apps.get_model("characters", "Vow")
+    ArchivedTrack = apps.get_model("characters", "ArchivedTrack")
+    fulfilled = Vow.objects.using(db).filter(is_fulfilled=True)
+    ArchivedTrack.objects.using(db).bulk_create([
+        ArchivedTrack(character_id=vow.character_id, kind="vow", difficulty=vow.difficulty,
+                      title=vow.title, description=vow.description, progress=vow.progress)
+        for vow in fulfilled.order_by("pk").iterator()
+    ], batch_size=500)
+    fulfilled.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0026_character_debilities_mask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTrack',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('vow', 'Vow'), ('journey', 'Journey'), ('fight', 'Fight')], max_length=10)),
+                ('difficulty', models.IntegerField(choices=[(1, 'troublesome'), (2, 'dangerous'), (3, 'formidable'), (4, 'extreme'), (5, 'epic')])),
+                ('title', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('progress', models.IntegerField(help_text='ticks, not progress boxes')),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('character', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tracks', to='characters.character')),
+            ],
+            options={
+                'ordering': ['-archived_at', '-pk'],
+                'indexes': [models.Index(fields=['character', '-archived_at'], name='archived_track_history')],
+            },
+        ),
+        migrations.RunPython(archive_fulfilled_vows, migrations.RunPython.noop),
+        # fulfilled vows only exist as archived tracks
+        migrations.RemoveField(
+            model_name='vow',
+            name='is_fulfilled',
+        ),
+    ]
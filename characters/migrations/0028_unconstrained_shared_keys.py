@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-18 17:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('characters', '0027_archivedtrack'),
+        ('rules', '0018_move_fts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='character',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='characters', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='characterasset',
+            name='definition',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='rules.assetdefinition'),
+        ),
+        migrations.AlterField(
+            model_name='characterassetability',
+            name='definition',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='rules.assetabilitydefinition'),
+        ),
+        migrations.AlterField(
+            model_name='characterassetcomponent',
+            name='definition',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, to='rules.assetcomponentdefinition'),
+        ),
+    ]
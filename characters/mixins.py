@@ -39,6 +39,8 @@ class SaveCharacterAttributeMixin:
         
         The name of the foreign key field can be customized by overriding
         ``field_name``. Assignment uses ``setattr`` to support this.
+
+        Override ``save_object`` to change how the new object is saved.
     """
 
     url_kwarg  = "char_id"
@@ -51,8 +53,11 @@ class SaveCharacterAttributeMixin:
         character = Character.objects.get(id=character_id)
 
         setattr(obj, self.field_name, character)
-        obj.save()
+        self.save_object(obj)
         return redirect('characters:character-sheet', pk=character_id)
+
+    def save_object(self, obj):
+        obj.save()
     
 class BelongsToCharacterMixin:
     """
@@ -69,4 +74,4 @@ class BelongsToCharacterMixin:
 
     def get_queryset(self):
         character_id = self.kwargs.get(self.url_kwarg)
-        return self.model.objects.filter(character__id=character_id) 
\ No newline at end of file
+        return self.model.objects.filter(character__id=character_id) 
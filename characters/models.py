@@ -1,8 +1,78 @@
-from django.db import IntegrityError, models
-from django.db.models import Q, F
+from collections import Counter
+
+from django.db import models
+from django.db.models import Q, F, Case, When, Value, Sum, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest, Least
 from django.contrib.auth.models import User
 from django.conf import settings
 
+from domain import simulation
+from rules import registry
+
+from . import sheet_cache
+
+
+MAX_EXPERIENCE = 20
+
+# trackers accepted by `CharacterQuerySet.apply_deltas`
+TRACKERS = ("health", "spirit", "supply", "momentum", "experience", "spent_experience")
+
+
+class CharacterQuerySet(models.QuerySet):
+    def apply_deltas(self, deltas: dict[str, int]) -> int:
+        """
+        Add ``deltas`` to the trackers of the characters in a single UPDATE statement.
+
+        Every new value is clamped by the database, ``x = MAX(MIN(x + delta, max), min)``,
+        so concurrent changes are never lost and no row is read beforehand:
+            - health, spirit and supply are clamped to ``settings.RESOURCE_TRACK``
+            - momentum is clamped between the lowest value of ``settings.MOMENTUM_TRACK``
+              and the momentum max derived from ``debilities_mask``
+            - experience is clamped between 0 and ``MAX_EXPERIENCE``
+            - spent experience is clamped between 0 and the (new) experience
+
+        ``update`` sends no signals, so callers are responsible for bumping the sheet
+        version of the characters, see ``characters.sheet_cache``.
+
+        Returns the number of updated characters.
+
+        Raises:
+            ValueError: If a tracker is not one of ``TRACKERS``.
+        """
+        unknown = set(deltas) - set(TRACKERS)
+        if unknown:
+            raise ValueError(f"Invalid trackers: {', '.join(sorted(unknown))}")
+
+        def clamp(tracker, low, high):
+            return Greatest(Least(F(tracker) + Value(deltas[tracker]), high), low)
+
+        experience = F("experience")
+        if "experience" in deltas:
+            experience = clamp("experience", Value(0), Value(MAX_EXPERIENCE))
+
+        limits = {
+            "health": (Value(settings.RESOURCE_TRACK[-1]), Value(settings.RESOURCE_TRACK[0])),
+            "spirit": (Value(settings.RESOURCE_TRACK[-1]), Value(settings.RESOURCE_TRACK[0])),
+            "supply": (Value(settings.RESOURCE_TRACK[-1]), Value(settings.RESOURCE_TRACK[0])),
+            "momentum": (Value(settings.MOMENTUM_TRACK[-1]), self.momentum_max_expression()),
+            "spent_experience": (Value(0), experience),
+        }
+        updates = {tracker: clamp(tracker, *limits[tracker]) for tracker in deltas if tracker in limits}
+        if "experience" in deltas:
+            updates["experience"] = experience
+
+        if not updates:
+            return 0
+        return self.update(**updates)
+
+    @staticmethod
+    def momentum_max_expression():
+        """SQL expression of ``Character.momentum_max``: the highest momentum minus one per marked debility"""
+        marked = sum(
+            (F("debilities_mask").bitrightshift(i).bitand(1) for i in range(len(DEBILITY_BITS))),
+            Value(0)
+        )
+        return Value(settings.MOMENTUM_TRACK[0]) - marked
 
 
 class Character(models.Model):
@@ -15,7 +85,8 @@ class Character(models.Model):
     All related game data is scoped to a Django :model:`auth.User`.
     """
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="characters")#keep Character and all game data user-scoped
+    # users are in the default database, not enforced across shards, see ironsworn.routers
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="characters", db_constraint=False)#keep Character and all game data user-scoped
 
     name = models.CharField(max_length=100)
     description = models.TextField(verbose_name="Character's description and/or background")
@@ -36,6 +107,19 @@ class Character(models.Model):
     experience = models.IntegerField(default=0, verbose_name="Gained experience points", help_text="Spendable on new assets or asset upgrades")
     spent_experience = models.IntegerField(default=0, verbose_name="Already spent experience points")
 
+    bonds_ticks = models.PositiveIntegerField(default=0, editable=False, verbose_name="Bonds progress",
+        help_text="ticks, not progress boxes. Maintained on bond creation and deletion, see `reconcile_bonds` command")
+
+    debilities_mask = models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="Marked debilities",
+        help_text="One bit per debility in `Debility.DEBILITIES`. Kept in sync with the character's debilities")
+
+    objects = CharacterQuerySet.as_manager()
+
+    @property
+    def marked_debilities(self) -> list[str]:
+        """names of marked debilities, in ``Debility.DEBILITIES`` order"""
+        return [name for name, bit in DEBILITY_BITS.items() if self.debilities_mask & bit]
+
     @property
     def momentum_reset(self) -> int:
         """ 
@@ -43,9 +127,10 @@ class Character(models.Model):
             - If you have one debility marked, your momentum reset is +1.
             - If you have more than one debility marked, your momentum reset is 0.
         """
-        if self.debilities.count() == 1:#type: ignore
+        marked = self.debilities_mask.bit_count()
+        if marked == 1:
             return 1
-        elif self.debilities.count() > 1:#type: ignore
+        elif marked > 1:
             return 0
         return 2
     
@@ -55,19 +140,25 @@ class Character(models.Model):
             - Default is 10
             - -1 for each debility marked
         """
-        value = 10
-        for _ in range(self.debilities.count()):#type: ignore
-            value -= 1
-        return value
+        return 10 - self.debilities_mask.bit_count()
 
     @property
     def bonds_progress(self) -> int:
         """ticks, not progress boxes"""
-        return self.bonds.count()#type: ignore
+        return self.bonds_ticks
 
     def __str__(self):
         return self.name
     
+    def apply_deltas(self, deltas: dict[str, int]):
+        """
+        Add ``deltas`` to the character's trackers in a single UPDATE statement,
+        see ``CharacterQuerySet.apply_deltas``, then reload the changed trackers.
+        """
+        Character.objects.filter(pk=self.pk).apply_deltas(deltas)#type: ignore
+        sheet_cache.bump_version(self.pk)
+        self.refresh_from_db(fields=list(deltas))
+
     def change_momentum(self, delta:int):
         """
         Adjust the character's momentum by a delta value.
@@ -75,10 +166,7 @@ class Character(models.Model):
         Clamps the new momentum value between the minimum (hardest) and
         maximum (soft) bounds defined by the character's current state.
         """
-        min_v, max_v = settings.MOMENTUM_TRACK[-1], self.momentum_max
-        value = max(min(self.momentum + delta, max_v), min_v)
-        self.momentum = value
-        self.save(update_fields=["momentum"])
+        self.apply_deltas({"momentum": delta})
 
     def change_experience(self, action:str):
         """
@@ -87,17 +175,13 @@ class Character(models.Model):
         Args:
             action (str): Either "gain" to increment experience, or "spend" to
                 increment spent_experience. Invalid actions are silently ignored.
+
+        Experience is capped at ``MAX_EXPERIENCE`` and can't be spent beyond what was gained.
         """
-        try:
-            if action == "gain":
-                self.experience += 1
-                self.save(update_fields=["experience"])
-            elif action == "spend":
-                self.spent_experience += 1
-                self.save(update_fields=["spent_experience"])
-        except IntegrityError as e:
-            print(e)
-        
+        if action == "gain":
+            self.apply_deltas({"experience": 1})
+        elif action == "spend":
+            self.apply_deltas({"spent_experience": 1})
 
     def change_resource(self, resource:str, delta:int):
         """
@@ -115,11 +199,8 @@ class Character(models.Model):
         """
         if not resource in {"health", "spirit", "supply"}:
             raise AttributeError(f"Invalid resource: {resource}")
-        
-        min_v, max_v = settings.RESOURCE_TRACK[-1], settings.RESOURCE_TRACK[0]
-        value = max(min(getattr(self, resource) + delta, max_v), min_v)
-        setattr(self, resource, value)
-        self.save(update_fields=[resource])
+
+        self.apply_deltas({resource: delta})
 
     class Meta:
         constraints = [
@@ -128,7 +209,7 @@ class Character(models.Model):
                 name='spent_experience_lte_experience'
             ),
             models.CheckConstraint(
-                condition=Q(experience__lte=20),
+                condition=Q(experience__lte=MAX_EXPERIENCE),
                 name="experience_lte_MAX_EXPERIENCE"
             )
         ]
@@ -147,7 +228,6 @@ class Vow(models.Model):
     description = models.TextField(null=True, blank=True)
     progress = models.IntegerField(default=0, help_text="ticks, not progress boxes")
     difficulty = models.IntegerField(choices=settings.DIFFICULTY_LEVELS)
-    is_fulfilled = models.BooleanField(default=False)
 
     def __str__(self):
         return f"{self.character.name} vowed to {self.title}"
@@ -162,16 +242,39 @@ class Vow(models.Model):
         self.progress += settings.TICK_PER_DIFFICULTY[self.difficulty]
         self.save(update_fields=["progress"])
     
+class BondQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Create bonds in bulk and add them to the bonds progress of their characters.
+
+        ``bulk_create`` sends no ``post_save`` signals, so the characters'
+        ``bonds_ticks`` are incremented here, in a single UPDATE.
+        """
+        objs = super().bulk_create(objs, *args, **kwargs)
+
+        new_ticks = Counter(obj.character_id for obj in objs)
+        if new_ticks:
+            Character.objects.filter(pk__in=new_ticks).update(bonds_ticks=F("bonds_ticks") + Case(
+                *[When(pk=character_id, then=Value(ticks)) for character_id, ticks in new_ticks.items()],
+                default=Value(0)
+            ))
+        for character_id in new_ticks:
+            sheet_cache.bump_version(character_id, self.db)
+        return objs
+
 class Bond(models.Model):
     """
     A narrative bond between a character and a person or community, created by making a Forge a Bond move.
 
     Bonds do not have individual progress tracks. All bonds contribute to the
-    shared bonds progress of a :model:`characters.Character`.
+    shared bonds progress of a :model:`characters.Character`, kept in its
+    ``bonds_ticks`` column by ``characters.signals`` and ``BondQuerySet.bulk_create``.
     """
     character = models.ForeignKey(Character, on_delete=models.CASCADE, related_name='bonds')
     description = models.TextField()
 
+    objects = BondQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.character.name} is bound to {self.description[:20]}..."
 
@@ -221,6 +324,33 @@ class MinorQuest(models.Model):
         self.progress += settings.TICK_PER_DIFFICULTY[self.difficulty]
         self.save(update_fields=["progress"])
 
+class ArchivedTrack(models.Model):
+    """
+    A finished progress track: a fulfilled :model:`characters.Vow` or a completed
+    :model:`characters.MinorQuest`.
+
+    Finished tracks are moved out of the vows and quests tables into this
+    append-only table, see ``characters.services.archive_track``, so the character
+    sheet and track lists only read active tracks. Archived tracks are never
+    edited; they are listed on the character's history page.
+    """
+    KINDS = [("vow", "Vow")] + MinorQuest.QUEST_TYPE
+
+    character = models.ForeignKey(Character, on_delete=models.CASCADE, related_name="archived_tracks")
+    kind = models.CharField(choices=KINDS, max_length=10)
+    difficulty = models.IntegerField(choices=settings.DIFFICULTY_LEVELS)
+    title = models.CharField(max_length=100)
+    description = models.TextField(null=True, blank=True)
+    progress = models.IntegerField(help_text="ticks, not progress boxes")
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-archived_at", "-pk"]
+        indexes = [models.Index(fields=["character", "-archived_at"], name="archived_track_history")]
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()}: {self.title}"#type: ignore
+
 class Debility(models.Model):
     """
     A debility affecting a character.
@@ -258,6 +388,36 @@ class Debility(models.Model):
     
     class Meta:
         verbose_name_plural = "Debilities"
+
+    @staticmethod
+    def sync_mask(character_id: int):
+        """
+        Recompute ``debilities_mask`` of a :model:`characters.Character` from its debilities.
+
+        The mask is computed by the database inside the UPDATE statement itself,
+        so concurrent changes can't leave it stale.
+        """
+        mask = Coalesce(Subquery(
+            Debility.objects.filter(character=OuterRef("pk"))
+                .values("character")
+                .annotate(mask=Sum(Case(
+                    *[When(name=name, then=Value(bit)) for name, bit in DEBILITY_BITS.items()],
+                    default=Value(0)
+                ), distinct=True))
+                .values("mask")
+        ), Value(0))
+        Character.objects.filter(pk=character_id).update(debilities_mask=mask)
+
+# bit of each debility in `Character.debilities_mask`
+DEBILITY_BITS = {name: 1 << i for i, (name, _) in enumerate(Debility.DEBILITIES)}
+
+# debility name: debility type, derived from the "Type: Name" labels of `Debility.DEBILITIES`
+DEBILITY_TYPE_OF = {
+    name: type_code
+    for name, label in Debility.DEBILITIES
+    for type_code, type_label in Debility.DEBILITY_TYPES
+    if label.startswith(type_label)
+}
     
 class CharacterAsset(models.Model):
     """
@@ -267,12 +427,13 @@ class CharacterAsset(models.Model):
     :model:`rules.AssetDefinition` and serves as the root container
     for character-specific asset state such as abilities and components.
 
-    When instantiated, the ``populate_character_assets`` signal handler
-    automatically creates related ability and component instances based
-    on the asset definition.
+    New assets are saved with ``characters.services.add_assets``, which creates
+    related ability and component instances based on the asset definition for
+    many assets at once. Assets saved one by one are populated by the
+    ``populate_character_assets`` signal handler instead.
     """
     character = models.ForeignKey(Character, on_delete=models.CASCADE, related_name='assets')
-    definition = models.ForeignKey('rules.AssetDefinition', on_delete=models.CASCADE)
+    definition = models.ForeignKey('rules.AssetDefinition', on_delete=models.CASCADE, db_constraint=False)
 
     class Meta:
         unique_together = ('character', 'definition')
@@ -280,6 +441,11 @@ class CharacterAsset(models.Model):
     def __str__(self):
         return f"{self.character.name}'s {self.definition.title}"
 
+    @property
+    def rules(self) -> registry.AssetRules:
+        """the asset definition, read from the rules registry instead of the database"""
+        return registry.get_registry().assets_by_id[self.definition_id]#type: ignore
+
 class CharacterAssetAbility(models.Model):
     """
     A character-specific instance of an asset ability.
@@ -288,7 +454,7 @@ class CharacterAssetAbility(models.Model):
     and tracks whether that ability is currently active for the character.
     """
     character_asset = models.ForeignKey(CharacterAsset, on_delete=models.CASCADE, related_name='abilities')
-    definition = models.ForeignKey('rules.AssetAbilityDefinition', on_delete=models.CASCADE)
+    definition = models.ForeignKey('rules.AssetAbilityDefinition', on_delete=models.CASCADE, db_constraint=False)
     is_active = models.BooleanField(default=False, 
         verbose_name="Is this ability active for this character", 
         help_text="Only active abilities provide narrative and mechanical effects")
@@ -299,6 +465,11 @@ class CharacterAssetAbility(models.Model):
     def __str__(self):
         return self.definition.title
 
+    @property
+    def rules(self) -> registry.AbilityRules:
+        """the ability definition, read from the rules registry instead of the database"""
+        return registry.get_registry().abilities_by_id[self.definition_id]#type: ignore
+
 class CharacterAssetComponent(models.Model):
     """
     A character-specific asset component.
@@ -309,11 +480,80 @@ class CharacterAssetComponent(models.Model):
     
     """
     character_asset = models.ForeignKey(CharacterAsset, on_delete=models.CASCADE, related_name='components')
-    definition = models.ForeignKey('rules.AssetComponentDefinition', on_delete=models.CASCADE)
+    definition = models.ForeignKey('rules.AssetComponentDefinition', on_delete=models.CASCADE, db_constraint=False)
     value = models.CharField(max_length=20, null=True, blank=True, help_text="Custom value such as companion name, deity name, or track state")
 
     class Meta:
         unique_together = ('character_asset', 'definition')
 
     def __str__(self):
-        return f"{self.definition.title} {self.value}"
\ No newline at end of file
+        return f"{self.definition.title} {self.value}"
+
+    @property
+    def rules(self) -> registry.ComponentRules:
+        """the component definition, read from the rules registry instead of the database"""
+        return registry.get_registry().components_by_id[self.definition_id]#type: ignore
+
+class VowSimulationResult(models.Model):
+    """
+    A cached result of the Monte Carlo vow-completion simulation.
+
+    Results are computed by the ``simulate_vows`` management command with
+    ``domain.simulation.simulate_vow`` and stored per difficulty rank and strategy,
+    so the expected milestones and fulfill odds of a :model:`characters.Vow`
+    are shown without simulating anything per request.
+    """
+    STRATEGIES = [(name, name.capitalize()) for name in simulation.STRATEGIES]
+    DEFAULT_STRATEGY = "steady"
+
+    difficulty = models.IntegerField(choices=settings.DIFFICULTY_LEVELS)
+    strategy = models.CharField(max_length=20, choices=STRATEGIES,
+        help_text="Progress score at which the fulfill roll is first attempted, see `domain.simulation.STRATEGIES`")
+    trials = models.PositiveIntegerField()
+
+    mean_milestones = models.FloatField()
+    milestones_ci_low = models.FloatField()
+    milestones_ci_high = models.FloatField()
+
+    fulfill_rate = models.FloatField(help_text="Share of vows fulfilled by the first fulfill roll")
+    fulfill_ci_low = models.FloatField()
+    fulfill_ci_high = models.FloatField()
+    strong_hit_rate = models.FloatField(help_text="Share of first fulfill rolls that were a strong hit")
+
+    milestones_histogram = models.JSONField(help_text="Number of trials fulfilled after N milestones, indexed by N")
+    simulated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("difficulty", "strategy")
+        ordering = ["difficulty", "strategy"]
+
+    def __str__(self) -> str:
+        return f"{self.get_difficulty_display()} vow, {self.strategy}: {self.mean_milestones:.1f} milestones"
+
+    @classmethod
+    def store(cls, difficulty: int, result: simulation.SimulationResult) -> "VowSimulationResult":
+        """Create or replace the cached result for ``difficulty`` and the result's strategy"""
+        milestones_ci_low, milestones_ci_high = result.milestones_ci
+        fulfill_ci_low, fulfill_ci_high = result.fulfill_ci
+
+        obj, _ = cls.objects.update_or_create(
+            difficulty=difficulty,
+            strategy=result.strategy,
+            defaults={
+                "trials": result.trials,
+                "mean_milestones": result.mean_milestones,
+                "milestones_ci_low": milestones_ci_low,
+                "milestones_ci_high": milestones_ci_high,
+                "fulfill_rate": result.fulfill_rate,
+                "fulfill_ci_low": fulfill_ci_low,
+                "fulfill_ci_high": fulfill_ci_high,
+                "strong_hit_rate": result.strong_hit_rate,
+                "milestones_histogram": list(result.milestones_histogram),
+            }
+        )
+        return obj
+
+    @classmethod
+    def by_difficulty(cls, strategy: str = DEFAULT_STRATEGY) -> dict[int, "VowSimulationResult"]:
+        """Returns cached results of ``strategy`` keyed by difficulty rank"""
+        return {result.difficulty: result for result in cls.objects.filter(strategy=strategy)}
@@ -0,0 +1,174 @@
+"""
+Write paths that create several related rows at once.
+
+Each service runs in a single transaction and inserts related rows with ``bulk_create``,
+so the number of statements doesn't grow with the number of rows. ``bulk_create`` sends
+no ``post_save`` signals, so the services do the work of the signals themselves.
+"""
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from ironsworn import routers
+from rules.models import AssetDefinition, AssetAbilityDefinition, AssetComponentDefinition
+
+from . import sheet_cache
+from .models import Character, Bond, Vow, MinorQuest, ArchivedTrack, CharacterAsset, CharacterAssetAbility, CharacterAssetComponent
+
+
+def instantiate_assets(assets: list[CharacterAsset]):
+    """
+    Create abilities and components of saved :model:`characters.CharacterAsset` objects.
+
+    Each asset gets a :model:`characters.CharacterAssetAbility` for every ability of its
+    definition, active if the ability is initially active, and a
+    :model:`characters.CharacterAssetComponent` for every component of its definition.
+
+    Definitions of all assets are read with two queries and rows are inserted with
+    two ``bulk_create`` calls, however many assets there are.
+    """
+    definition_ids = {asset.definition_id for asset in assets}#type: ignore
+    if not definition_ids:
+        return
+
+    abilities: dict[int, list[AssetAbilityDefinition]] = defaultdict(list)
+    for ability_def in AssetAbilityDefinition.objects.filter(asset_id__in=definition_ids):
+        abilities[ability_def.asset_id].append(ability_def)#type: ignore
+    components: dict[int, list[AssetComponentDefinition]] = defaultdict(list)
+    for component_def in AssetComponentDefinition.objects.filter(asset_id__in=definition_ids):
+        components[component_def.asset_id].append(component_def)#type: ignore
+
+    CharacterAssetAbility.objects.bulk_create([
+        CharacterAssetAbility(character_asset=asset, definition=ability_def, is_active=ability_def.initially_active)
+        for asset in assets
+        for ability_def in abilities[asset.definition_id]#type: ignore
+    ])
+    CharacterAssetComponent.objects.bulk_create([
+        CharacterAssetComponent(character_asset=asset, definition=component_def)
+        for asset in assets
+        for component_def in components[asset.definition_id]#type: ignore
+    ])
+
+def add_assets(assets: list[CharacterAsset]) -> list[CharacterAsset]:
+    """
+    Save new :model:`characters.CharacterAsset` objects together with their abilities and components.
+
+    Assets are inserted with one ``bulk_create`` and populated by ``instantiate_assets``,
+    in a single transaction. ``bulk_create`` sends no ``post_save``, so the
+    ``populate_character_assets`` signal doesn't populate them a second time.
+    """
+    with transaction.atomic(using=routers.db_for(CharacterAsset)):
+        assets = CharacterAsset.objects.bulk_create(assets)
+        instantiate_assets(assets)
+
+    for character_id in {asset.character_id for asset in assets}:#type: ignore
+        sheet_cache.bump_version(character_id)
+    return assets
+
+def create_character(user: User, character_data: dict, bond_descriptions=(), vow_data: dict | None = None,
+                     asset_definition_ids=()) -> Character:
+    """
+    Create a :model:`characters.Character` with its starting bonds, vow and assets.
+
+    Args:
+        user: Owner of the new character.
+        character_data: Field values of the character.
+        bond_descriptions: Descriptions of starting bonds. Blank descriptions are skipped.
+        vow_data: Field values of the background :model:`characters.Vow`, if any.
+        asset_definition_ids: Ids of the :model:`rules.AssetDefinition` of starting assets.
+            Empty and unknown ids are skipped.
+
+    Asset definitions are fetched with one ``in_bulk`` and bonds and assets are inserted
+    with one ``bulk_create`` each, see ``add_assets``, so the number of statements is fixed.
+    Either everything is created or nothing is.
+    """
+    asset_definition_ids = [pk for pk in asset_definition_ids if pk]
+
+    with transaction.atomic(using=routers.db_for(Character)):
+        character = Character.objects.create(user=user, **character_data)
+
+        bonds = [Bond(character=character, description=description)
+                 for description in bond_descriptions if description.strip()]
+        if bonds:
+            Bond.objects.bulk_create(bonds)
+
+        if vow_data:
+            Vow.objects.create(character=character, progress=0, **vow_data)
+
+        if asset_definition_ids:
+            definitions = AssetDefinition.objects.in_bulk(asset_definition_ids)
+            add_assets([
+                CharacterAsset(character=character, definition=definitions[int(pk)])
+                for pk in asset_definition_ids if int(pk) in definitions
+            ])
+
+    sheet_cache.bump_version(character.pk)
+    return character
+
+def apply_asset_edits(asset: CharacterAsset, component_values: dict[str, str | None], activated_abilities=()) -> int:
+    """
+    Save edited component values and newly activated abilities of a :model:`characters.CharacterAsset`.
+
+    Args:
+        asset: The edited asset. Its ``components`` and ``abilities`` should be prefetched,
+            see ``characters.loaders.character_assets_queryset``.
+        component_values: New values of components, by component title. Blank values are stored as NULL.
+        activated_abilities: Titles of abilities to activate. Active abilities can't be deactivated.
+
+    Submitted values are compared with the loaded rows and only changed rows are saved,
+    with one ``bulk_update`` per model inside a single transaction.
+
+    Returns the number of changed rows.
+
+    Raises:
+        KeyError: If a component or ability title doesn't belong to the asset.
+    """
+    components = {component.rules.title: component for component in asset.components.all()}#type: ignore
+    abilities = {ability.rules.title: ability for ability in asset.abilities.all()}#type: ignore
+
+    changed_components = []
+    for title, value in component_values.items():
+        component = components[title]
+        value = value or None
+        if component.value != value:
+            component.value = value
+            changed_components.append(component)
+
+    changed_abilities = []
+    for title in activated_abilities:
+        ability = abilities[title]
+        if not ability.is_active:
+            ability.is_active = True
+            changed_abilities.append(ability)
+
+    if not changed_components and not changed_abilities:
+        return 0
+
+    with transaction.atomic(using=routers.db_for(CharacterAsset, asset)):
+        CharacterAssetComponent.objects.bulk_update(changed_components, ["value"])
+        CharacterAssetAbility.objects.bulk_update(changed_abilities, ["is_active"])
+
+    sheet_cache.bump_version(asset.character_id)#type: ignore
+    return len(changed_components) + len(changed_abilities)
+
+def archive_track(track: Vow | MinorQuest) -> ArchivedTrack:
+    """
+    Move a fulfilled vow or a completed minor quest to the archive.
+
+    The :model:`characters.ArchivedTrack` is created and the track deleted in one
+    transaction. Deleting the track invalidates the character's cached sheet.
+    """
+    db = routers.db_for(type(track), track)
+    with transaction.atomic(using=db):
+        archived = ArchivedTrack.objects.using(db).create(
+            character_id=track.character_id,#type: ignore
+            kind="vow" if isinstance(track, Vow) else track.type,
+            difficulty=track.difficulty,
+            title=track.title,
+            description=track.description,
+            progress=track.progress,
+        )
+        track.delete()
+    return archived
+
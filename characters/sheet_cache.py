@@ -0,0 +1,94 @@
+"""
+Versioned cache of rendered character sheet sections.
+
+Every character has a version number in the cache, bumped by ``characters.signals``
+on any write to the character or its vows, bonds, quests, debilities and assets.
+A write inside a transaction bumps the version again on commit, and the sheet
+reads the version before the data, so a section rendered from data read before
+the commit is never cached under the version following it.
+Rendered sections are keyed by character, section and version, so a bump
+invalidates every section of a character in O(1), without scanning keys:
+stale entries are never read again and expire on their own.
+
+Cache hits and misses are counted in the cache as well, see ``get_stats``.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from ironsworn import routers
+
+VERSION_KEY = "character-sheet:{character_id}:version"
+FRAGMENT_KEY = "character-sheet:{character_id}:{section}:{version}{vary_on}"
+HITS_KEY = "character-sheet:hits"
+MISSES_KEY = "character-sheet:misses"
+
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+
+def _new_version() -> int:
+    """
+    Versions start at the current time in nanoseconds, so a version evicted
+    from the cache is never reused and can't resurrect stale sections.
+    """
+    return time.time_ns()
+
+def get_version(character_id: int) -> int:
+    """Returns the current sheet version of the character"""
+    key = VERSION_KEY.format(character_id=character_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+def bump_version(character_id: int, using: str | None = None):
+    """
+    Invalidate every cached section of the character's sheet, now and, inside
+    a transaction of the database ``using``, again once it is committed.
+    ``using`` defaults to the current shard, see ``ironsworn.routers``.
+    """
+    _bump(character_id)
+    using = using or routers.current_shard()
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(lambda: _bump(character_id), using=using)
+
+def _bump(character_id: int):
+    key = VERSION_KEY.format(character_id=character_id)
+    try:
+        cache.incr(key)
+    except ValueError:#version is not cached yet or was evicted
+        cache.add(key, _new_version(), timeout=None)
+
+
+def _count(key: str):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+def get_or_render(character_id: int, section: str, version: int, render, vary_on=()) -> str:
+    """
+    Returns the cached section of the character's sheet at ``version``.
+    On a miss, the section is rendered by calling ``render()`` and cached.
+
+    ``vary_on`` values are added to the key, for sections that also depend on data
+    outside the character, e.g. the rules generation for assets.
+    """
+    vary_on = "".join(f":{value}" for value in vary_on)
+    key = FRAGMENT_KEY.format(character_id=character_id, section=section, version=version, vary_on=vary_on)
+    content = cache.get(key)
+    if content is not None:
+        _count(HITS_KEY)
+        return content
+
+    _count(MISSES_KEY)
+    content = render()
+    cache.set(key, content, FRAGMENT_TIMEOUT)
+    return content
+
+def get_stats() -> dict[str, int]:
+    """Returns the number of section cache hits and misses"""
+    stats = cache.get_many([HITS_KEY, MISSES_KEY])
+    return {"hits": stats.get(HITS_KEY, 0), "misses": stats.get(MISSES_KEY, 0)}
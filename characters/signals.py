@@ -1,35 +1,90 @@
-from django.db.models.signals import post_save
+from django.contrib.auth.models import User
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 
-from .models import CharacterAssetAbility, CharacterAssetComponent, CharacterAsset
+from ironsworn import deletion
+
+from . import sheet_cache
+from .services import instantiate_assets
+from .models import CharacterAssetAbility, CharacterAssetComponent, CharacterAsset, Character, Bond, Debility, Vow, MinorQuest
 
 @receiver(post_save, sender=CharacterAsset)
 def populate_character_assets(sender, instance, created, **kwargs):
     """
-    Automatically instantiate asset abilities and components when a character acquires an asset.
+    Instantiate asset abilities and components of a :model:`characters.CharacterAsset`
+    created with a plain ``save()``.
+
+    This is a fallback: views, admin and character creation add assets with
+    ``characters.services.add_assets``, which populates many assets at once and
+    sends no ``post_save``. See ``characters.services.instantiate_assets``.
+    """
+    if not created or kwargs.get("raw"):
+        return
+
+    instantiate_assets([instance])
 
-    When a new :model:`characters.CharacterAsset` is created, this signal:
-    1. Retrieves all ability definitions from the asset's definition
-    2. Creates :model:`characters.CharacterAssetAbility` instances for each ability,
-       with is_active field matching the ability definition's initially_active field
-    3. Retrieves all component definitions from the asset's definition
-    4. Creates :model:`characters.CharacterAssetComponent` instances for each component
+@receiver(post_save, sender=Bond)
+def count_new_bond(sender, instance, created, **kwargs):
+    """
+    Add a newly forged :model:`characters.Bond` to the bonds progress of its character.
 
-    This ensures complete asset initialization without requiring manual creation of
-    related ability and component instances.
+    The ``bonds_ticks`` column is incremented in the database with ``F()``,
+    so concurrent bond creation can't lose updates.
     """
     if not created:
         return
-        
-    asset_definition = instance.definition
-
-    for ability_def in asset_definition.abilities.all():
-        CharacterAssetAbility.objects.create(
-            character_asset=instance,
-            definition=ability_def,
-            is_active=ability_def.initially_active)
-        
-    for component_def in asset_definition.components.all():
-        CharacterAssetComponent.objects.create(
-            character_asset=instance,
-            definition=component_def)
\ No newline at end of file
+
+    Character.objects.filter(pk=instance.character_id).update(bonds_ticks=F("bonds_ticks") + 1)
+
+@receiver(post_delete, sender=Bond)
+def uncount_deleted_bond(sender, instance, **kwargs):
+    """
+    Remove a deleted :model:`characters.Bond` from the bonds progress of its character.
+
+    Fires for single and queryset deletes, including admin inlines.
+    """
+    Character.objects.filter(pk=instance.character_id).update(bonds_ticks=Greatest(F("bonds_ticks") - 1, Value(0)))
+
+@receiver([post_save, post_delete], sender=Debility)
+def sync_debilities_mask(sender, instance, **kwargs):
+    """
+    Keep ``debilities_mask`` of the :model:`characters.Character` in sync with its
+    :model:`characters.Debility` rows whenever a debility is marked, edited or cleared.
+    """
+    Debility.sync_mask(instance.character_id)
+
+@receiver([post_save, post_delete], sender=Character)
+def bump_sheet_version(sender, instance, using=None, **kwargs):
+    """Invalidate cached sheet sections of a changed or deleted :model:`characters.Character`"""
+    sheet_cache.bump_version(instance.pk, using)
+
+def bump_owner_sheet_version(sender, instance, using=None, **kwargs):
+    """Invalidate cached sheet sections of the character owning a changed or deleted object"""
+    sheet_cache.bump_version(instance.character_id, using)
+
+for model in (Vow, Bond, MinorQuest, Debility, CharacterAsset):
+    post_save.connect(bump_owner_sheet_version, sender=model, dispatch_uid=f"bump_sheet_version_on_save_{model.__name__}")
+    post_delete.connect(bump_owner_sheet_version, sender=model, dispatch_uid=f"bump_sheet_version_on_delete_{model.__name__}")
+
+@receiver([post_save, post_delete], sender=CharacterAssetAbility)
+@receiver([post_save, post_delete], sender=CharacterAssetComponent)
+def bump_asset_owner_sheet_version(sender, instance, using=None, **kwargs):
+    """Invalidate cached sheet sections of the character owning a changed asset ability or component"""
+    character_id = CharacterAsset.objects.using(using).filter(pk=instance.character_asset_id).values_list("character_id", flat=True).first()
+    if character_id is not None:
+        sheet_cache.bump_version(character_id, using)
+
+@receiver(pre_delete, sender=User)
+def delete_user_data(sender, instance, **kwargs):
+    """
+    Delete the worlds and characters of a deleted ``User`` from their shard, see ``ironsworn.routers``.
+
+    ``User.delete()``, as run by the admin, only collects related rows in the
+    ``default`` database and would leave the rows on the other shards behind.
+    Runs in the transaction of ``User.delete()``, see ``ironsworn.deletion.delete_user_data``;
+    skipped when ``ironsworn.deletion.delete_user`` already deleted them, in short transactions.
+    """
+    if not deletion.user_data_deleted(instance.pk):
+        deletion.delete_user_data(instance.pk)
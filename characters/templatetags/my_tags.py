@@ -1,5 +1,7 @@
 from django import template
 
+from characters import sheet_cache
+
 register = template.Library()
 
 @register.filter
@@ -10,4 +12,58 @@ def modulo(num:int, val:int) -> int:
     :param num: Integer number
     :param val: Integer value to modulo by
     """
-    return num % val
\ No newline at end of file
+    return num % val
+
+@register.filter
+def percent(probability) -> str:
+    """
+    returns probability formatted as a percentage with one decimal place
+
+    :param probability: Number between 0 and 1, e.g. float or Fraction
+    """
+    return f"{float(probability) * 100:.1f}%"
+
+@register.filter
+def get_item(mapping:dict, key):
+    """
+    returns mapping[key] or None if key is missing
+    
+    :param mapping: Dictionary to look the key up in
+    :param key: Key, can be a template variable
+    """
+    return mapping.get(key)
+
+
+class SheetCacheNode(template.Node):
+    def __init__(self, nodelist, section, character_id, version, *vary_on):
+        self.nodelist = nodelist
+        self.section = section
+        self.character_id = character_id
+        self.version = version
+        self.vary_on = vary_on
+
+    def render(self, context):
+        return sheet_cache.get_or_render(
+            self.character_id.resolve(context),
+            self.section.resolve(context),
+            self.version.resolve(context),
+            lambda: self.nodelist.render(context),
+            [value.resolve(context) for value in self.vary_on],
+        )
+
+@register.tag
+def sheetcache(parser, token):
+    """
+    Cache a section of the character sheet until the character's sheet version changes.
+
+    Usage: ``{% sheetcache "section" character.pk sheet_version [vary_on ...] %} ... {% endsheetcache %}``
+
+    Optional ``vary_on`` values are added to the cache key. See ``characters.sheet_cache``.
+    """
+    bits = token.split_contents()
+    if len(bits) < 4:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires section, character id and version arguments")
+
+    nodelist = parser.parse(("endsheetcache",))
+    parser.delete_first_token()
+    return SheetCacheNode(nodelist, *(parser.compile_filter(bit) for bit in bits[1:]))
@@ -1,3 +1,490 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction, IntegrityError
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rules.models import AssetDefinition, AssetAbilityDefinition, AssetComponentDefinition
+from rules.registry import get_registry
+
+from . import sheet_cache
+from .views import CharacterSheetView
+from .loaders import load_character_sheet, character_assets_queryset, SHEET_QUERIES
+from .services import create_character, add_assets, apply_asset_edits, archive_track
+from .models import Character, Vow, ArchivedTrack, Bond, Debility, MinorQuest, CharacterAsset, CharacterAssetAbility, CharacterAssetComponent, VowSimulationResult
+
+
+class CharacterTestCase(TestCase):
+    """Logged in user with one character"""
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="player", password="pass")
+        self.client.force_login(self.user)
+        self.character = Character.objects.create(user=self.user, name="Kara", description="Wanderer")
+
+
+class VowSimulationTest(CharacterTestCase):
+    def test_command_stores_every_difficulty(self):
+        call_command("simulate_vows", trials=500, workers=1, seed=1, strategy=["steady"], stdout=StringIO())
+
+        results = VowSimulationResult.by_difficulty("steady")
+        self.assertEqual(set(results), set(settings.TICK_PER_DIFFICULTY))
+        self.assertEqual(results[5].trials, 500)
+        self.assertLessEqual(results[5].milestones_ci_low, results[5].mean_milestones)
+
+    def test_command_replaces_cached_result(self):
+        call_command("simulate_vows", trials=100, workers=1, strategy=["bold"], stdout=StringIO())
+        call_command("simulate_vows", trials=200, workers=1, strategy=["bold"], stdout=StringIO())
+
+        self.assertEqual(VowSimulationResult.objects.filter(strategy="bold").count(), len(settings.TICK_PER_DIFFICULTY))
+        self.assertEqual(VowSimulationResult.objects.filter(trials=200).count(), len(settings.TICK_PER_DIFFICULTY))
+
+    def test_vows_list_shows_odds(self):
+        call_command("simulate_vows", trials=100, workers=1, seed=1, strategy=[VowSimulationResult.DEFAULT_STRATEGY], stdout=StringIO())
+        Vow.objects.create(character=self.character, title="Avenge", difficulty=3)
+
+        response = self.client.get(reverse("characters:vows-list", args=[self.character.pk]))
+        self.assertContains(response, "Expected milestones")
+
+
+class BondsProgressTest(CharacterTestCase):
+    def bonds_ticks(self):
+        return Character.objects.values_list("bonds_ticks", flat=True).get(pk=self.character.pk)
+
+    def test_new_bond_view_counts_bond(self):
+        self.client.post(reverse("characters:add-bond", args=[self.character.pk]), {"description": "Village"})
+        self.assertEqual(self.bonds_ticks(), 1)
+
+    def test_delete_uncounts_bond(self):
+        bond = Bond.objects.create(character=self.character, description="Village")
+        Bond.objects.create(character=self.character, description="Mentor")
+        bond.delete()
+        self.assertEqual(self.bonds_ticks(), 1)
+        Bond.objects.filter(character=self.character).delete()
+        self.assertEqual(self.bonds_ticks(), 0)
+
+    def test_bulk_create_counts_bonds(self):
+        other = Character.objects.create(user=self.user, name="Ash", description="Hunter")
+        Bond.objects.bulk_create([
+            Bond(character=self.character, description="Village"),
+            Bond(character=self.character, description="Mentor"),
+            Bond(character=other, description="Clan"),
+        ])
+        self.assertEqual(self.bonds_ticks(), 2)
+        other.refresh_from_db()
+        self.assertEqual(other.bonds_progress, 1)
+
+    def test_sheet_reads_bonds_from_row(self):
+        Bond.objects.create(character=self.character, description="Village")
+        self.character.refresh_from_db()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.character.bonds_progress, 1)
+
+    def test_reconcile_bonds(self):
+        Bond.objects.create(character=self.character, description="Village")
+        Character.objects.filter(pk=self.character.pk).update(bonds_ticks=7)
+
+        call_command("reconcile_bonds", dry_run=True, stdout=StringIO())
+        self.assertEqual(self.bonds_ticks(), 7)
+
+        call_command("reconcile_bonds", stdout=StringIO())
+        self.assertEqual(self.bonds_ticks(), 1)
+
+
+class DebilitiesMaskTest(CharacterTestCase):
+    def toggle(self, name):
+        return self.client.get(reverse("characters:toggle-debility", args=[self.character.pk, name]))
+
+    def test_toggle_marks_and_clears(self):
+        self.toggle("wounded")
+        self.character.refresh_from_db()
+        self.assertEqual(self.character.marked_debilities, ["wounded"])
+        self.assertEqual(self.character.debilities.get().type, "cond")
+
+        self.toggle("wounded")
+        self.character.refresh_from_db()
+        self.assertEqual(self.character.marked_debilities, [])
+        self.assertFalse(self.character.debilities.exists())
+
+    def test_unknown_debility(self):
+        self.toggle("tired")
+        self.assertFalse(self.character.debilities.exists())
+
+    def test_mask_follows_debility_rows(self):
+        Debility.objects.create(character=self.character, name="maimed", type="bane")
+        Debility.objects.create(character=self.character, name="cursed", type="burd")
+        self.character.refresh_from_db()
+        self.assertEqual(self.character.marked_debilities, ["maimed", "cursed"])
+
+        self.character.debilities.filter(name="maimed").delete()
+        self.character.refresh_from_db()
+        self.assertEqual(self.character.marked_debilities, ["cursed"])
+
+    def test_momentum_limits_without_queries(self):
+        for name in ("wounded", "shaken"):
+            self.toggle(name)
+        self.character.refresh_from_db()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.character.momentum_max, 8)
+            self.assertEqual(self.character.momentum_reset, 0)
+
+    def test_sheet_lists_marked_debilities(self):
+        self.toggle("maimed")
+        response = self.client.get(reverse("characters:character-sheet", args=[self.character.pk]))
+        self.assertEqual(response.context["char_banes"], ["maimed"])
+        self.assertEqual(response.context["char_conditions"], [])
+
+
+class CharacterSheetLoaderTest(CharacterTestCase):
+    def add_assets(self, count):
+        for i in range(count):
+            definition = AssetDefinition.objects.create(title=f"Asset {i}", description="", type="path")
+            for j in range(3):
+                AssetAbilityDefinition.objects.create(asset=definition, title=f"Ability {j}", description="...", initially_active=j == 0)
+            AssetComponentDefinition.objects.create(asset=definition, title="Name")
+            CharacterAsset.objects.create(character=self.character, definition=definition)
+
+    def sheet_queries(self):
+        url = reverse("characters:character-sheet", args=[self.character.pk])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_loader_query_budget(self):
+        self.add_assets(3)
+        Vow.objects.create(character=self.character, title="Avenge", difficulty=3)
+        MinorQuest.objects.create(character=self.character, type="journey", title="To Havens", difficulty=2)
+
+        get_registry()
+        with self.assertNumQueries(SHEET_QUERIES):
+            character = load_character_sheet(self.character.pk)
+            for asset in character.assets.all():#type: ignore
+                [(c.rules.title, c.value) for c in asset.components.all()]
+                [(a.rules.title, a.is_active) for a in asset.abilities.all()]
+            self.assertEqual(len(character.active_vows), 1)#type: ignore
+            self.assertEqual(character.latest_quests[0].title, "To Havens")#type: ignore
+
+    def test_sheet_query_count_is_constant(self):
+        self.add_assets(1)
+        one_asset = self.sheet_queries()
+        self.add_assets(4)
+        Vow.objects.create(character=self.character, title="Avenge", difficulty=3)
+        Vow.objects.create(character=self.character, title="Protect", difficulty=2)
+        self.assertEqual(self.sheet_queries(), one_asset)
+
+    def test_sheet_hides_fulfilled_vows(self):
+        archive_track(Vow.objects.create(character=self.character, title="Avenge", difficulty=3))
+        Vow.objects.create(character=self.character, title="Protect", difficulty=2)
+        response = self.client.get(reverse("characters:character-sheet", args=[self.character.pk]))
+        self.assertContains(response, "Protect")
+        self.assertNotContains(response, "Avenge")
+
+    def test_sheet_shows_latest_quest(self):
+        MinorQuest.objects.create(character=self.character, type="journey", title="To Havens", difficulty=2)
+        MinorQuest.objects.create(character=self.character, type="fight", title="Broken Bridge", difficulty=2)
+        response = self.client.get(reverse("characters:character-sheet", args=[self.character.pk]))
+        self.assertContains(response, "Broken Bridge")
+        self.assertNotContains(response, "To Havens")
+
+
+class SheetCacheTest(CharacterTestCase):
+    def get_sheet(self):
+        return self.client.get(reverse("characters:character-sheet", args=[self.character.pk]))
+
+    def test_unchanged_sections_come_from_cache(self):
+        self.get_sheet()
+        self.assertEqual(sheet_cache.get_stats(), {"hits": 0, "misses": 4})
+        self.get_sheet()
+        self.assertEqual(sheet_cache.get_stats(), {"hits": 4, "misses": 4})
+
+    def test_writes_bump_version(self):
+        writes = [
+            lambda: self.character.change_momentum(1),
+            lambda: Vow.objects.create(character=self.character, title="Avenge", difficulty=3),
+            lambda: Bond.objects.create(character=self.character, description="Havens"),
+            lambda: Bond.objects.bulk_create([Bond(character=self.character, description="Elder")]),
+            lambda: MinorQuest.objects.create(character=self.character, type="journey", title="To Havens", difficulty=2),
+            lambda: Debility.objects.create(character=self.character, name="wounded", type="cond"),
+        ]
+        for write in writes:
+            version = sheet_cache.get_version(self.character.pk)
+            write()
+            self.assertNotEqual(sheet_cache.get_version(self.character.pk), version)
+
+    def test_asset_edit_bumps_version(self):
+        definition = AssetDefinition.objects.create(title="Hawk", description="", type="companion")
+        AssetAbilityDefinition.objects.create(asset=definition, title="Keen", description="...", initially_active=True)
+        asset = CharacterAsset.objects.create(character=self.character, definition=definition)
+
+        version = sheet_cache.get_version(self.character.pk)
+        ability = asset.abilities.get()#type: ignore
+        ability.is_active = False
+        ability.save()
+        self.assertNotEqual(sheet_cache.get_version(self.character.pk), version)
+
+    def test_write_in_transaction_bumps_version_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.character.change_momentum(1)
+                # read by a request between the write and the commit
+                version = sheet_cache.get_version(self.character.pk)
+        self.assertNotEqual(sheet_cache.get_version(self.character.pk), version)
+
+    def test_version_is_read_before_data(self):
+        version = sheet_cache.get_version(self.character.pk)
+        get_queryset = CharacterSheetView.get_queryset
+
+        def write_then_load(view):
+            sheet_cache.bump_version(self.character.pk)
+            return get_queryset(view)
+
+        with patch.object(CharacterSheetView, "get_queryset", write_then_load):
+            response = self.get_sheet()
+        self.assertEqual(response.context["sheet_version"], version)
+
+    def test_sheet_shows_changes(self):
+        self.get_sheet()
+        Vow.objects.create(character=self.character, title="Avenge", difficulty=3)
+        self.assertContains(self.get_sheet(), "Avenge")
+
+    def test_stats_view_is_staff_only(self):
+        url = reverse("characters:sheet-cache-stats")
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.get_sheet()
+        self.assertEqual(self.client.get(url).json(), {"hits": 0, "misses": 4})
+
+
+class TrackerDeltasTest(CharacterTestCase):
+    def post_deltas(self, deltas, char_id=None):
+        url = reverse("characters:apply-tracker-deltas", args=[char_id or self.character.pk])
+        return self.client.post(url, deltas, content_type="application/json")
+
+    def test_deltas_are_clamped_in_a_single_update(self):
+        with self.assertNumQueries(1):
+            Character.objects.filter(pk=self.character.pk).apply_deltas({"health": 3, "supply": -9, "momentum": 20})#type: ignore
+        self.character.refresh_from_db()
+        self.assertEqual(self.character.health, settings.RESOURCE_TRACK[0])
+        self.assertEqual(self.character.supply, settings.RESOURCE_TRACK[-1])
+        self.assertEqual(self.character.momentum, settings.MOMENTUM_TRACK[0])
+
+    def test_momentum_is_clamped_to_momentum_max(self):
+        Debility.objects.create(character=self.character, name="wounded", type="cond")
+        Debility.objects.create(character=self.character, name="cursed", type="burd")
+        self.character.change_momentum(20)
+        self.assertEqual(self.character.momentum, 8)
+        self.character.change_momentum(-30)
+        self.assertEqual(self.character.momentum, settings.MOMENTUM_TRACK[-1])
+
+    def test_experience_cant_be_overspent(self):
+        self.character.change_experience("spend")
+        self.assertEqual(self.character.spent_experience, 0)
+        Character.objects.filter(pk=self.character.pk).apply_deltas({"experience": 30, "spent_experience": 25})#type: ignore
+        self.character.refresh_from_db()
+        self.assertEqual(self.character.experience, 20)
+        self.assertEqual(self.character.spent_experience, 20)
+
+    def test_stale_instances_dont_lose_updates(self):
+        other_tab = Character.objects.get(pk=self.character.pk)
+        self.character.change_resource("health", -1)
+        other_tab.change_resource("health", -1)
+        self.assertEqual(other_tab.health, 3)
+
+    def test_batch_endpoint(self):
+        response = self.post_deltas({"health": -1, "supply": -1, "momentum": 2})
+        self.assertEqual(response.json(), {"health": 4, "supply": 4, "momentum": 4})
+
+    def test_batch_endpoint_rejects_invalid_deltas(self):
+        self.assertEqual(self.post_deltas({"edge": 1}).status_code, 400)
+        self.assertEqual(self.post_deltas({"health": "1"}).status_code, 400)
+        self.assertEqual(self.post_deltas([1]).status_code, 400)
+        self.assertEqual(self.post_deltas({"health": 10**30}).status_code, 400)
+        self.character.refresh_from_db()
+        self.assertEqual(self.character.edge, 0)
+
+    def test_batch_endpoint_is_user_scoped(self):
+        other = User.objects.create_user(username="other", password="pass")
+        character = Character.objects.create(user=other, name="Ash", description="")
+        self.assertEqual(self.post_deltas({"health": -1}, char_id=character.pk).status_code, 404)
+
+
+class CreateCharacterTest(CharacterTestCase):
+    def make_definitions(self, count):
+        ids = []
+        for i in range(count):
+            definition = AssetDefinition.objects.create(title=f"Asset {i}", description="", type="path")
+            for j in range(3):
+                AssetAbilityDefinition.objects.create(asset=definition, title=f"Ability {j}", description="...", initially_active=j == 0)
+            AssetComponentDefinition.objects.create(asset=definition, title="Name")
+            ids.append(str(definition.pk))
+        return ids
+
+    def create(self, asset_ids):
+        return create_character(
+            self.user,
+            {"name": "Ash", "description": "Pregen", "edge": 3, "heart": 2, "iron": 2, "shadow": 1, "wits": 1},
+            ["Village", "", "Mentor"],
+            {"title": "Avenge", "description": "...", "difficulty": "4"},
+            asset_ids,
+        )
+
+    def test_creates_related_objects(self):
+        character = self.create(self.make_definitions(3) + ["", "9999"])
+        self.assertEqual(character.bonds.count(), 2)#type: ignore
+        self.assertEqual(Character.objects.get(pk=character.pk).bonds_ticks, 2)
+        self.assertEqual(character.vows.get().title, "Avenge")#type: ignore
+        self.assertEqual(character.assets.count(), 3)#type: ignore
+        self.assertEqual(CharacterAssetAbility.objects.filter(character_asset__character=character).count(), 9)
+        self.assertEqual(CharacterAssetAbility.objects.filter(character_asset__character=character, is_active=True).count(), 3)
+        self.assertEqual(CharacterAssetComponent.objects.filter(character_asset__character=character).count(), 3)
+
+    def test_statement_count_is_fixed(self):
+        one_asset = self.make_definitions(1)
+        three_assets = self.make_definitions(3)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.create(one_asset)
+        with self.assertNumQueries(len(queries)):
+            self.create(three_assets)
+
+    def test_creation_is_atomic(self):
+        with self.assertRaises(IntegrityError):
+            create_character(self.user, {"name": "Ash", "description": ""}, ["Village"], {"title": None, "difficulty": 4})
+        self.assertFalse(Character.objects.filter(name="Ash").exists())
+        self.assertFalse(Bond.objects.exists())
+
+
+class AddAssetsTest(CharacterTestCase):
+    def make_definition(self, title):
+        definition = AssetDefinition.objects.create(title=title, description="", type="companion")
+        for j in range(3):
+            AssetAbilityDefinition.objects.create(asset=definition, title=f"Ability {j}", description="...", initially_active=j == 0)
+        AssetComponentDefinition.objects.create(asset=definition, title="Name")
+        return definition
+
+    def test_query_count_is_fixed(self):
+        definitions = [self.make_definition(f"Asset {i}") for i in range(3)]
+        party = [Character.objects.create(user=self.user, name=f"Pregen {i}", description="") for i in range(3)]
+        assets = [CharacterAsset(character=character, definition=definition)
+                  for character in party for definition in definitions]
+
+        # savepoint, assets insert, two definition reads, abilities and components inserts, release
+        with self.assertNumQueries(7):
+            add_assets(assets)
+        self.assertEqual(CharacterAssetAbility.objects.filter(character_asset__in=assets).count(), 27)
+        self.assertEqual(CharacterAssetComponent.objects.filter(character_asset__in=assets).count(), 9)
+
+    def test_signal_fallback_populates_once(self):
+        definition = self.make_definition("Hawk")
+        asset = CharacterAsset.objects.create(character=self.character, definition=definition)
+        self.assertEqual(asset.abilities.count(), 3)#type: ignore
+        self.assertEqual(asset.components.count(), 1)#type: ignore
+
+    def test_add_asset_view(self):
+        definition = self.make_definition("Hawk")
+        self.client.post(reverse("characters:add-asset", args=[self.character.pk]), {"definition": definition.pk})
+        asset = CharacterAsset.objects.get(character=self.character)
+        self.assertEqual(asset.abilities.filter(is_active=True).count(), 1)#type: ignore
+        self.assertEqual(asset.abilities.count(), 3)#type: ignore
+
+
+class AssetEditTest(CharacterTestCase):
+    def setUp(self):
+        super().setUp()
+        definition = AssetDefinition.objects.create(title="Hawk", description="", type="companion")
+        AssetAbilityDefinition.objects.create(asset=definition, title="Keen", description="...", initially_active=True)
+        AssetAbilityDefinition.objects.create(asset=definition, title="Hunt", description="...")
+        AssetAbilityDefinition.objects.create(asset=definition, title="Scout", description="...")
+        AssetComponentDefinition.objects.create(asset=definition, title="Name")
+        self.asset = add_assets([CharacterAsset(character=self.character, definition=definition)])[0]
+        get_registry()
+
+    def edit_url(self, json=False):
+        name = "characters:character-asset-edit-json" if json else "characters:character-asset-edit"
+        return reverse(name, args=[self.character.pk, self.asset.pk])
+
+    def test_only_changed_rows_are_saved(self):
+        asset = character_assets_queryset().get(pk=self.asset.pk)
+        # savepoint, one bulk update, release
+        with self.assertNumQueries(3):
+            changed = apply_asset_edits(asset, {"Name": "Kestrel"}, ["Keen"])
+        self.assertEqual(changed, 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(apply_asset_edits(asset, {"Name": "Kestrel"}), 0)
+
+    def test_edit_view(self):
+        self.assertContains(self.client.get(self.edit_url()), "Hunt")
+        response = self.client.post(self.edit_url(), {"component_Name": "Kestrel", "ability_Hunt": "on"})
+        self.assertRedirects(response, reverse("characters:character-assets-list", args=[self.character.pk]))
+        self.assertEqual(self.asset.components.get().value, "Kestrel")#type: ignore
+        self.assertEqual(set(self.asset.abilities.filter(is_active=True).values_list("definition__title", flat=True)), {"Keen", "Hunt"})#type: ignore
+
+    def test_json_edit(self):
+        response = self.client.post(self.edit_url(json=True), {"components": {"Name": "Kestrel"}, "activate": ["Scout"]},
+                                    content_type="application/json")
+        self.assertEqual(response.json(), {
+            "changed": 2,
+            "components": {"Name": "Kestrel"},
+            "abilities": {"Keen": True, "Hunt": False, "Scout": True},
+        })
+
+    def test_json_edit_rejects_unknown_titles(self):
+        response = self.client.post(self.edit_url(json=True), {"activate": ["Fly"]}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(self.asset.abilities.filter(definition__title="Fly").exists())#type: ignore
+
+    def test_json_edit_rejects_invalid_values(self):
+        for edits in ({"activate": [{}]}, {"components": {"Name": "K" * 21}}):
+            response = self.client.post(self.edit_url(json=True), edits, content_type="application/json")
+            self.assertEqual(response.status_code, 400)
+        self.assertIsNone(self.asset.components.get().value)#type: ignore
+
+
+class ArchiveTest(CharacterTestCase):
+    def setUp(self):
+        super().setUp()
+        self.vow = Vow.objects.create(character=self.character, title="Avenge", description="my kin", difficulty=3, progress=12)
+        self.quest = MinorQuest.objects.create(character=self.character, type="journey", title="To Havens", difficulty=2, progress=40)
+
+    def test_fulfill_vow_archives_it(self):
+        self.client.get(reverse("characters:fulfill-vow", args=[self.character.pk, self.vow.pk]))
+        self.assertFalse(Vow.objects.filter(pk=self.vow.pk).exists())
+        archived = self.character.archived_tracks.get()#type: ignore
+        self.assertEqual((archived.kind, archived.title, archived.description, archived.difficulty, archived.progress),
+                         ("vow", "Avenge", "my kin", 3, 12))
+
+    def test_finish_quest_archives_it(self):
+        response = self.client.post(reverse("characters:finish-quest", args=[self.character.pk, self.quest.pk]))
+        self.assertRedirects(response, reverse("characters:quests-list", args=[self.character.pk]))
+        self.assertFalse(MinorQuest.objects.exists())
+        self.assertEqual(self.character.archived_tracks.get().kind, "journey")#type: ignore
+
+    def test_only_own_tracks(self):
+        other = Character.objects.create(user=User.objects.create_user(username="other", password="pass"), name="Other", description="")
+        vow = Vow.objects.create(character=other, title="Theirs", difficulty=1)
+        quest = MinorQuest.objects.create(character=other, type="fight", title="Their fight", difficulty=1)
+        self.assertEqual(self.client.get(reverse("characters:fulfill-vow", args=[other.pk, vow.pk])).status_code, 404)
+        self.assertEqual(self.client.post(reverse("characters:finish-quest", args=[other.pk, quest.pk])).status_code, 404)
+        self.assertFalse(ArchivedTrack.objects.exists())
+
+    def test_archiving_invalidates_sheet(self):
+        version = sheet_cache.get_version(self.character.pk)
+        archive_track(self.vow)
+        self.assertNotEqual(sheet_cache.get_version(self.character.pk), version)
+
+    def test_history_page(self):
+        archive_track(self.vow)
+        archive_track(self.quest)
+        response = self.client.get(reverse("characters:track-history", args=[self.character.pk]))
+        self.assertEqual([track.title for track in response.context["tracks_list"]], ["To Havens", "Avenge"])
+        self.assertContains(response, "JOURNEY FINISHED")
 
-# Create your tests here.
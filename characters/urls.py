@@ -12,6 +12,7 @@ urlpatterns = [
     path('<int:char_id>/add-asset/', views.AddAssetView.as_view(), name='add-asset'),
     path('<int:char_id>/assets/', views.CharacterAssetsListView.as_view(), name='character-assets-list'),
     path('<int:char_id>/asset/<int:pk>/edit', views.CharacterAssetEditView.as_view(), name='character-asset-edit'),
+    path('<int:char_id>/asset/<int:pk>/edit.json', views.edit_character_asset, name='character-asset-edit-json'),
     path('<int:char_id>/bonds/', views.CharacterBondsList.as_view(), name='character-bonds-list'),
     path('<int:char_id>/bond/<int:pk>/edit/', views.EditBondView.as_view(), name='edit-bond'),
     path('<int:char_id>/add-bond/', views.NewBondView.as_view(), name='add-bond'),
@@ -19,11 +20,15 @@ urlpatterns = [
     path('<int:char_id>/quest/add', views.NewMinorQuestView.as_view(), name="add-quest"),
     path('<int:char_id>/quest/<int:pk>/edit/', views.EditMinorQuestView.as_view(), name="edit-quest"),
     path('<int:char_id>/quest/<int:pk>/finish/', views.FinishQuestView.as_view(), name="finish-quest"),
+    path('<int:char_id>/history/', views.TrackHistoryView.as_view(), name="track-history"),
     path('<int:char_id>/add-vow/', views.NewVowView.as_view(), name='add-vow'),
     path('<int:char_id>/vows/', views.CharacterVowsListView.as_view(), name="vows-list"),
     path('<int:char_id>/vow/<int:pk>/edit/', views.EditVowView.as_view(), name="edit-vow"),
     path('<int:char_id>/vow/<int:pk>/fulfill/', views.fulfill_vow, name="fulfill-vow"),
     path('<int:char_id>/change/', views.change_resource, name="change-resource"),
+    path('<int:char_id>/trackers/', views.apply_tracker_deltas, name="apply-tracker-deltas"),
     path('<int:char_id>/progress', views.increase_progress, name="increase-progress"),
-    path('<int:char_id>/exp/',views.change_experience, name="change-exp")
+    path('<int:char_id>/exp/',views.change_experience, name="change-exp"),
+    path('<int:char_id>/debility/<str:name>/toggle/', views.toggle_debility, name="toggle-debility"),
+    path('sheet-cache/stats/', views.sheet_cache_stats, name="sheet-cache-stats"),
 ]
\ No newline at end of file
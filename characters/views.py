@@ -1,7 +1,10 @@
+import json
 from typing import Any
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import CreateView, DetailView, ListView, UpdateView, DeleteView
-from django.http import HttpRequest, HttpResponse
+from django.http import HttpRequest, HttpResponse, JsonResponse, Http404
+from django.views.decorators.http import require_POST
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.conf import settings
@@ -10,10 +13,14 @@ from django.urls import reverse
 from domain import progress_track as pt
 
 from rules.models import AssetDefinition
+from rules.registry import get_registry
 
-from .models import Character, Bond, Vow, CharacterAsset, Debility, MinorQuest, CharacterAssetComponent, CharacterAssetAbility
+from .models import Character, Bond, Vow, ArchivedTrack, CharacterAsset, Debility, MinorQuest, CharacterAssetComponent, CharacterAssetAbility, VowSimulationResult, DEBILITY_BITS, DEBILITY_TYPE_OF, TRACKERS
 from .forms import *
 from .mixins import AddCharacterContextMixin, SaveCharacterAttributeMixin, BelongsToCharacterMixin
+from .loaders import character_sheet_queryset, character_assets_queryset
+from .services import create_character, add_assets, apply_asset_edits, archive_track
+from . import sheet_cache
 
 CC_STAGES_FORMS = [
     CharBaseInfoForm,
@@ -24,6 +31,10 @@ CC_STAGES_FORMS = [
     InitialAssetsForm,
 ]
 
+TRACKS_PER_PAGE = 50
+# larger than the range of any tracker, deltas are clamped anyway
+MAX_TRACKER_DELTA = 100
+
 @login_required
 def character_creation(request: HttpRequest):
     """
@@ -112,10 +123,12 @@ def save_character(request: HttpRequest) -> HttpResponse:
     which should have been populated by preceding stages in the ``character_creation()``
     view.
 
-    Related objects are created as follows:
+    The character and its related objects are created by
+    ``characters.services.create_character`` in a single transaction:
     - Bond objects are created for up to 3 non-empty bond descriptions
     - A Vow object is created with initial progress of 0, if a vow was entered
-    - CharacterAsset objects are created for each selected asset definition
+    - CharacterAsset objects, with their abilities and components, are created
+      for each selected asset definition
 
     After successful creation, the session data is cleared and the user is
     redirected to the newly created character's sheet.
@@ -135,6 +148,9 @@ def save_character(request: HttpRequest) -> HttpResponse:
     vow_title: str = data.pop('vow_title', '')
     vow_description:str = data.pop('vow_description', '')
     vow_difficulty = data.pop('difficulty', 0)
+    vow_data = None
+    if vow_description:
+        vow_data = {"title": vow_title, "description": vow_description, "difficulty": vow_difficulty}
  
     #Extract assets data
     initial_assets = [
@@ -143,34 +159,7 @@ def save_character(request: HttpRequest) -> HttpResponse:
         data.pop('asset_definition_3', None),
     ]
 
-    character = Character.objects.create(user=request.user, **data)
-
-    # Create Bond objects for non-empty descriptions
-    for description in bond_descriptions:
-        if description.strip():
-            Bond.objects.create(character=character, description=description)
-    
-    # Create Vow with progress set to 0
-    if vow_description:
-        Vow.objects.create(
-            character=character,
-            title=vow_title,
-            description=vow_description,
-            difficulty=vow_difficulty,
-            progress=0
-        )
-
-    # Create CharacterAsset objects for selected assets
-    for asset_def_id in initial_assets:
-        if asset_def_id:
-            try:
-                asset_definition = AssetDefinition.objects.get(id=asset_def_id)
-                CharacterAsset.objects.create(
-                    character=character,
-                    definition=asset_definition
-                )
-            except AssetDefinition.DoesNotExist:
-                continue  # Skip invalid asset definitions
+    character = create_character(request.user, data, bond_descriptions, vow_data, initial_assets)#type: ignore
 
     del request.session['char_creation_data']
     return redirect('characters:character-sheet', pk=character.pk)
@@ -191,13 +180,17 @@ class CharacterSheetView(LoginRequiredMixin, DetailView):
     As an intented side effect, the viewed character is stored in the user session
     as the most recently accessed character.
 
+    The character and all related data rendered on the sheet are fetched by
+    ``characters.loaders.character_sheet_queryset`` with a fixed number of queries.
+
     **Template:**
     Renders the :template:`characters/character_sheet.html` template.
 
     **Context**
 
     ``character`` / ``object``
-        The :model:`characters.Character` being displayed.
+        The :model:`characters.Character` being displayed, with prefetched
+        ``active_vows``, ``latest_quests`` and ``assets``.
 
     ``momentum_tracker``
         A list or sequence of ``int`` defining the momentum track range, sourced
@@ -232,15 +225,32 @@ class CharacterSheetView(LoginRequiredMixin, DetailView):
 
     ``char_burdens``
         A list of burden debilities currently affecting the character.
+
+    ``sheet_version``
+        The character's version in ``characters.sheet_cache``. Sections of the
+        sheet wrapped in ``{% sheetcache %}`` are served from cache while it is unchanged.
+
+    ``rules_generation``
+        Generation of the rules registry, see ``rules.registry``. The cached assets
+        section is also keyed by it, as it renders asset definitions.
     """
 
     model = Character
     template_name = 'characters/character_sheet.html'
 
+    def get_queryset(self):
+        return character_sheet_queryset()
+
+    def get_object(self, queryset=None):
+        # the version is read before the data: if a write commits in between,
+        # the sections rendered from the old data are cached under the old version
+        self.sheet_version = sheet_cache.get_version(self.kwargs[self.pk_url_kwarg])
+        return super().get_object(queryset)
+
     def get_context_data(self, **kwargs):
         context  = super().get_context_data(**kwargs)
         
-        character:Character = self.get_object() # type: ignore
+        character:Character = self.object # type: ignore
         
         # Save last viewed character to session
         self.request.session['last_character_id'] = character.pk
@@ -257,14 +267,18 @@ class CharacterSheetView(LoginRequiredMixin, DetailView):
         context["status_tracker"] = settings.RESOURCE_TRACK
 
         debilities = Debility.DEBILITIES#format: [("deb_name", "verbose_deb_type: verbose_deb_name"), ...]
+        marked = character.marked_debilities#read from debilities_mask, no queries
         context["conditions_list"] = [d[0] for d in debilities if "Condition" in d[1]]
-        context["char_conditions"] = [d.name for d in self.get_object().debilities.filter(type="cond")] # type: ignore
+        context["char_conditions"] = [d for d in marked if DEBILITY_TYPE_OF[d] == "cond"]
 
         context["banes_list"] = [d[0] for d in debilities if "Bane" in d[1]]
-        context["char_banes"] = [d.name for d in self.get_object().debilities.filter(type="bane")]# type: ignore
+        context["char_banes"] = [d for d in marked if DEBILITY_TYPE_OF[d] == "bane"]
 
         context["burdens_list"] = [d[0] for d in debilities if "Burden" in d[1]]
-        context["char_burdens"] = [d.name for d in self.get_object().debilities.filter(type="burd")]# type: ignore
+        context["char_burdens"] = [d for d in marked if DEBILITY_TYPE_OF[d] == "burd"]
+
+        context["sheet_version"] = self.sheet_version
+        context["rules_generation"] = get_registry().generation
 
         return context
 
@@ -310,12 +324,17 @@ class AddAssetView(LoginRequiredMixin, AddCharacterContextMixin, SaveCharacterAt
 
     ``character``
         The :model:`characters.Character` to which the asset will be added.
+
+    The asset is saved with its abilities and components by ``characters.services.add_assets``.
     """
 
     model = CharacterAsset
     template_name = 'generic_form.html'
     form_class = CharacterAssetForm
 
+    def save_object(self, obj):
+        add_assets([obj])
+
 class CharacterAssetsListView(LoginRequiredMixin, AddCharacterContextMixin, ListView):
     """
     Display the list of assets owned by a character.
@@ -343,7 +362,7 @@ class CharacterAssetsListView(LoginRequiredMixin, AddCharacterContextMixin, List
 
     def get_queryset(self):
         character_id = self.kwargs.get('char_id')
-        return CharacterAsset.objects.filter(character__id=character_id)    
+        return character_assets_queryset().filter(character__id=character_id)    
 
 class CharacterBondsList(LoginRequiredMixin, BelongsToCharacterMixin, AddCharacterContextMixin, ListView):
     """
@@ -458,33 +477,90 @@ class CharacterAssetEditView(LoginRequiredMixin, AddCharacterContextMixin, Detai
     Only inactive abilities can be activated; active abilities cannot be deactivated.
     Component values are stored as custom narrative properties.
 
+    The asset is loaded once with its components and abilities. Submitted values
+    are diffed against it and only changed rows are saved, see
+    ``characters.services.apply_asset_edits``.
+
     The character is identified by the ``char_id`` URL parameter.
+
+    **Template:**
+    Renders the :template:`characters/characterasset_edit.html` template.
+
+    **Context**
+
+    ``asset``
+        The edited :model:`characters.CharacterAsset`.
+
+    ``form``
+        A ``CharacterAssetEditForm`` with a field per component and per inactive ability.
     """
     model = CharacterAsset
     template_name = "characters/characterasset_edit.html"
     context_object_name = "asset"
 
+    def get_queryset(self):
+        return character_assets_queryset().filter(character_id=self.kwargs["char_id"], character__user=self.request.user)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["form"] = CharacterAssetEditForm(self.get_object())
+        context.setdefault("form", CharacterAssetEditForm(self.object))
         return context
     
     def post(self, request: HttpRequest, *args, **kwargs):
-        asset:CharacterAsset = self.get_object()#type: ignore
-        
-        print(request.POST)
-        for key, value in request.POST.items():
-            if key.startswith("component_"):
-                edited_component:CharacterAssetComponent = asset.components.get(definition__title=key.replace("component_", ""))#type: ignore
-                edited_component.value = value
-                edited_component.save()
-            elif key.startswith("ability_"):
-                #only inactive abilities can be turned on, you can't turn off already activated ability
-                edited_ability:CharacterAssetAbility = asset.abilities.get(definition__title=key.replace("ability_", ""))#type: ignore
-                edited_ability.is_active = True
-                edited_ability.save()
-
-        return redirect("characters:character-assets-list", char_id=self.get_object().character.id)#type: ignore
+        self.object = asset = self.get_object()
+
+        form = CharacterAssetEditForm(asset, request.POST)
+        if not form.is_valid():
+            return self.render_to_response(self.get_context_data(form=form))
+
+        apply_asset_edits(asset, *form.edits())#type: ignore
+        return redirect("characters:character-assets-list", char_id=asset.character_id)#type: ignore
+
+@login_required
+@require_POST
+def edit_character_asset(request: HttpRequest, char_id: int, pk: int) -> JsonResponse:
+    """
+    Edit a character's asset components and abilities from the character sheet, without a page reload.
+
+    Expects a JSON object body, both keys optional:
+    - ``components``: object mapping component titles to new values
+    - ``activate``: list of titles of abilities to activate
+
+    Only changed rows are saved, see ``characters.services.apply_asset_edits``.
+
+    Returns the number of changed rows and the resulting component values and ability states
+    as JSON. Responds with 400 on an invalid body or unknown titles and 404 if the user
+    has no such asset.
+    """
+    asset = get_object_or_404(character_assets_queryset(), pk=pk, character_id=char_id, character__user=request.user)
+
+    try:
+        edits = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "body must be a JSON object"}, status=400)
+    if not isinstance(edits, dict):
+        return JsonResponse({"error": "body must be a JSON object"}, status=400)
+
+    component_values = edits.get("components", {})
+    activated_abilities = edits.get("activate", [])
+    if not isinstance(component_values, dict) or not all(isinstance(v, str | None) for v in component_values.values()):
+        return JsonResponse({"error": "components must map titles to strings"}, status=400)
+    max_length = CharacterAssetComponent._meta.get_field("value").max_length
+    if any(value is not None and len(value) > max_length for value in component_values.values()):#type: ignore
+        return JsonResponse({"error": f"component values must be at most {max_length} characters"}, status=400)
+    if not isinstance(activated_abilities, list) or not all(isinstance(title, str) for title in activated_abilities):
+        return JsonResponse({"error": "activate must be a list of titles"}, status=400)
+
+    try:
+        changed = apply_asset_edits(asset, component_values, activated_abilities)
+    except KeyError as e:
+        return JsonResponse({"error": f"unknown component or ability: {e.args[0]}"}, status=400)
+
+    return JsonResponse({
+        "changed": changed,
+        "components": {c.rules.title: c.value for c in asset.components.all()},#type: ignore
+        "abilities": {a.rules.title: a.is_active for a in asset.abilities.all()},#type: ignore
+    })
     
 class NewMinorQuestView(LoginRequiredMixin, AddCharacterContextMixin, SaveCharacterAttributeMixin, CreateView):
     """
@@ -533,28 +609,78 @@ class CharacterVowsListView(LoginRequiredMixin, BelongsToCharacterMixin, AddChar
 
     The character is identified by the ``char_id`` URL parameter.
     Provides difficulty_tracker in context for rendering progress track UI.
+    Provides vow_odds, a dict of difficulty rank to the cached
+    :model:`characters.VowSimulationResult` of the default strategy.
     """
     model = Vow
 
     def get_context_data(self, **kwargs):
         context =  super().get_context_data(**kwargs)
         context["difficulty_tracker"] = [dif[1] for dif in settings.DIFFICULTY_LEVELS]
+        context["vow_odds"] = VowSimulationResult.by_difficulty()
         return context
 
-class FinishQuestView(LoginRequiredMixin, DeleteView):
+class FinishQuestView(LoginRequiredMixin, BelongsToCharacterMixin, DeleteView):
     """
-    Delete (finish) a minor quest.
+    Finish a minor quest.
 
-    This view removes a :model:`characters.MinorQuest` when a journey or
-    fight is completed and should no longer appear on the character's quest list.
+    This view moves a :model:`characters.MinorQuest` to the character's
+    :model:`characters.ArchivedTrack` history when a journey or fight is completed,
+    so it no longer appears on the character's quest list.
 
     Expects the ``char_id`` URL parameter to redirect back to the character's quest list
     """
     model = MinorQuest
 
+    def get_queryset(self):
+        return super().get_queryset().filter(character__user=self.request.user)
+
+    def form_valid(self, form):
+        archive_track(self.object)#type: ignore
+        return redirect(self.get_success_url())
+
     def get_success_url(self) -> str:
         return reverse("characters:quests-list", kwargs={"char_id": self.kwargs["char_id"]})
 
+class TrackHistoryView(LoginRequiredMixin, BelongsToCharacterMixin, AddCharacterContextMixin, ListView):
+    """
+    Display the fulfilled vows and completed minor quests of a character, latest first.
+
+    This view lists the :model:`characters.ArchivedTrack` instances of a
+    :model:`characters.Character`, read from the archive table only.
+
+    The character is identified by the ``char_id`` URL parameter.
+
+    **Template:**
+    Renders the :template:`characters/archivedtrack_list.html` template.
+
+    **Context**
+
+    ``tracks_list``
+        :model:`characters.ArchivedTrack` objects of the current page.
+
+    ``page_obj`` / ``paginator`` / ``is_paginated``
+        Pagination of the history, ``TRACKS_PER_PAGE`` per page.
+    """
+    model = ArchivedTrack
+    context_object_name = "tracks_list"
+    paginate_by = TRACKS_PER_PAGE
+
+    def get_queryset(self):
+        return super().get_queryset().filter(character__user=self.request.user)
+
+def _apply_deltas(request: HttpRequest, char_id: int, deltas: dict[str, int]) -> bool:
+    """
+    Apply ``deltas`` to the trackers of the user's character in a single UPDATE,
+    see ``characters.models.CharacterQuerySet.apply_deltas``.
+
+    Returns False if the user has no such character.
+    """
+    updated = Character.objects.filter(pk=char_id, user=request.user).apply_deltas(deltas)#type: ignore
+    if updated:
+        sheet_cache.bump_version(char_id)
+    return bool(updated)
+
 @login_required
 def change_resource(request: HttpRequest, char_id:int):
     """
@@ -564,25 +690,20 @@ def change_resource(request: HttpRequest, char_id:int):
     - ``resource`` (str): One of "health", "spirit", "supply", or "momentum"
     - ``action`` (str): Either "up" to increase or "down" to decrease the resource
 
-    The adjustment is made via the character's change_momentum() or change_resource()
-    methods, which handle clamping to valid ranges.
+    The adjustment is clamped to valid ranges and applied by the database in a single
+    UPDATE, without reading the character first.
 
-    Redirects to the character sheet after updating. If action is invalid, redirects
-    without making changes.
+    Redirects to the character sheet after updating. If action or resource is invalid,
+    redirects without making changes.
     """
     resource_name = request.GET.get("resource", "")
     action = request.GET.get("action", "")
    
-    if action not in {"up", "down"}:
+    if action not in {"up", "down"} or resource_name not in {"health", "spirit", "supply", "momentum"}:
         return redirect("characters:character-sheet", char_id)
 
     delta = 1 if action == "up" else -1
-    character = Character.objects.get(id=char_id)
-
-    if resource_name == "momentum":
-        character.change_momentum(delta)
-    elif resource_name:
-        character.change_resource(resource_name, delta)
+    _apply_deltas(request, char_id, {resource_name: delta})
     
     return redirect("characters:character-sheet", char_id)
 
@@ -595,7 +716,7 @@ def change_experience(request:HttpRequest, char_id:int):
     - ``action`` (str): Either "gain" to gain 1 experience point or "spend" to
       spend 1 experience point
 
-    The adjustment is made via the character's change_experience() method.
+    The adjustment is clamped and applied by the database in a single UPDATE.
 
     Redirects to the character sheet after updating. If action is invalid, redirects
     without making changes.
@@ -605,11 +726,47 @@ def change_experience(request:HttpRequest, char_id:int):
     if action not in {"gain", "spend"}:
         return redirect("characters:character-sheet", char_id)
     
-    character = Character.objects.get(id=char_id)
-    character.change_experience(action)
+    tracker = "experience" if action == "gain" else "spent_experience"
+    _apply_deltas(request, char_id, {tracker: 1})
 
     return redirect("characters:character-sheet", char_id)
 
+@login_required
+@require_POST
+def apply_tracker_deltas(request: HttpRequest, char_id: int) -> JsonResponse:
+    """
+    Apply several tracker changes to a character at once.
+
+    Expects a JSON object body mapping tracker names to integer deltas, e.g.
+    ``{"health": -1, "supply": -1, "momentum": 2}``. Valid trackers are
+    ``characters.models.TRACKERS``, deltas are at most ``MAX_TRACKER_DELTA`` either way.
+
+    All deltas are clamped and applied by the database in a single UPDATE statement,
+    so they are applied together or not at all.
+
+    Returns the new values of the changed trackers as JSON. Responds with 400 on
+    an invalid body and 404 if the user has no such character.
+    """
+    try:
+        deltas = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "body must be a JSON object"}, status=400)
+
+    if not isinstance(deltas, dict) or not deltas:
+        return JsonResponse({"error": "body must be a non-empty JSON object"}, status=400)
+    unknown = set(deltas) - set(TRACKERS)
+    if unknown:
+        return JsonResponse({"error": f"invalid trackers: {', '.join(sorted(unknown))}"}, status=400)
+    if not all(type(delta) is int for delta in deltas.values()):
+        return JsonResponse({"error": "deltas must be integers"}, status=400)
+    if not all(abs(delta) <= MAX_TRACKER_DELTA for delta in deltas.values()):
+        return JsonResponse({"error": f"deltas must be between -{MAX_TRACKER_DELTA} and {MAX_TRACKER_DELTA}"}, status=400)
+
+    if not _apply_deltas(request, char_id, deltas):
+        raise Http404("No character found")
+
+    return JsonResponse(Character.objects.filter(pk=char_id).values(*deltas).get())
+
 @login_required
 def increase_progress(request: HttpRequest, char_id: int):
     """
@@ -644,19 +801,51 @@ def increase_progress(request: HttpRequest, char_id: int):
 @login_required
 def fulfill_vow(request: HttpRequest, char_id: int, pk: int) -> HttpResponse:
     """
-    Mark a vow as fulfilled.
+    Fulfill a vow.
 
-    Sets the :model:`characters.Vow` is_fulfilled flag to True, indicating
-    the vow has been completed.
+    Moves the :model:`characters.Vow` to the character's :model:`characters.ArchivedTrack`
+    history, see ``characters.services.archive_track``.
 
     The character is identified by ``char_id`` and the vow by ``pk`` URL parameters.
 
     Expects optional query parameter:
     - ``next`` (str, optional): URL name for post-update redirect; defaults to character sheet
     """
-    vow = Vow.objects.get(id=pk)
-    vow.is_fulfilled = True
-    vow.save(update_fields=['is_fulfilled'])
+    vow = get_object_or_404(Vow, id=pk, character_id=char_id, character__user=request.user)
+    archive_track(vow)
 
     redirect_to = request.GET.get("next", "characters:character-sheet")
-    return redirect(redirect_to, char_id)
\ No newline at end of file
+    return redirect(redirect_to, char_id)
+
+@login_required
+def toggle_debility(request: HttpRequest, char_id: int, name: str) -> HttpResponse:
+    """
+    Mark or clear a debility of a character.
+
+    If the :model:`characters.Debility` named ``name`` is marked, it is cleared,
+    otherwise it is marked. ``debilities_mask`` of the character is kept in sync
+    by ``characters.signals``.
+
+    The character is identified by ``char_id`` and the debility by ``name`` URL parameters.
+    Redirects to the character sheet. If the debility name is invalid, redirects
+    without making changes.
+    """
+    if name not in DEBILITY_BITS:
+        return redirect("characters:character-sheet", char_id)
+
+    character = get_object_or_404(Character, pk=char_id, user=request.user)
+
+    cleared, _ = character.debilities.filter(name=name).delete()#type: ignore
+    if not cleared:
+        Debility.objects.create(character=character, name=name, type=DEBILITY_TYPE_OF[name])
+
+    return redirect(reverse("characters:character-sheet", args=[char_id]) + "#debilities")
+
+@staff_member_required
+def sheet_cache_stats(request: HttpRequest) -> JsonResponse:
+    """
+    Return hit and miss counters of the character sheet section cache as JSON.
+
+    See ``characters.sheet_cache``. Available to staff members only.
+    """
+    return JsonResponse(sheet_cache.get_stats())
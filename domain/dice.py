@@ -1,4 +1,12 @@
-from random import randint
+"""
+module containing the dice engine used to resolve action and progress rolls.
+
+Rolls are made in batches with NumPy: every roll is one row of dice, so
+rolling N times costs a handful of array operations instead of N Python calls.
+The scalar ``action_roll`` / ``proggress_roll`` functions are thin wrappers
+that make a batch of one, so both APIs give the same results for the same seed.
+"""
+import numpy as np
 
 
 RESULTS = {
@@ -7,44 +15,63 @@ RESULTS = {
     "miss": "Miss"
 }
 
+# result codes returned by the batch functions, index into RESULT_CODES
+MISS, WEAK_HIT, STRONG_HIT = 0, 1, 2
+RESULT_CODES = ("miss", "weak_hit", "strong_hit")
+
+ACTION_DIE = 6
+CHALLENGE_DIE = 10
+
+_ACTION_DICE_HIGH = np.array([ACTION_DIE + 1, CHALLENGE_DIE + 1, CHALLENGE_DIE + 1])
+_PROGRESS_DICE_HIGH = np.array([CHALLENGE_DIE + 1, CHALLENGE_DIE + 1])
+
+_default_rng = np.random.default_rng()
+
+
+def resolve(score, challenge_dice_1, challenge_dice_2) -> tuple[np.ndarray, np.ndarray]:
+    """Compare scores against two challenge dice. Accepts scalars or arrays.
+    Returns result codes and match flags as arrays."""
+    score = np.asarray(score)
+
+    # Strong hit: score beats both challenge dice
+    strong_hit = (score > challenge_dice_1) & (score > challenge_dice_2)
+    # Miss: both challenge dice beat score
+    miss = (challenge_dice_1 > score) & (challenge_dice_2 > score)
+    # Weak hit: score beats one but not both
+    codes = np.where(strong_hit, STRONG_HIT, np.where(miss, MISS, WEAK_HIT)).astype(np.int8)
+
+    matches = np.asarray(challenge_dice_1 == challenge_dice_2)
+    return codes, matches
+
 
-def action_roll(stat: int, adds: int = 0) -> tuple[str, bool]:
+def action_rolls(stat: int, adds: int = 0, n: int = 1, rng: np.random.Generator | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """Make ``n`` action rolls at once. Returns result codes and match flags as arrays of length ``n``."""
+    rng = rng or _default_rng
+
+    # one row per roll: action die, challenge die 1, challenge die 2
+    dice = rng.integers(1, _ACTION_DICE_HIGH, size=(n, 3))
+    action_score = dice[:, 0] + stat + adds
+
+    return resolve(action_score, dice[:, 1], dice[:, 2])
+
+
+def progress_rolls(progress_score, n: int = 1, rng: np.random.Generator | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """Make ``n`` progress rolls at once. ``progress_score`` may be a single score
+    or an array of ``n`` scores. Returns result codes and match flags as arrays of length ``n``."""
+    rng = rng or _default_rng
+
+    # one row per roll: challenge die 1, challenge die 2
+    dice = rng.integers(1, _PROGRESS_DICE_HIGH, size=(n, 2))
+
+    return resolve(progress_score, dice[:, 0], dice[:, 1])
+
+
+def action_roll(stat: int, adds: int = 0, rng: np.random.Generator | None = None) -> tuple[str, bool]:
     """Roll action die vs two challenge dice. Returns result and match status."""
-    
-    action_score = randint(1, 6) + stat + adds
-    challenge_dice_1 = randint(1, 10)
-    challenge_dice_2 = randint(1, 10)
-    
-    # Strong hit: action score beats both challenge dice
-    if action_score > challenge_dice_1 and action_score > challenge_dice_2:
-        result = "strong_hit"
-    # Miss: both challenge dice beat action score
-    elif challenge_dice_1 > action_score and challenge_dice_2 > action_score:
-        result = "miss"
-    # Weak hit: action score beats one but not both
-    else:
-        result = "weak_hit"
-
-    match = challenge_dice_1 == challenge_dice_2
-    
-    return RESULTS[result], match
-
-def proggress_roll(progress_score: int) -> tuple[str, bool]:
+    codes, matches = action_rolls(stat, adds, n=1, rng=rng)
+    return RESULTS[RESULT_CODES[codes[0]]], bool(matches[0])
+
+def proggress_roll(progress_score: int, rng: np.random.Generator | None = None) -> tuple[str, bool]:
     """Roll two challenge dice vs progress score. Returns result and match status."""
-    
-    challenge_dice_1 = randint(1, 10)
-    challenge_dice_2 = randint(1, 10)
-    
-    # Strong hit: progress score beats both challenge dice
-    if progress_score > challenge_dice_1 and progress_score > challenge_dice_2:
-        result = "strong_hit"
-    # Miss: both challenge dice beat progress score
-    elif challenge_dice_1 > progress_score and challenge_dice_2 > progress_score:
-        result = "miss"
-    # Weak hit: progress score beats one but not both
-    else:
-        result = "weak_hit"
-    
-    match = challenge_dice_1 == challenge_dice_2
-
-    return RESULTS[result], match
\ No newline at end of file
+    codes, matches = progress_rolls(progress_score, n=1, rng=rng)
+    return RESULTS[RESULT_CODES[codes[0]]], bool(matches[0])
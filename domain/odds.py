@@ -0,0 +1,92 @@
+"""
+module containing exact outcome probabilities for action and progress rolls.
+
+The whole dice space (action die x two challenge dice) is enumerated once with
+the same resolution rules as ``dice.resolve`` and stored in immutable lookup
+tables, so reading the odds of a roll never rolls or counts anything.
+"""
+from dataclasses import dataclass
+from fractions import Fraction
+from functools import cache
+from types import MappingProxyType
+
+import numpy as np
+
+try:
+    from .dice import resolve, ACTION_DIE, CHALLENGE_DIE, MISS, WEAK_HIT, STRONG_HIT
+except ImportError:# imported as a top-level module, as the tests in domain/ do
+    from dice import resolve, ACTION_DIE, CHALLENGE_DIE, MISS, WEAK_HIT, STRONG_HIT
+
+
+# stat + adds values covered by the action table
+ACTION_MODIFIERS = range(0, 11)
+# progress scores covered by the progress table (filled boxes)
+PROGRESS_SCORES = range(0, 11)
+
+
+@dataclass(frozen=True, slots=True)
+class OutcomeOdds:
+    """Exact probabilities of each roll outcome and of rolling a match"""
+    strong_hit: Fraction
+    weak_hit: Fraction
+    miss: Fraction
+    match: Fraction
+
+
+def _odds(codes: np.ndarray, matches: np.ndarray) -> OutcomeOdds:
+    """counts outcomes over an enumerated, equally likely dice space"""
+    total = codes.size
+    counts = np.bincount(codes.ravel(), minlength=3)
+    return OutcomeOdds(
+        strong_hit=Fraction(int(counts[STRONG_HIT]), total),
+        weak_hit=Fraction(int(counts[WEAK_HIT]), total),
+        miss=Fraction(int(counts[MISS]), total),
+        match=Fraction(int(matches.sum()), total),
+    )
+
+
+@cache
+def _dice_space() -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """every face combination of action die and both challenge dice, as broadcastable axes"""
+    action_die = np.arange(1, ACTION_DIE + 1).reshape(-1, 1, 1)
+    challenge_dice_1 = np.arange(1, CHALLENGE_DIE + 1).reshape(1, -1, 1)
+    challenge_dice_2 = np.arange(1, CHALLENGE_DIE + 1).reshape(1, 1, -1)
+    return action_die, challenge_dice_1, challenge_dice_2
+
+
+@cache
+def action_odds_table() -> MappingProxyType:
+    """returns read-only mapping of stat + adds to :class:`OutcomeOdds` of an action roll"""
+    action_die, challenge_dice_1, challenge_dice_2 = _dice_space()
+
+    table = {}
+    for modifier in ACTION_MODIFIERS:
+        codes, matches = resolve(action_die + modifier, challenge_dice_1, challenge_dice_2)
+        table[modifier] = _odds(codes, np.broadcast_to(matches, codes.shape))
+    return MappingProxyType(table)
+
+
+@cache
+def progress_odds_table() -> MappingProxyType:
+    """returns read-only mapping of progress score to :class:`OutcomeOdds` of a progress roll"""
+    _, challenge_dice_1, challenge_dice_2 = _dice_space()
+
+    table = {}
+    for score in PROGRESS_SCORES:
+        codes, matches = resolve(score, challenge_dice_1[0], challenge_dice_2[0])
+        table[score] = _odds(codes, matches)
+    return MappingProxyType(table)
+
+
+def action_odds(stat: int, adds: int = 0) -> OutcomeOdds:
+    """returns odds of an action roll made with ``stat`` and ``adds``, which must total 0 to 10"""
+    modifier = stat + adds
+    if modifier not in ACTION_MODIFIERS:
+        raise ValueError(f"stat + adds must be between {ACTION_MODIFIERS[0]} and {ACTION_MODIFIERS[-1]}, got {modifier}")
+    return action_odds_table()[modifier]
+
+def progress_odds(progress_score: int) -> OutcomeOdds:
+    """returns odds of a progress roll made against ``progress_score``, from 0 to 10"""
+    if progress_score not in PROGRESS_SCORES:
+        raise ValueError(f"progress score must be between {PROGRESS_SCORES[0]} and {PROGRESS_SCORES[-1]}, got {progress_score}")
+    return progress_odds_table()[progress_score]
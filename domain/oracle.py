@@ -0,0 +1,95 @@
+"""
+module containing oracle tables and the Ask the Oracle move.
+
+An oracle table is compiled into a lookup array of 100 row indexes, one per d100
+result, so rolling on a table is a single index lookup and rolling N times is
+one vectorized lookup.
+"""
+from typing import Iterable
+
+import numpy as np
+
+
+D100 = 100
+
+# odds: lowest d100 roll that answers "yes", as listed in the Ironsworn rulebook
+ASK_THE_ORACLE = {
+    "almost_certain": 11,
+    "likely": 26,
+    "fifty_fifty": 51,
+    "unlikely": 76,
+    "small_chance": 91,
+}
+
+_default_rng = np.random.default_rng()
+
+
+def roll_d100(n: int = 1, rng: np.random.Generator | None = None) -> np.ndarray:
+    """returns ``n`` d100 rolls"""
+    rng = rng or _default_rng
+    return rng.integers(1, D100 + 1, size=n)
+
+def is_match(roll) -> bool:
+    """d100 match: both digits are the same (11, 22, ..., 99, 100)"""
+    return roll == D100 or roll % 11 == 0
+
+
+class CompiledOracle:
+    """
+    An oracle table compiled into a d100 lookup array.
+
+    Built from ``(floor, ceiling, result)`` rows which must cover 1-100
+    without gaps or overlaps.
+
+    Raises:
+        ValueError: If rows are out of range, overlap or leave gaps.
+    """
+    __slots__ = ("results", "_lookup")
+
+    def __init__(self, rows: Iterable[tuple[int, int, str]]):
+        self.results: tuple[str, ...] = ()
+        lookup = np.full(D100, -1, dtype=np.int16)
+
+        results = []
+        for floor, ceiling, result in rows:
+            if not 1 <= floor <= ceiling <= D100:
+                raise ValueError(f"Invalid row range: {floor}-{ceiling}")
+            if (lookup[floor - 1:ceiling] >= 0).any():
+                raise ValueError(f"Row {floor}-{ceiling} overlaps another row")
+            lookup[floor - 1:ceiling] = len(results)
+            results.append(result)
+
+        if (lookup < 0).any():
+            missing = np.flatnonzero(lookup < 0) + 1
+            raise ValueError(f"Rows don't cover rolls: {missing.tolist()}")
+
+        self.results = tuple(results)
+        self._lookup = lookup
+
+    def result(self, roll: int) -> str:
+        """returns the result of a d100 ``roll``"""
+        return self.results[self._lookup[roll - 1]]
+
+    def roll(self, rng: np.random.Generator | None = None) -> tuple[int, str]:
+        """Roll once on the table. Returns the d100 roll and its result"""
+        roll = int(roll_d100(rng=rng)[0])
+        return roll, self.result(roll)
+
+    def roll_many(self, n: int, rng: np.random.Generator | None = None) -> tuple[np.ndarray, list[str]]:
+        """Roll ``n`` times on the table. Returns the d100 rolls and their results"""
+        rolls = roll_d100(n, rng=rng)
+        results = self.results
+        return rolls, [results[i] for i in self._lookup[rolls - 1]]
+
+
+def ask_the_oracle(odds: str, rng: np.random.Generator | None = None) -> tuple[int, bool, bool]:
+    """
+    Ask the Oracle a yes/no question. Returns the d100 roll, the answer and match status.
+    On a match, the answer is extreme or comes with a twist.
+
+    Raises:
+        KeyError: If odds is not one of ``ASK_THE_ORACLE``.
+    """
+    threshold = ASK_THE_ORACLE[odds]
+    roll = int(roll_d100(rng=rng)[0])
+    return roll, roll >= threshold, is_match(roll)
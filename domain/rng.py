@@ -0,0 +1,50 @@
+"""
+module containing counter-based random streams used to make replayable rolls.
+
+A stream is defined by its seed alone. Roll N of a stream is made with a
+Philox generator keyed by the seed and positioned at counter N, so any roll can
+be re-derived on demand from ``(seed, N)`` without storing dice faces, and
+streams need no shared state between processes.
+"""
+import secrets
+
+import numpy as np
+
+try:
+    from . import dice
+except ImportError:# imported as a top-level module, as the tests in domain/ do
+    import dice
+
+
+SEED_BITS = 63# fits a signed 64-bit database column
+
+
+def new_seed() -> int:
+    """returns a random seed for a new stream"""
+    return secrets.randbits(SEED_BITS)
+
+
+class RollStream:
+    """Deterministic stream of rolls, roll ``index`` always gets the same dice"""
+    __slots__ = ("seed",)
+
+    def __init__(self, seed: int):
+        self.seed = seed
+
+    def __repr__(self) -> str:
+        return f"RollStream(seed={self.seed})"
+
+    def generator(self, index: int) -> np.random.Generator:
+        """returns a fresh generator positioned at roll ``index`` of the stream"""
+        if index < 0:
+            raise ValueError(f"Invalid roll index: {index}")
+        # the index goes into the highest counter word, so rolls never share random blocks
+        return np.random.Generator(np.random.Philox(key=self.seed, counter=[0, 0, 0, index]))
+
+    def action_roll(self, index: int, stat: int, adds: int = 0) -> tuple[str, bool]:
+        """Make (or re-derive) action roll ``index`` of the stream"""
+        return dice.action_roll(stat, adds, rng=self.generator(index))
+
+    def progress_roll(self, index: int, progress_score: int) -> tuple[str, bool]:
+        """Make (or re-derive) progress roll ``index`` of the stream"""
+        return dice.proggress_roll(progress_score, rng=self.generator(index))
@@ -0,0 +1,24 @@
+"""
+module containing the placement of keys, such as user ids, on a number of shards.
+
+Keys are placed with jump consistent hashing (Lamping & Veach, 2014): a key
+always lands on the same shard for a given number of shards, shards get an even
+share of the keys, and going from N to N+1 shards moves only the keys that land
+on the new shard, about 1/(N+1) of them. No placement table is stored.
+"""
+
+_MASK_64 = 0xFFFFFFFFFFFFFFFF
+_MULTIPLIER = 2862933555777941757
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """returns the bucket of ``key``, in ``range(buckets)``"""
+    if buckets < 1:
+        raise ValueError(f"Invalid number of buckets: {buckets}")
+    key &= _MASK_64
+    bucket, jump = -1, 0
+    while jump < buckets:
+        bucket = jump
+        key = (key * _MULTIPLIER + 1) & _MASK_64
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
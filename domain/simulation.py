@@ -0,0 +1,167 @@
+"""
+module containing the Monte Carlo simulation of vow completion.
+
+A simulated vow marks milestones until its progress score reaches the threshold
+of the chosen strategy, then makes the Fulfill Your Vow progress roll. On a miss
+the vow stays open, another milestone is marked and the roll is made again, until
+the track is full and a miss is no longer possible.
+
+Trials are split into independent batches, each with its own seed, and the batches
+are run on a process pool. Batch results are plain histograms, so merging them is
+a sum and the total work scales with the number of cores.
+"""
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+try:
+    from .dice import progress_rolls, MISS, STRONG_HIT
+    from .progress_track import ticks_to_progress, progress_to_ticks
+except ImportError:# imported as a top-level module, as the tests in domain/ do
+    from dice import progress_rolls, MISS, STRONG_HIT
+    from progress_track import ticks_to_progress, progress_to_ticks
+
+
+MAX_PROGRESS = 10
+MAX_TICKS = progress_to_ticks(MAX_PROGRESS)
+
+# strategy name: progress score at which the fulfill roll is first attempted
+STRATEGIES = {
+    "patient": 10,
+    "steady": 8,
+    "bold": 6,
+    "reckless": 4,
+}
+
+BATCH_SIZE = 100_000
+
+# z-score of the 95% confidence intervals
+Z_95 = 1.959964
+
+
+@dataclass(frozen=True, slots=True)
+class SimulationResult:
+    """Merged histograms of a vow simulation and the statistics derived from them"""
+    ticks_per_milestone: int
+    strategy: str
+    trials: int
+    milestones_histogram: tuple[int, ...]# index: milestones marked when the vow was fulfilled
+    first_roll_counts: tuple[int, int, int]# index: result code of the first fulfill roll
+
+    @property
+    def mean_milestones(self) -> float:
+        milestones = np.arange(len(self.milestones_histogram))
+        return float((milestones * self.milestones_histogram).sum() / self.trials)
+
+    @property
+    def milestones_ci(self) -> tuple[float, float]:
+        """95% confidence interval of the mean number of milestones"""
+        milestones = np.arange(len(self.milestones_histogram))
+        mean = self.mean_milestones
+        variance = ((milestones - mean) ** 2 * self.milestones_histogram).sum() / max(self.trials - 1, 1)
+        margin = Z_95 * math.sqrt(variance / self.trials)
+        return mean - margin, mean + margin
+
+    @property
+    def fulfill_rate(self) -> float:
+        """share of vows fulfilled (strong or weak hit) by the first fulfill roll"""
+        return 1 - self.first_roll_counts[MISS] / self.trials
+
+    @property
+    def fulfill_ci(self) -> tuple[float, float]:
+        """95% Wilson score interval of ``fulfill_rate``"""
+        return wilson_interval(self.trials - self.first_roll_counts[MISS], self.trials)
+
+    @property
+    def strong_hit_rate(self) -> float:
+        """share of first fulfill rolls that were a strong hit"""
+        return self.first_roll_counts[STRONG_HIT] / self.trials
+
+
+def wilson_interval(successes: int, trials: int, z: float = Z_95) -> tuple[float, float]:
+    """returns Wilson score interval of a binomial proportion"""
+    if trials == 0:
+        return 0.0, 1.0
+    p = successes / trials
+    denominator = 1 + z**2 / trials
+    centre = (p + z**2 / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z**2 / (4 * trials**2)) / denominator
+    return max(centre - margin, 0.0), min(centre + margin, 1.0)
+
+
+def milestones_to_fill(ticks_per_milestone: int, progress_score: int) -> int:
+    """returns the number of milestones needed to reach ``progress_score``"""
+    return math.ceil(progress_to_ticks(progress_score) / ticks_per_milestone)
+
+
+def simulate_batch(ticks_per_milestone: int, threshold: int, trials: int, seed) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Simulate ``trials`` vows. Returns the milestones histogram and the result code counts
+    of the first fulfill roll. ``seed`` is anything accepted by ``numpy.random.default_rng``.
+    """
+    rng = np.random.default_rng(seed)
+
+    first_milestone = milestones_to_fill(ticks_per_milestone, threshold)
+    last_milestone = milestones_to_fill(ticks_per_milestone, MAX_PROGRESS)
+
+    milestones = np.zeros(trials, dtype=np.int64)
+    open_vows = np.arange(trials)
+    first_roll_counts = np.zeros(3, dtype=np.int64)
+
+    for milestone in range(first_milestone, last_milestone + 1):
+        progress_score, _ = ticks_to_progress(min(milestone * ticks_per_milestone, MAX_TICKS))
+        codes, _ = progress_rolls(progress_score, n=open_vows.size, rng=rng)
+
+        if milestone == first_milestone:
+            first_roll_counts += np.bincount(codes, minlength=3)
+
+        fulfilled = codes != MISS
+        milestones[open_vows[fulfilled]] = milestone
+        open_vows = open_vows[~fulfilled]
+        if not open_vows.size:
+            break
+
+    return np.bincount(milestones, minlength=last_milestone + 1), first_roll_counts
+
+def _simulate_batch(args):
+    """unpacks arguments for ``Executor.map``"""
+    return simulate_batch(*args)
+
+
+def simulate_vow(ticks_per_milestone: int, strategy: str, trials: int,
+                 workers: int | None = None, seed: int | None = None, batch_size: int = BATCH_SIZE) -> SimulationResult:
+    """
+    Run a Monte Carlo simulation of ``trials`` vows marking ``ticks_per_milestone`` per milestone.
+
+    Trials are split into batches of at most ``batch_size`` and fanned out across a
+    ``ProcessPoolExecutor`` of ``workers`` processes (default: number of cores).
+    ``workers=1`` runs every batch in the current process.
+
+    Raises:
+        KeyError: If strategy is not one of ``STRATEGIES``.
+    """
+    threshold = STRATEGIES[strategy]
+
+    batch_count = max(math.ceil(trials / batch_size), 1)
+    sizes = [trials // batch_count + (i < trials % batch_count) for i in range(batch_count)]
+    seeds = np.random.SeedSequence(seed).spawn(batch_count)
+    batches = [(ticks_per_milestone, threshold, size, batch_seed) for size, batch_seed in zip(sizes, seeds)]
+
+    if workers == 1:
+        results = list(map(_simulate_batch, batches))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_simulate_batch, batches))
+
+    milestones_histogram = sum(histogram for histogram, _ in results)
+    first_roll_counts = sum(counts for _, counts in results)
+
+    return SimulationResult(
+        ticks_per_milestone=ticks_per_milestone,
+        strategy=strategy,
+        trials=trials,
+        milestones_histogram=tuple(int(count) for count in milestones_histogram),
+        first_roll_counts=tuple(int(count) for count in first_roll_counts),#type: ignore
+    )
@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+
+from dice import (action_roll, proggress_roll, action_rolls, progress_rolls, resolve,
+                  RESULTS, RESULT_CODES, MISS, WEAK_HIT, STRONG_HIT)
+
+class ResolveTest(unittest.TestCase):
+    def test_strong_hit(self):
+        codes, matches = resolve(7, 3, 6)
+        self.assertEqual(codes, STRONG_HIT)
+        self.assertFalse(matches)
+
+    def test_weak_hit(self):
+        codes, _ = resolve(7, 3, 9)
+        self.assertEqual(codes, WEAK_HIT)
+
+    def test_miss(self):
+        codes, _ = resolve(2, 3, 9)
+        self.assertEqual(codes, MISS)
+
+    def test_tie_is_not_a_strong_hit(self):
+        codes, _ = resolve(5, 5, 1)
+        self.assertEqual(codes, WEAK_HIT)
+
+    def test_match(self):
+        _, matches = resolve(4, 8, 8)
+        self.assertTrue(matches)
+
+    def test_arrays(self):
+        codes, matches = resolve(np.array([7, 7, 2]), np.array([3, 3, 3]), np.array([6, 9, 3]))
+        self.assertEqual(codes.tolist(), [STRONG_HIT, WEAK_HIT, MISS])
+        self.assertEqual(matches.tolist(), [False, False, True])
+
+class BatchRollTest(unittest.TestCase):
+    def test_action_rolls_shape(self):
+        codes, matches = action_rolls(2, n=1000, rng=np.random.default_rng(1))
+        self.assertEqual(codes.shape, (1000,))
+        self.assertEqual(matches.shape, (1000,))
+        self.assertTrue(set(codes.tolist()) <= {MISS, WEAK_HIT, STRONG_HIT})
+
+    def test_action_rolls_match_scalar(self):
+        codes, matches = action_rolls(2, 1, n=200, rng=np.random.default_rng(42))
+        rng = np.random.default_rng(42)
+        scalar = [action_roll(2, 1, rng=rng) for _ in range(200)]
+        expected = [(RESULTS[RESULT_CODES[c]], bool(m)) for c, m in zip(codes, matches)]
+        self.assertEqual(scalar, expected)
+
+    def test_progress_rolls_match_scalar(self):
+        codes, matches = progress_rolls(6, n=200, rng=np.random.default_rng(42))
+        rng = np.random.default_rng(42)
+        scalar = [proggress_roll(6, rng=rng) for _ in range(200)]
+        expected = [(RESULTS[RESULT_CODES[c]], bool(m)) for c, m in zip(codes, matches)]
+        self.assertEqual(scalar, expected)
+
+    def test_progress_rolls_per_roll_scores(self):
+        codes, _ = progress_rolls(np.array([10, 0]), n=2, rng=np.random.default_rng(3))
+        self.assertNotEqual(codes[0], MISS)
+        self.assertEqual(codes[1], MISS)
+
+    def test_scalar_without_rng(self):
+        result, match = action_roll(3)
+        self.assertIn(result, RESULTS.values())
+        self.assertIsInstance(match, bool)
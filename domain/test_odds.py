@@ -0,0 +1,51 @@
+import unittest
+from fractions import Fraction
+
+import numpy as np
+
+from odds import action_odds, progress_odds, action_odds_table, progress_odds_table
+from dice import action_rolls, progress_rolls, STRONG_HIT, MISS
+
+class OddsTest(unittest.TestCase):
+    def test_action_odds_sum_to_one(self):
+        for odds in action_odds_table().values():
+            self.assertEqual(odds.strong_hit + odds.weak_hit + odds.miss, 1)
+
+    def test_progress_odds_sum_to_one(self):
+        for odds in progress_odds_table().values():
+            self.assertEqual(odds.strong_hit + odds.weak_hit + odds.miss, 1)
+
+    def test_match_odds(self):
+        self.assertEqual(action_odds(2).match, Fraction(1, 10))
+        self.assertEqual(progress_odds(5).match, Fraction(1, 10))
+
+    def test_progress_odds_known_values(self):
+        self.assertEqual(progress_odds(0).miss, 1)
+        self.assertEqual(progress_odds(10).miss, 0)
+        self.assertEqual(progress_odds(10).strong_hit, Fraction(81, 100))
+
+    def test_action_odds_adds(self):
+        self.assertEqual(action_odds(2, 1), action_odds(3))
+
+    def test_out_of_range_totals(self):
+        with self.assertRaisesRegex(ValueError, "between 0 and 10, got 11"):
+            action_odds(4, 7)
+        with self.assertRaises(ValueError):
+            action_odds(1, -2)
+        with self.assertRaises(ValueError):
+            progress_odds(11)
+
+    def test_tables_are_read_only(self):
+        with self.assertRaises(TypeError):
+            action_odds_table()[1] = None#type: ignore
+
+    def test_tables_are_memoized(self):
+        self.assertIs(action_odds_table(), action_odds_table())
+        self.assertIs(progress_odds_table(), progress_odds_table())
+
+    def test_agrees_with_dice(self):
+        codes, _ = action_rolls(3, n=200_000, rng=np.random.default_rng(7))
+        self.assertAlmostEqual((codes == STRONG_HIT).mean(), float(action_odds(3).strong_hit), places=2)
+
+        codes, _ = progress_rolls(4, n=200_000, rng=np.random.default_rng(7))
+        self.assertAlmostEqual((codes == MISS).mean(), float(progress_odds(4).miss), places=2)
@@ -0,0 +1,48 @@
+import unittest
+
+import numpy as np
+
+from oracle import CompiledOracle, ask_the_oracle, is_match, ASK_THE_ORACLE
+
+ROWS = [(1, 50, "Low"), (51, 99, "High"), (100, 100, "Twist")]
+
+class CompiledOracleTest(unittest.TestCase):
+    def test_result_lookup(self):
+        oracle = CompiledOracle(ROWS)
+        self.assertEqual(oracle.result(1), "Low")
+        self.assertEqual(oracle.result(50), "Low")
+        self.assertEqual(oracle.result(51), "High")
+        self.assertEqual(oracle.result(100), "Twist")
+
+    def test_roll_many(self):
+        oracle = CompiledOracle(ROWS)
+        rolls, results = oracle.roll_many(1000, rng=np.random.default_rng(1))
+        self.assertEqual(len(results), 1000)
+        self.assertEqual(results, [oracle.result(r) for r in rolls])
+
+    def test_rows_must_cover_d100(self):
+        with self.assertRaises(ValueError):
+            CompiledOracle([(1, 50, "Low")])
+
+    def test_rows_must_not_overlap(self):
+        with self.assertRaises(ValueError):
+            CompiledOracle([(1, 60, "Low"), (50, 100, "High")])
+
+    def test_rows_must_be_in_range(self):
+        with self.assertRaises(ValueError):
+            CompiledOracle([(0, 100, "All")])
+
+class AskTheOracleTest(unittest.TestCase):
+    def test_answer_follows_odds(self):
+        rng = np.random.default_rng(5)
+        for _ in range(200):
+            roll, yes, match = ask_the_oracle("likely", rng=rng)
+            self.assertEqual(yes, roll >= ASK_THE_ORACLE["likely"])
+            self.assertEqual(match, is_match(roll))
+
+    def test_matches(self):
+        self.assertEqual([r for r in range(1, 101) if is_match(r)], [11, 22, 33, 44, 55, 66, 77, 88, 99, 100])
+
+    def test_unknown_odds(self):
+        with self.assertRaises(KeyError):
+            ask_the_oracle("maybe")
@@ -0,0 +1,32 @@
+import unittest
+
+from rng import RollStream, new_seed, SEED_BITS
+
+class RollStreamTest(unittest.TestCase):
+    def test_roll_is_replayable(self):
+        stream = RollStream(1234)
+        first = [stream.generator(i).integers(1, 11, 3).tolist() for i in range(20)]
+        replay = [RollStream(1234).generator(i).integers(1, 11, 3).tolist() for i in range(20)]
+        self.assertEqual(first, replay)
+
+    def test_rolls_are_independent_of_order(self):
+        stream = RollStream(99)
+        forward = [stream.action_roll(i, 2) for i in range(10)]
+        backward = [stream.action_roll(i, 2) for i in reversed(range(10))]
+        self.assertEqual(forward, backward[::-1])
+
+    def test_rolls_differ_between_indexes(self):
+        stream = RollStream(7)
+        draws = {tuple(stream.generator(i).integers(1, 11, 6)) for i in range(50)}
+        self.assertGreater(len(draws), 45)
+
+    def test_seeds_differ(self):
+        self.assertNotEqual(RollStream(1).generator(0).random(), RollStream(2).generator(0).random())
+
+    def test_negative_index(self):
+        with self.assertRaises(ValueError):
+            RollStream(1).generator(-1)
+
+    def test_new_seed_range(self):
+        for _ in range(100):
+            self.assertTrue(0 <= new_seed() < 2**SEED_BITS)
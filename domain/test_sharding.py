@@ -0,0 +1,31 @@
+import unittest
+from collections import Counter
+
+from sharding import jump_hash
+
+class JumpHashTest(unittest.TestCase):
+    def test_single_bucket(self):
+        self.assertEqual({jump_hash(key, 1) for key in range(1000)}, {0})
+
+    def test_is_stable(self):
+        self.assertEqual([jump_hash(key, 7) for key in range(100)], [jump_hash(key, 7) for key in range(100)])
+
+    def test_in_range(self):
+        for buckets in range(1, 20):
+            for key in range(200):
+                self.assertTrue(0 <= jump_hash(key, buckets) < buckets)
+
+    def test_even_spread(self):
+        counts = Counter(jump_hash(key, 4) for key in range(40000))
+        for bucket in range(4):
+            self.assertAlmostEqual(counts[bucket] / 40000, 0.25, delta=0.02)
+
+    def test_growing_moves_keys_only_to_new_bucket(self):
+        keys = range(10000)
+        moved = [key for key in keys if jump_hash(key, 4) != jump_hash(key, 5)]
+        self.assertTrue(all(jump_hash(key, 5) == 4 for key in moved))
+        self.assertAlmostEqual(len(moved) / len(keys), 1 / 5, delta=0.02)
+
+    def test_invalid_buckets(self):
+        with self.assertRaises(ValueError):
+            jump_hash(1, 0)
@@ -0,0 +1,52 @@
+import unittest
+
+from simulation import simulate_vow, simulate_batch, milestones_to_fill, wilson_interval, STRATEGIES
+
+class SimulationTest(unittest.TestCase):
+    def test_milestones_to_fill(self):
+        self.assertEqual(milestones_to_fill(12, 10), 4)
+        self.assertEqual(milestones_to_fill(1, 10), 40)
+        self.assertEqual(milestones_to_fill(8, 6), 3)
+
+    def test_every_trial_is_fulfilled(self):
+        histogram, first_roll = simulate_batch(4, 6, 1000, 1)
+        self.assertEqual(histogram.sum(), 1000)
+        self.assertEqual(first_roll.sum(), 1000)
+
+    def test_patient_strategy_never_misses(self):
+        result = simulate_vow(8, "patient", 5000, workers=1, seed=1)
+        self.assertEqual(result.fulfill_rate, 1)
+        self.assertEqual(result.mean_milestones, 5)
+
+    def test_same_seed_same_result(self):
+        first = simulate_vow(2, "bold", 3000, workers=1, seed=3, batch_size=1000)
+        second = simulate_vow(2, "bold", 3000, workers=1, seed=3, batch_size=1000)
+        self.assertEqual(first, second)
+
+    def test_process_pool_matches_in_process(self):
+        in_process = simulate_vow(4, "steady", 4000, workers=1, seed=5, batch_size=1000)
+        pooled = simulate_vow(4, "steady", 4000, workers=2, seed=5, batch_size=1000)
+        self.assertEqual(in_process, pooled)
+
+    def test_confidence_intervals_contain_estimates(self):
+        result = simulate_vow(1, "reckless", 2000, workers=1, seed=9)
+        low, high = result.milestones_ci
+        self.assertLessEqual(low, result.mean_milestones)
+        self.assertGreaterEqual(high, result.mean_milestones)
+        low, high = result.fulfill_ci
+        self.assertLessEqual(low, result.fulfill_rate)
+        self.assertGreaterEqual(high, result.fulfill_rate)
+
+    def test_wilson_interval_bounds(self):
+        self.assertEqual(wilson_interval(0, 0), (0.0, 1.0))
+        low, high = wilson_interval(10, 10)
+        self.assertAlmostEqual(high, 1.0)
+        self.assertGreater(low, 0.5)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(KeyError):
+            simulate_vow(1, "unknown", 10, workers=1)
+
+    def test_strategies_are_progress_scores(self):
+        for threshold in STRATEGIES.values():
+            self.assertIn(threshold, range(1, 11))
@@ -1,6 +1,9 @@
 from django.contrib import admin
+
+from ironsworn.shard_admin import ShardedModelAdmin
+
 from .models import Story, Event
 
-# Register your models here.
-admin.site.register(Story)
-admin.site.register(Event)
+
+admin.site.register(Story, ShardedModelAdmin)
+admin.site.register(Event, ShardedModelAdmin)
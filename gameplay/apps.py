@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class GameplayConfig(AppConfig):
     name = 'gameplay'
+
+    def ready(self):
+        from . import signals
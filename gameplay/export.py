@@ -0,0 +1,87 @@
+"""
+Streaming export of a :model:`gameplay.Story` as Markdown or JSON Lines.
+
+Exports are generators of text chunks: the story header first, then one chunk
+per event. Events are read with ``.iterator(chunk_size=EXPORT_CHUNK_SIZE)``,
+rows of a single query with the character name joined, and move titles are
+looked up in the rules registry, so memory use doesn't depend on the number
+of events. ``gzip_chunks`` compresses a stream on the fly.
+
+JSON Lines exports hold one ``{"type": "story", ...}`` object followed by one
+``{"type": "event", ...}`` object per event.
+"""
+import json
+import zlib
+from collections.abc import Iterable, Iterator
+
+from rules import registry
+
+from .models import Story
+
+EXPORT_CHUNK_SIZE = 2000
+
+# gzip header and trailer around the deflate stream
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def _events(story: Story) -> Iterator[dict]:
+    """events of the story in order, as dicts"""
+    moves = registry.get_registry().moves_by_id
+    rows = (story.events.order_by("seq")#type: ignore
+            .values_list("seq", "created_at", "character__name", "move_id", "text")
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE))
+    for seq, created_at, character, move_id, text in rows:
+        move = moves.get(move_id)
+        yield {
+            "seq": seq,
+            "created_at": created_at.isoformat(),
+            "character": character,
+            "move": move.title if move else None,
+            "text": text,
+        }
+
+def _participants(story: Story) -> list[str]:
+    return list(story.participants.order_by("name").values_list("name", flat=True))
+
+def export_markdown(story: Story) -> Iterator[str]:
+    """The story as a Markdown document"""
+    yield f"# {story.title}\n\n*{story.world.name}, started {story.created_at:%Y-%m-%d}*\n\n"
+    if story.description:
+        yield f"{story.description}\n\n"
+    participants = _participants(story)
+    if participants:
+        yield "## Characters\n\n" + "".join(f"- {name}\n" for name in participants) + "\n"
+    yield f"## Prologue\n\n{story.prologue}\n\n## Events\n"
+    for event in _events(story):
+        heading = " · ".join(filter(None, [str(event["seq"]), event["character"], event["move"]]))
+        yield f"\n### {heading}\n\n{event['text']}\n"
+
+def export_jsonl(story: Story) -> Iterator[str]:
+    """The story as JSON Lines"""
+    yield json.dumps({
+        "type": "story",
+        "id": story.pk,
+        "title": story.title,
+        "world": story.world.name,
+        "description": story.description,
+        "prologue": story.prologue,
+        "created_at": story.created_at.isoformat(),
+        "participants": _participants(story),
+    }, ensure_ascii=False) + "\n"
+    for event in _events(story):
+        yield json.dumps({"type": "event", **event}, ensure_ascii=False) + "\n"
+
+# format: (exporter, file extension, content type)
+FORMATS = {
+    "md": (export_markdown, "md", "text/markdown; charset=utf-8"),
+    "jsonl": (export_jsonl, "jsonl", "application/jsonl; charset=utf-8"),
+}
+
+def gzip_chunks(chunks: Iterable[str]) -> Iterator[bytes]:
+    """Compress a stream of text chunks to a gzip file, chunk by chunk"""
+    compressor = zlib.compressobj(wbits=_GZIP_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode())
+        if compressed:
+            yield compressed
+    yield compressor.flush()
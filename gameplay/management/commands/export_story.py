@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from gameplay import export
+from gameplay.models import Story
+from ironsworn import routers
+
+
+class Command(BaseCommand):
+    help = "Export a story with all its events as Markdown or JSON Lines, streamed event by event."
+
+    def add_arguments(self, parser):
+        parser.add_argument("story_id", type=int)
+        parser.add_argument("--format", choices=list(export.FORMATS), default="md",
+            help="Export format, defaults to Markdown")
+        parser.add_argument("--gzip", action="store_true",
+            help="Compress the export, requires --output")
+        parser.add_argument("--output", "-o",
+            help="File to write the export to, defaults to standard output")
+
+    def handle(self, *args, **options):
+        story = self.find_story(options["story_id"])
+        if options["gzip"] and not options["output"]:
+            raise CommandError("--gzip requires --output")
+
+        exporter, _, _ = export.FORMATS[options["format"]]
+        chunks = exporter(story)
+
+        if not options["output"]:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+
+        if options["gzip"]:
+            with open(options["output"], "wb") as file:
+                file.writelines(export.gzip_chunks(chunks))
+        else:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.writelines(chunks)
+        self.stderr.write(self.style.SUCCESS(f"Exported {story} to {options['output']}"))
+
+    def find_story(self, story_id: int) -> Story:
+        """the story is on the shard of its owner, which isn't known yet"""
+        for shard in routers.shard_aliases():
+            story = Story.objects.using(shard).select_related("world").filter(pk=story_id).first()
+            if story is not None:
+                return story
+        raise CommandError(f"Story {story_id} does not exist")
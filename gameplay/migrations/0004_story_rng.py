@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 16:21
+
+import domain.rng
+from django.db import migrations, models
+
+
+def reseed_stories(apps, schema_editor):
+    """AddField evaluates the default once, give every existing story its own seed"""
+    db = schema_editor.connection.alias
+    Story = apps.get_model("gameplay", "Story")
+    stories = list(Story.objects.using(db).only("pk"))
+    for story in stories:
+        story.rng_seed = domain.rng.new_seed()
+    Story.objects.using(db).bulk_update(stories, ["rng_seed"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gameplay', '0003_alter_story_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='story',
+            name='rng_seed',
+            field=models.BigIntegerField(default=domain.rng.new_seed, editable=False, help_text="Seed of the story's roll stream"),
+        ),
+        migrations.AddField(
+            model_name='story',
+            name='roll_count',
+            field=models.PositiveBigIntegerField(default=0, editable=False, help_text='Number of rolls made in the story; roll N is re-derived from the seed and N'),
+        ),
+        migrations.RunPython(reseed_stories, migrations.RunPython.noop),
+    ]
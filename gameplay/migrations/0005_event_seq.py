@@ -0,0 +1,50 @@
+# Generated by Django 6.0 on 2026-10-18 16:43
+
+from django.db import migrations, models
+
+
+def number_events(apps, schema_editor):
+    """number existing events of every story in the order they were created"""
+    db = schema_editor.connection.alias
+    Story = apps.get_model("gameplay", "Story")
+    Event = apps.get_model("gameplay", "Event")
+    for story_id in Story.objects.using(db).values_list("pk", flat=True).iterator():
+        events = list(Event.objects.using(db).filter(story_id=story_id).order_by("created_at", "pk").only("pk"))
+        for seq, event in enumerate(events, start=1):
+            event.seq = seq
+        Event.objects.using(db).bulk_update(events, ["seq"], batch_size=500)
+        Story.objects.using(db).filter(pk=story_id).update(last_event_seq=len(events))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gameplay', '0004_story_rng'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='story',
+            name='last_event_seq',
+            field=models.PositiveBigIntegerField(default=0, editable=False, help_text='Sequence number of the latest event of the story'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='seq',
+            field=models.PositiveBigIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(number_events, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='event',
+            name='seq',
+            field=models.PositiveBigIntegerField(editable=False, help_text='Number of the event within its story, assigned on creation and never reused'),
+        ),
+        migrations.AlterModelOptions(
+            name='event',
+            options={'ordering': ['story', 'seq']},
+        ),
+        migrations.AddConstraint(
+            model_name='event',
+            constraint=models.UniqueConstraint(fields=('story', 'seq'), name='gameplay_event_story_seq'),
+        ),
+    ]
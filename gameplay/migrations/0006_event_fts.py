@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 16:55
+
+from django.db import migrations
+
+
+def create_event_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS gameplay_event_fts "
+        "USING fts5(text, tokenize = 'porter unicode61')"
+    )
+    # the owner and story of an event are read through joins, see gameplay.search
+    schema_editor.execute("INSERT INTO gameplay_event_fts (rowid, text) SELECT id, text FROM gameplay_event")
+
+
+def drop_event_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS gameplay_event_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gameplay', '0005_event_seq'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_event_fts, drop_event_fts),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 17:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gameplay', '0006_event_fts'),
+        ('rules', '0018_move_fts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='move',
+            field=models.ForeignKey(blank=True, db_constraint=False, help_text='Move that was made during the event, if any.', null=True, on_delete=django.db.models.deletion.SET_NULL, to='rules.move'),
+        ),
+    ]
@@ -1,4 +1,52 @@
-from django.db import models
+from dataclasses import dataclass
+
+from django.db import models, transaction
+from django.db.models import F, Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from domain import rng
+from ironsworn import routers
+
+EVENTS_PER_PAGE = 50
+
+def _count_of(model, **filters):
+    """correlated subquery counting rows of ``model`` related to the outer story"""
+    return Coalesce(Subquery(
+        model.objects.filter(story=OuterRef("pk"), **filters)
+            .order_by()
+            .values("story")
+            .annotate(count=Count("pk"))
+            .values("count")
+    ), Value(0))
+
+class StoryQuerySet(models.QuerySet):
+    def for_user(self, user):
+        """stories in the worlds of ``user``"""
+        return self.filter(world__user=user)
+
+    def claim_event_seqs(self, story_id: int, count: int = 1) -> range:
+        """
+        Reserve the next ``count`` event sequence numbers of a story.
+
+        Like ``Story.claim_roll``, the counter is incremented in the database, so
+        concurrent workers always get distinct numbers.
+        """
+        with transaction.atomic(using=self.db):
+            self.filter(pk=story_id).update(last_event_seq=F("last_event_seq") + count)
+            last = self.values_list("last_event_seq", flat=True).get(pk=story_id)
+        return range(last - count + 1, last + 1)
+
+    def with_counts(self):
+        """
+        Annotate stories with ``participants_count`` and ``events_count``.
+
+        Counts are correlated subqueries rather than joins, so the events and
+        participants of a story don't multiply each other's rows.
+        """
+        return self.annotate(
+            participants_count=_count_of(StoryParticipant),
+            events_count=_count_of(Event),
+        )
 
 # Create your models here.
 class Story(models.Model):
@@ -8,6 +56,9 @@ class Story(models.Model):
     Represents a cohesive narrative arc or campaign thread, containing events
     and involving multiple characters. Each story belongs to a :model:`worlds.World`
     and has participants linked via :model:`gameplay.StoryParticipant`.
+
+    Every story owns a replayable stream of rolls: the seed and the number of
+    rolls made so far are enough to re-derive any roll of the story.
     """
     world = models.ForeignKey("worlds.World", on_delete=models.CASCADE)
 
@@ -19,14 +70,116 @@ class Story(models.Model):
 
     participants = models.ManyToManyField("characters.Character", through="StoryParticipant")
 
+    rng_seed = models.BigIntegerField(default=rng.new_seed, editable=False,
+        help_text="Seed of the story's roll stream")
+    roll_count = models.PositiveBigIntegerField(default=0, editable=False,
+        help_text="Number of rolls made in the story; roll N is re-derived from the seed and N")
+    last_event_seq = models.PositiveBigIntegerField(default=0, editable=False,
+        help_text="Sequence number of the latest event of the story")
+
+    objects = StoryQuerySet.as_manager()
+
     def __str__(self):
         return self.title
 
+    @property
+    def rolls(self) -> rng.RollStream:
+        """The story's roll stream. Use it to re-derive a past roll by its index."""
+        return rng.RollStream(self.rng_seed)
+
+    def claim_roll(self) -> int:
+        """
+        Reserve the next roll of the story and return its index.
+
+        The counter is incremented in the database, so concurrent workers
+        always get distinct indexes without any application-level lock.
+        """
+        stories = Story.objects.using(routers.db_for(Story, self))
+        with transaction.atomic(using=stories.db):
+            stories.filter(pk=self.pk).update(roll_count=F("roll_count") + 1)
+            self.roll_count = stories.values_list("roll_count", flat=True).get(pk=self.pk)
+        return self.roll_count - 1
+
+    def action_roll(self, stat: int, adds: int = 0) -> tuple[int, tuple[str, bool]]:
+        """Make the next action roll of the story. Returns the roll index and the roll result."""
+        index = self.claim_roll()
+        return index, self.rolls.action_roll(index, stat, adds)
+
+    def progress_roll(self, progress_score: int) -> tuple[int, tuple[str, bool]]:
+        """Make the next progress roll of the story. Returns the roll index and the roll result."""
+        index = self.claim_roll()
+        return index, self.rolls.progress_roll(index, progress_score)
+
+    def timeline(self, before: int | None = None, after: int | None = None, size: int = EVENTS_PER_PAGE) -> "TimelinePage":
+        """
+        A page of at most ``size`` events of the story, in chronological order.
+
+        Without a cursor, the latest events. With ``before``, the events right before
+        that sequence number, with ``after``, the events right after it; either falls
+        back to the latest events if there are none. Pages are read with the ``(story, seq)`` index, so
+        their cost doesn't depend on the length of the story or the position of the page.
+        """
+        events = self.events.all()#type: ignore
+        if after is not None:
+            page = list(events.filter(seq__gt=after).order_by("seq")[:size + 1])
+            if not page:
+                return self.timeline(size=size)
+            has_newer, has_older = len(page) > size, events.filter(seq__lte=after).exists()
+            page = page[:size]
+        elif before is not None:
+            page = list(events.filter(seq__lt=before).order_by("-seq")[:size + 1])
+            if not page:
+                return self.timeline(size=size)
+            has_older, has_newer = len(page) > size, events.filter(seq__gte=before).exists()
+            page = page[size - 1::-1]
+        else:
+            page = list(events.order_by("-seq")[:size + 1])
+            has_older, has_newer = len(page) > size, False
+            page = page[size - 1::-1]
+        return TimelinePage(page, has_older, has_newer)
+
     class Meta:
         verbose_name_plural = "Stories"
         ordering = ["world", "title"]
 
-    
+
+@dataclass(frozen=True, slots=True)
+class TimelinePage:
+    """A page of ``Story.timeline``"""
+    events: list["Event"]
+    has_older: bool
+    has_newer: bool
+
+    @property
+    def first_seq(self) -> int | None:
+        return self.events[0].seq if self.events else None
+
+    @property
+    def last_seq(self) -> int | None:
+        return self.events[-1].seq if self.events else None
+
+
+class EventQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Create events in bulk. ``save`` isn't called and no signals are sent,
+        so new events are numbered and added to the search index here.
+        """
+        from .search import index_events
+
+        objs = list(objs)
+        unnumbered: dict[int, list[Event]] = {}
+        for event in objs:
+            if event.seq is None:
+                unnumbered.setdefault(event.story_id, []).append(event)#type: ignore
+        with transaction.atomic(using=self.db):
+            for story_id, events in unnumbered.items():
+                for event, seq in zip(events, Story.objects.using(self.db).claim_event_seqs(story_id, len(events))):#type: ignore
+                    event.seq = seq
+            objs = super().bulk_create(objs, *args, **kwargs)
+            index_events((event.pk for event in objs if event.pk is not None), self.db)
+        return objs
+
 
 class Event(models.Model):
     """
@@ -35,25 +188,42 @@ class Event(models.Model):
     Events record narrative occurrences, optionally tied to a character and/or move,
     providing chronological progression of the story. Each event belongs to a
     :model:`gameplay.Story`.
+
+    Events are numbered per story in the order they are created, see ``seq``.
+    Timelines are paginated by sequence number rather than by offset.
     """
     story = models.ForeignKey(Story, on_delete=models.CASCADE, related_name="events")
     character = models.ForeignKey("characters.Character", 
                                   on_delete=models.SET_NULL, null=True, blank=True,
                                   help_text="Character primarily responsible for this event, if any.")
-    move = models.ForeignKey("rules.Move", on_delete=models.SET_NULL, null=True, blank=True,
+    move = models.ForeignKey("rules.Move", on_delete=models.SET_NULL, null=True, blank=True, db_constraint=False,
                                     help_text="Move that was made during the event, if any.")
     
 
     text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
-    
+    seq = models.PositiveBigIntegerField(editable=False,
+        help_text="Number of the event within its story, assigned on creation and never reused")
+
+    objects = EventQuerySet.as_manager()
 
     class Meta:
-        ordering = ["story", "created_at"]
-    
+        ordering = ["story", "seq"]
+        constraints = [
+            models.UniqueConstraint(fields=["story", "seq"], name="gameplay_event_story_seq"),
+        ]
+
     def __str__(self) -> str:
         return f"{self.story}: {self.text[:30]}..."
 
+    def save(self, *args, **kwargs):
+        if self.seq is None:
+            db = kwargs.get("using") or routers.db_for(Event, self)
+            with transaction.atomic(using=db):
+                self.seq = Story.objects.using(db).claim_event_seqs(self.story_id)[0]#type: ignore
+                return super().save(*args, **kwargs)
+        return super().save(*args, **kwargs)
+
 class StoryParticipant(models.Model):
     """
     A through model linking stories to participating characters.
@@ -0,0 +1,141 @@
+"""
+Full-text search of :model:`gameplay.Event` backed by the ``gameplay_event_fts`` FTS5 table.
+
+The table indexes the event ``text`` with the event id as rowid, nothing else:
+searches are scoped to a user and a story by joining the matches to their events,
+stories and worlds, so moving a story to another world or a world to another
+user needs no re-indexing. It is created and filled by a migration and kept in
+sync by ``gameplay.signals`` on every event save and delete, and by
+``EventQuerySet.bulk_create``. Results are ranked with BM25.
+
+On databases without FTS5, search falls back to case-insensitive substring
+matching, unranked and without snippets.
+"""
+from dataclasses import dataclass
+from collections.abc import Iterable
+
+from django.db import connections
+from django.utils.safestring import SafeString
+
+from ironsworn import fts, routers
+
+from .models import Event
+
+FTS_TABLE = "gameplay_event_fts"
+MAX_RESULTS = 50
+
+# ids per statement, well below SQLite's limit of variables
+_BATCH_SIZE = 500
+
+# indexes the events selected by a WHERE clause appended to it
+_INSERT_EVENTS = f"INSERT INTO {FTS_TABLE} (rowid, text) SELECT e.id, e.text FROM gameplay_event e"
+
+
+def _connection(using: str | None = None):
+    """connection to the database of the events, the index of an event is in the same database"""
+    return connections[using or routers.db_for(Event)]
+
+
+@dataclass(frozen=True, slots=True)
+class EventHit:
+    """An event found by ``search_events`` with a highlighted text snippet"""
+    event_id: int
+    story_id: int
+    story_title: str
+    seq: int
+    snippet: SafeString
+
+
+def index_events(event_ids: Iterable[int], using: str | None = None):
+    """Add or replace events in the search index"""
+    connection = _connection(using)
+    if not fts.is_supported(connection):
+        return
+    event_ids = list(event_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(event_ids), _BATCH_SIZE):
+            batch = event_ids[start:start + _BATCH_SIZE]
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", batch)
+            cursor.execute(f"{_INSERT_EVENTS} WHERE e.id IN ({placeholders})", batch)
+
+def index_stories(story_ids: Iterable[int], using: str | None = None):
+    """Add all events of stories that aren't indexed yet, such as copied stories, to the search index"""
+    connection = _connection(using)
+    if not fts.is_supported(connection):
+        return
+    story_ids = list(story_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(story_ids), _BATCH_SIZE):
+            batch = story_ids[start:start + _BATCH_SIZE]
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(f"{_INSERT_EVENTS} WHERE e.story_id IN ({placeholders})", batch)
+
+def unindex_event(event_id: int, using: str | None = None):
+    """Remove an event from the search index"""
+    unindex_events([event_id], using)
+
+def unindex_events(event_ids: Iterable[int], using: str | None = None):
+    """Remove events from the search index"""
+    connection = _connection(using)
+    if not fts.is_supported(connection):
+        return
+    event_ids = list(event_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(event_ids), _BATCH_SIZE):
+            batch = event_ids[start:start + _BATCH_SIZE]
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({', '.join(['%s'] * len(batch))})", batch)
+
+
+def search_events(user_id: int, text: str, story_id: int | None = None, limit: int = MAX_RESULTS) -> list[EventHit]:
+    """
+    Returns events of the stories of a user matching ``text``, best first,
+    optionally only events of the story ``story_id``.
+
+    ``text`` is user input, see ``ironsworn.fts.build_query`` for the supported syntax.
+    """
+    query = fts.build_query(text)
+    if not query:
+        return []
+    connection = _connection()
+    if not fts.is_supported(connection):
+        return _search_events_fallback(user_id, text, story_id, limit)
+
+    filters, params = [], []
+    if story_id is not None:
+        filters.append("AND e.story_id = %s")
+        params.append(story_id)
+
+    sql = f"""
+        SELECT e.id, e.story_id, s.title, e.seq, snippet({FTS_TABLE}, 0, %s, %s, %s, %s)
+        FROM {FTS_TABLE}
+        JOIN gameplay_event e ON e.id = {FTS_TABLE}.rowid
+        JOIN gameplay_story s ON s.id = e.story_id
+        JOIN worlds_world w ON w.id = s.world_id
+        WHERE {FTS_TABLE} MATCH %s AND w.user_id = %s {" ".join(filters)}
+        ORDER BY bm25({FTS_TABLE})
+        LIMIT %s
+    """
+    snippet_args = [fts.SNIPPET_START, fts.SNIPPET_END, fts.SNIPPET_ELLIPSIS, fts.SNIPPET_TOKENS]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, snippet_args + [query, user_id] + params + [limit])
+        rows = cursor.fetchall()
+
+    return [
+        EventHit(event_id, story_id, story_title, seq, fts.highlight(snippet))
+        for event_id, story_id, story_title, seq, snippet in rows
+    ]
+
+def _search_events_fallback(user_id: int, text: str, story_id: int | None, limit: int) -> list[EventHit]:
+    """substring search for databases without FTS5"""
+    events = Event.objects.filter(story__world__user_id=user_id)
+    for word in text.replace('"', " ").replace("*", " ").split():
+        events = events.filter(text__icontains=word)
+    if story_id is not None:
+        events = events.filter(story_id=story_id)
+
+    return [
+        EventHit(event_id, story_id, story_title, seq, fts.highlight(text))
+        for event_id, story_id, story_title, seq, text in events.order_by("-pk").values_list(
+            "pk", "story_id", "story__title", "seq", "text")[:limit]
+    ]
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import search
+from .models import Event
+
+
+@receiver(post_save, sender=Event)
+def index_event(sender, instance, raw=False, using=None, **kwargs):
+    """Add a saved :model:`gameplay.Event` to the event search index, see ``gameplay.search``"""
+    if raw:
+        return
+    search.index_events([instance.pk], using)
+
+@receiver(post_delete, sender=Event)
+def unindex_event(sender, instance, using=None, **kwargs):
+    """Remove a deleted :model:`gameplay.Event` from the event search index"""
+    search.unindex_event(instance.pk, using)
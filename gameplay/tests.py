@@ -1,3 +1,504 @@
-from django.test import TestCase
+import gzip
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from characters import sheet_cache
+from characters.admin import CharacterAdmin
+from characters.models import Character, Vow, Bond
+from ironsworn import deletion, routers
+from ironsworn.middleware import ShardMiddleware
+from rules import registry
+from rules.models import Move
+from worlds.models import World, WorldTemplate
+
+from . import search
+from .models import Story, Event, StoryParticipant, EVENTS_PER_PAGE
+from .views import STORIES_PER_PAGE
+
+
+class StoryTestCase(TestCase):
+    """Logged in user with one world and one story"""
+    def setUp(self):
+        self.user = User.objects.create_user(username="player", password="pass")
+        self.client.force_login(self.user)
+        self.world = World.objects.create(user=self.user)
+        self.story = Story.objects.create(world=self.world, title="Iron Vow", prologue="It begins")
+
+
+class StoryRollsTest(StoryTestCase):
+    def test_new_stories_get_distinct_seeds(self):
+        other = Story.objects.create(world=self.world, title="Another", prologue="...")
+        self.assertNotEqual(self.story.rng_seed, other.rng_seed)
+
+    def test_claim_roll_increments_counter(self):
+        self.assertEqual([self.story.claim_roll() for _ in range(3)], [0, 1, 2])
+        self.story.refresh_from_db()
+        self.assertEqual(self.story.roll_count, 3)
+
+    def test_claim_roll_from_stale_instances(self):
+        first = Story.objects.get(pk=self.story.pk)
+        second = Story.objects.get(pk=self.story.pk)
+        self.assertEqual({first.claim_roll(), second.claim_roll()}, {0, 1})
+
+    def test_rolls_can_be_rederived(self):
+        rolls = [self.story.action_roll(2, 1) for _ in range(10)]
+
+        story = Story.objects.get(pk=self.story.pk)
+        self.assertEqual(rolls, [(index, story.rolls.action_roll(index, 2, 1)) for index in range(10)])
+
+    def test_progress_roll(self):
+        index, (result, match) = self.story.progress_roll(10)
+        self.assertEqual(index, 0)
+        self.assertNotEqual(result, "Miss")
+
+
+class StoriesListTest(StoryTestCase):
+    def stories_queries(self, page=1):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("gameplay:stories-list"), {"page": page})
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_counts(self):
+        character = Character.objects.create(user=self.user, name="Kara", description="")
+        StoryParticipant.objects.create(story=self.story, participant=character)
+        Event.objects.bulk_create([Event(story=self.story, text=f"Event {i}") for i in range(3)])
+        story = Story.objects.with_counts().get(pk=self.story.pk)#type: ignore
+        self.assertEqual((story.participants_count, story.events_count), (1, 3))
+
+    def test_query_count_is_constant(self):
+        _, one_world = self.stories_queries()
+        for i in range(5):
+            world = World.objects.create(user=self.user, name=f"World {i}")
+            Story.objects.bulk_create([Story(world=world, title=f"Story {j}", prologue="...") for j in range(20)])
+        response, many_worlds = self.stories_queries(page=2)
+        self.assertEqual(many_worlds, one_world)
+        self.assertEqual(len(response.context["stories_list"]), STORIES_PER_PAGE)
+
+    def test_only_own_stories(self):
+        other = User.objects.create_user(username="other", password="pass")
+        Story.objects.create(world=World.objects.create(user=other, name="Elsewhere"), title="Not mine", prologue="...")
+        response, _ = self.stories_queries()
+        self.assertContains(response, "Iron Vow")
+        self.assertNotContains(response, "Not mine")
+
+    def test_search_form_offers_own_stories(self):
+        response, _ = self.stories_queries()
+        self.assertContains(response, f'<option value="{self.story.pk}" >Iron Vow</option>', html=True)
+
+
+class StoryTimelineTest(StoryTestCase):
+    def add_events(self, count, story=None):
+        Event.objects.bulk_create([Event(story=story or self.story, text=f"Event {i}") for i in range(count)])
+
+    def seqs(self, page):
+        return [event.seq for event in page.events]
+
+    def test_events_are_numbered_per_story(self):
+        other = Story.objects.create(world=self.world, title="Another", prologue="...")
+        self.add_events(2)
+        self.add_events(1, story=other)
+        event = Event.objects.create(story=self.story, text="Third")
+        self.assertEqual(event.seq, 3)
+        self.assertEqual(list(other.events.values_list("seq", flat=True)), [1])#type: ignore
+        self.story.refresh_from_db()
+        self.assertEqual(self.story.last_event_seq, 3)
+
+    def test_pages(self):
+        self.add_events(EVENTS_PER_PAGE * 2 + 10)
+        latest = self.story.timeline()
+        self.assertEqual(self.seqs(latest), list(range(EVENTS_PER_PAGE + 11, EVENTS_PER_PAGE * 2 + 11)))
+        self.assertEqual((latest.has_older, latest.has_newer), (True, False))
+
+        oldest = self.story.timeline(before=11)
+        self.assertEqual(self.seqs(oldest), list(range(1, 11)))
+        self.assertEqual((oldest.has_older, oldest.has_newer), (False, True))
+
+        newer = self.story.timeline(after=10)
+        self.assertEqual(self.seqs(newer), list(range(11, EVENTS_PER_PAGE + 11)))
+        self.assertEqual((newer.has_older, newer.has_newer), (True, True))
+
+    def test_after_last_event_shows_latest(self):
+        self.add_events(3)
+        page = self.story.timeline(after=3)
+        self.assertEqual(self.seqs(page), [1, 2, 3])
+        self.assertEqual((page.has_older, page.has_newer), (False, False))
+
+        response = self.client.get(reverse("gameplay:story-detail", args=[self.story.pk]), {"after": 50})
+        self.assertNotContains(response, "?before=None")
+        self.assertContains(response, 'id="event-3"')
+        self.assertContains(response, "It begins")
+
+    def test_before_first_event_shows_latest(self):
+        self.add_events(3)
+        page = self.story.timeline(before=1)
+        self.assertEqual(self.seqs(page), [1, 2, 3])
+        self.assertEqual((page.has_older, page.has_newer), (False, False))
+
+        response = self.client.get(reverse("gameplay:story-detail", args=[self.story.pk]), {"before": 1})
+        self.assertNotContains(response, "?after=None")
+        self.assertContains(response, 'name="text"')
+
+    def test_page_cost_is_flat(self):
+        url = reverse("gameplay:story-detail", args=[self.story.pk])
+        self.add_events(3)
+        with CaptureQueriesContext(connection) as short_story:
+            self.client.get(url, {"before": 3})
+        self.add_events(EVENTS_PER_PAGE * 5)
+        with CaptureQueriesContext(connection) as long_story:
+            response = self.client.get(url, {"before": 100})
+        self.assertEqual(len(long_story), len(short_story))
+        self.assertContains(response, 'id="event-99"')
+        self.assertNotContains(response, 'id="event-100"')
+        self.assertNotContains(response, "It begins")
+
+    def test_post_links_new_event(self):
+        self.add_events(2)
+        url = reverse("gameplay:story-detail", args=[self.story.pk])
+        response = self.client.post(url, {"text": "The storm breaks"})
+        self.assertRedirects(response, f"{url}#event-3", fetch_redirect_response=False)
+        self.assertContains(self.client.get(url), "The storm breaks")
+
+    def test_invalid_cursor(self):
+        url = reverse("gameplay:story-detail", args=[self.story.pk])
+        self.assertEqual(self.client.get(url, {"after": "last"}).status_code, 400)
+
+
+class StoryExportTest(StoryTestCase):
+    def setUp(self):
+        super().setUp()
+        registry.invalidate()
+        self.character = Character.objects.create(user=self.user, name="Kara", description="")
+        StoryParticipant.objects.create(story=self.story, participant=self.character)
+        move = Move.objects.create(title="Face Danger", category="adventure", trigger_text="When you...",
+                                   outcome_text="On a strong hit...", roll_type="action")
+        Event.objects.create(story=self.story, character=self.character, move=move, text="Kara crosses the ice")
+        Event.objects.create(story=self.story, text="The ice cracks")
+        self.url = reverse("gameplay:story-export", args=[self.story.pk])
+
+    def download(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)#type: ignore
+
+    def test_markdown(self):
+        text = self.download().decode()
+        self.assertIn("# Iron Vow", text)
+        self.assertIn("- Kara", text)
+        self.assertIn("## Prologue\n\nIt begins", text)
+        self.assertIn("### 1 · Kara · Face Danger\n\nKara crosses the ice", text)
+        self.assertIn("### 2\n\nThe ice cracks", text)
+
+    def test_json_lines(self):
+        story, *events = map(json.loads, self.download(format="jsonl").decode().splitlines())
+        self.assertEqual((story["type"], story["participants"]), ("story", ["Kara"]))
+        self.assertEqual([(e["seq"], e["character"], e["move"]) for e in events],
+                         [(1, "Kara", "Face Danger"), (2, None, None)])
+
+    def test_gzip(self):
+        response = self.client.get(self.url, {"format": "jsonl", "gzip": 1})
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="iron-vow.jsonl.gz"')
+        text = gzip.decompress(b"".join(response.streaming_content)).decode()#type: ignore
+        self.assertEqual(len(text.splitlines()), 3)
+
+    def test_events_are_read_in_one_query(self):
+        registry.refresh_if_stale()
+        registry.get_registry()
+        Event.objects.bulk_create([Event(story=self.story, text=f"Event {i}") for i in range(100)])
+        # rules generation, session, user, story, participants and events
+        with self.assertNumQueries(6):
+            self.download(format="jsonl")
+
+    def test_only_own_stories(self):
+        self.client.force_login(User.objects.create_user(username="other", password="pass"))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.get(self.url, {"format": "pdf"}).status_code, 400)
+
+    def test_command(self):
+        out = StringIO()
+        call_command("export_story", self.story.pk, stdout=out)
+        self.assertIn("Kara crosses the ice", out.getvalue())
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "story.md.gz")
+            call_command("export_story", self.story.pk, "--gzip", "-o", str(path), stderr=StringIO())
+            self.assertEqual(gzip.decompress(path.read_bytes()).decode(), out.getvalue())
+
+
+class EventSearchTest(StoryTestCase):
+    def setUp(self):
+        super().setUp()
+        self.meeting = Event.objects.create(story=self.story, text="We meet the Firstborn at the old barrow")
+        Event.objects.bulk_create([
+            Event(story=self.story, text="The elves of the deep wilds watch us"),
+            Event(story=self.story, text="Firstborn arrows fly from the trees"),
+        ])
+        other = User.objects.create_user(username="other", password="pass")
+        other_story = Story.objects.create(world=World.objects.create(user=other), title="Elsewhere", prologue="...")
+        Event.objects.create(story=other_story, text="Another party meets the Firstborn")
+
+    def search(self, text, **kwargs):
+        return [hit.seq for hit in search.search_events(self.user.pk, text, **kwargs)]
+
+    def test_scoped_to_user(self):
+        self.assertEqual(sorted(self.search("firstborn")), [1, 3])
+
+    def test_phrase_and_prefix(self):
+        self.assertEqual(self.search('"meet the firstborn"'), [1])
+        self.assertEqual(self.search("barr*"), [1])
+        self.assertEqual(self.search("arrow"), [3])
+
+    def test_story_filter(self):
+        story = Story.objects.create(world=self.world, title="Second", prologue="...")
+        Event.objects.create(story=story, text="The Firstborn return")
+        self.assertEqual(self.search("firstborn", story_id=story.pk), [1])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.meeting.text = "We meet the Varou"
+        self.meeting.save()
+        self.assertEqual(self.search("varou"), [1])
+        self.assertEqual(self.search("barrow"), [])
+
+        self.story.delete()
+        self.assertEqual(self.search("firstborn"), [])
+
+    def test_moved_world_is_searched_by_new_owner(self):
+        other = User.objects.get(username="other")
+        self.world.user = other
+        self.world.save()
+        self.assertEqual(self.search("firstborn"), [])
+        self.assertEqual(len(search.search_events(other.pk, "firstborn")), 3)
+
+    def test_search_page(self):
+        response = self.client.get(reverse("gameplay:event-search"), {"q": '"meet the firstborn"'})
+        self.assertContains(response, "<mark>meet the Firstborn</mark>", html=False)
+        self.assertContains(response, "#event-1")
+        self.assertNotContains(response, "Another party")
+
+
+class DeletionTest(StoryTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.character = Character.objects.create(user=self.user, name="Kara", description="")
+        Vow.objects.create(character=self.character, title="Avenge", difficulty=3)
+        Bond.objects.create(character=self.character, description="Kinsfolk")
+        StoryParticipant.objects.create(story=self.story, participant=self.character)
+        Event.objects.bulk_create([Event(story=self.story, character=self.character, text=f"Kara meets the Firstborn {i}")
+                                   for i in range(25)])
+
+        self.other = User.objects.create_user(username="other", password="pass")
+        other_world = World.objects.create(user=self.other)
+        self.other_story = Story.objects.create(world=other_world, title="Elsewhere", prologue="...")
+        Event.objects.create(story=self.other_story, text="The Firstborn stay hidden")
+
+    def test_delete_story_in_chunks(self):
+        with patch.object(deletion, "CHUNK_SIZE", 10):
+            deleted = deletion.delete_stories([self.story.pk])
+        # events, participant and story
+        self.assertEqual(deleted, 27)
+        self.assertFalse(Story.objects.filter(pk=self.story.pk).exists())
+        self.assertTrue(Character.objects.filter(pk=self.character.pk).exists())
+        self.assertEqual(search.search_events(self.user.pk, "firstborn"), [])
+        self.assertEqual(len(search.search_events(self.other.pk, "firstborn")), 1)
+
+    def test_delete_character_keeps_events(self):
+        version = sheet_cache.get_version(self.character.pk)
+        deletion.delete_characters([self.character.pk])
+        self.assertEqual(self.story.events.filter(character=None).count(), 25)#type: ignore
+        self.assertFalse(self.story.participants.exists())
+        self.assertFalse(Vow.objects.exists())
+        self.assertFalse(Bond.objects.exists())
+        self.assertNotEqual(sheet_cache.get_version(self.character.pk), version)
+
+    def test_delete_user(self):
+        user_id = self.user.pk
+        with patch.object(deletion, "delete_user_data", wraps=deletion.delete_user_data) as delete_user_data:
+            deletion.delete_user(self.user)
+        # not again by the pre_delete receiver of User
+        delete_user_data.assert_called_once_with(user_id)
+        self.assertFalse(User.objects.filter(pk=user_id).exists())
+        self.assertFalse(World.objects.filter(user_id=user_id).exists())
+        self.assertEqual(list(Event.objects.values_list("story_id", flat=True)), [self.other_story.pk])
+
+    def test_purge_account_command(self):
+        out = StringIO()
+        call_command("purge_account", "player", "--dry-run", stdout=out)
+        self.assertIn("player: 1 worlds, 1 characters", out.getvalue())
+        self.assertTrue(User.objects.filter(username="player").exists())
+
+        call_command("purge_account", "player", stdout=StringIO())
+        self.assertEqual(list(User.objects.values_list("username", flat=True)), ["other"])
+
+
+@override_settings(SHARD_COUNT=2)
+class ShardedDeletionTest(TestCase):
+    databases = {"default", "shard_1"}
+
+    def setUp(self):
+        user_id = next(user_id for user_id in range(1, 100) if routers.shard_for_user(user_id) == "shard_1")
+        self.user = User.objects.create_user(pk=user_id, username="player", password="pass")
+        with routers.use_shard("shard_1"):
+            world = World.objects.create(user=self.user)
+            story = Story.objects.create(world=world, title="Iron Vow", prologue="It begins")
+            character = Character.objects.create(user=self.user, name="Kara", description="")
+            Vow.objects.create(character=character, title="Avenge", difficulty=3)
+            Event.objects.create(story=story, character=character, text="Kara meets the Firstborn")
+
+    def test_deleted_user_leaves_no_shard_rows(self):
+        self.user.delete()
+        for model in (World, Story, Event, Character, Vow):
+            self.assertFalse(model.objects.using("shard_1").exists(), model.__name__)
+        with routers.use_shard("shard_1"):
+            self.assertEqual(search.search_events(self.user.pk, "firstborn"), [])
+
+    def test_admin_delete_leaves_no_shard_rows(self):
+        admin = User.objects.create_superuser(username="admin", password="pass")
+        self.client.force_login(admin)
+        self.client.post(reverse("admin:auth_user_delete", args=[self.user.pk]), {"post": "yes"})
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        self.assertFalse(Character.objects.using("shard_1").exists())
+        self.assertFalse(World.objects.using("shard_1").exists())
+
+
+@override_settings(SHARD_COUNT=2)
+class ShardAdminTest(TestCase):
+    databases = {"default", "shard_1"}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="player", password="pass")
+        Character.objects.create(user=self.user, name="Kara", description="")
+        with routers.use_shard("shard_1"):
+            self.character = Character.objects.create(user=self.user, name="Arnskar", description="")
+        admin = User.objects.create_superuser(username="admin", password="pass")
+        self.client.force_login(admin)
+        self.url = reverse("admin:characters_character_changelist")
+
+    def test_changelist_lists_every_shard(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, "Kara")
+        self.assertContains(response, "Arnskar")
+        self.assertContains(response, "2 characters")
+        change_url = reverse("admin:characters_character_change", args=[self.character.pk]) + "?shard=shard_1"
+        self.assertContains(response, change_url)
+        self.assertContains(self.client.get(change_url), "Arnskar")
+
+    def test_changelist_pages_over_shards(self):
+        with patch.object(CharacterAdmin, "list_per_page", 1):
+            pages = [self.client.get(self.url, {"p": page}) for page in (1, 2)]
+        self.assertContains(pages[0], "Arnskar")
+        self.assertNotContains(pages[0], "Kara")
+        self.assertContains(pages[1], "Kara")
+        self.assertNotContains(pages[1], "Arnskar")
+
+    def test_filter_narrows_to_one_shard(self):
+        response = self.client.get(self.url, {"shard": "shard_1"})
+        self.assertContains(response, "Arnskar")
+        self.assertNotContains(response, "Kara")
+        self.assertContains(response, 'name="action"')
+
+
+@override_settings(SHARD_COUNT=2)
+class RebalanceShardsTest(TransactionTestCase):
+    """users placed with a single shard, of which one moves to shard_1"""
+    databases = {"default", "shard_1"}
+
+    def setUp(self):
+        user_id = next(user_id for user_id in range(1, 100) if routers.shard_for_user(user_id) == "shard_1")
+        self.user = User.objects.create_user(pk=user_id, username="player", password="pass")
+        world = World.objects.create(user=self.user)
+        story = Story.objects.create(world=world, title="Iron Vow", prologue="It begins")
+        character = Character.objects.create(user=self.user, name="Kara", description="")
+        Vow.objects.create(character=character, title="Avenge", difficulty=3)
+        Event.objects.create(story=story, character=character, text="Kara meets the Firstborn")
+
+    def test_user_is_moved(self):
+        call_command("rebalance_shards", from_count=1, stdout=StringIO())
+        self.assertFalse(Character.objects.using("default").exists())
+        self.assertFalse(Event.objects.using("default").exists())
+        event = Event.objects.using("shard_1").get()
+        self.assertEqual(event.character.name, "Kara")
+        self.assertEqual(event.story.world.user_id, self.user.pk)
+        with routers.use_shard("shard_1"):
+            self.assertEqual(len(search.search_events(self.user.pk, "firstborn")), 1)
+
+    def test_unverified_copy_keeps_source(self):
+        with routers.use_shard("shard_1"):
+            World.objects.create(user=self.user)
+        with self.assertRaisesMessage(CommandError, "characters_character 0/1"):
+            call_command("rebalance_shards", from_count=1, stdout=StringIO())
+        self.assertEqual(Character.objects.using("default").count(), 1)
+        self.assertEqual(Event.objects.using("default").count(), 1)
+
+
+@override_settings(SHARD_COUNT=3)
+class ShardRouterTest(TestCase):
+    """routing decisions only, the test database has no shards"""
+    def setUp(self):
+        self.router = routers.ShardRouter()
+
+    def test_users_are_spread_over_shards(self):
+        self.assertEqual(routers.shard_aliases(), ["default", "shard_1", "shard_2"])
+        shards = {routers.shard_for_user(user_id) for user_id in range(1, 100)}
+        self.assertEqual(shards, {"default", "shard_1", "shard_2"})
+        self.assertEqual(routers.shard_for_user(42), routers.shard_for_user(42))
+
+    def test_growing_moves_users_only_to_new_shard(self):
+        moved = {routers.shard_for_user(user_id) for user_id in range(1, 1000)
+                 if routers.shard_for_user(user_id, 2) != routers.shard_for_user(user_id)}
+        self.assertEqual(moved, {"shard_2"})
+
+    def test_sharded_models_follow_current_shard(self):
+        self.assertEqual(self.router.db_for_read(Event), "default")
+        with routers.use_shard("shard_2"):
+            self.assertEqual(self.router.db_for_read(Event), "shard_2")
+            self.assertEqual(self.router.db_for_write(Character), "shard_2")
+            self.assertEqual(self.router.db_for_write(User), "default")
+            self.assertEqual(self.router.db_for_read(Move), "default")
+            self.assertEqual(self.router.db_for_read(WorldTemplate), "default")
+
+    def test_related_objects_follow_instance(self):
+        story = Story(title="Elsewhere")
+        story._state.db = "shard_1"
+        self.assertEqual(self.router.db_for_read(Event, instance=story), "shard_1")
+        self.assertTrue(self.router.allow_relation(story, User()))
+        event = Event()
+        event._state.db = "shard_2"
+        self.assertFalse(self.router.allow_relation(story, event))
+
+    def test_only_sharded_models_migrate_on_shards(self):
+        self.assertTrue(self.router.allow_migrate("default", "rules", "move"))
+        self.assertTrue(self.router.allow_migrate("shard_1", "gameplay", "event"))
+        self.assertFalse(self.router.allow_migrate("shard_1", "auth", "user"))
+        self.assertFalse(self.router.allow_migrate("shard_1", "worlds", "worldtemplate"))
+
+    def test_middleware_routes_to_user_shard(self):
+        user = User.objects.create_user(username="player", password="pass")
+        request = RequestFactory().get("/")
+        request.user = user
+        shards = []
+        ShardMiddleware(lambda request: shards.append(routers.current_shard()))(request)
+        self.assertEqual(shards, [routers.shard_for_user(user.pk)])
+        self.assertEqual(routers.current_shard(), "default")
+
+    def test_admin_shard_is_kept_in_session(self):
+        admin = User.objects.create_superuser(username="admin", password="pass")
+        self.client.force_login(admin)
+        response = self.client.get(reverse("admin:gameplay_story_changelist"), {"shard": "default"})
+        # every shard can be picked
+        self.assertContains(response, "?shard=shard_2")
+        self.assertEqual(self.client.session["admin_shard"], "default")
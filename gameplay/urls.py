@@ -6,6 +6,8 @@ app_name = 'gameplay'
 urlpatterns = [
     path('', views.home_page, name='home'),
     path('stories/', views.StoriesListView.as_view(), name="stories-list"),
+    path('stories/search/', views.EventSearchView.as_view(), name="event-search"),
     path('stories/new/', views.CreateStoryView.as_view(), name="create-story"),
     path('stories/<int:pk>', views.StoryDetailView.as_view(), name="story-detail"),
+    path('stories/<int:pk>/export/', views.export_story, name="story-export"),
 ]
\ No newline at end of file
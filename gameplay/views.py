@@ -1,49 +1,109 @@
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import BadRequest
 from django.db.models.query import QuerySet
-from django.shortcuts import render, redirect
+from django.http import HttpRequest, StreamingHttpResponse
+from django.shortcuts import render, redirect, get_object_or_404
+from django.utils.text import slugify
 from django.views.generic import CreateView, ListView, DetailView
 from django.urls import reverse_lazy
 
+from . import export, search
 from .models import Story, Event
 
+STORIES_PER_PAGE = 50
+
 # Create your views here.
 def home_page(request):
     return render(request, 'gameplay/home_page.html')
 
 class StoriesListView(LoginRequiredMixin, ListView):
     """
-    Display all stories across the current user's worlds.
+    Display all stories across the current user's worlds, grouped by world.
 
-    This view aggregates :model:`gameplay.Story` instances from all worlds
+    This view lists :model:`gameplay.Story` instances from all worlds
     owned by the authenticated user, allowing them to see all ongoing narratives
     in one place.
 
+    Stories are fetched with their worlds and counts in a single query, ordered
+    by world, and paginated, so the number of queries doesn't depend on the number
+    of worlds or stories. Worlds without stories are not listed.
+
     **Template:**
     Renders the :template:`gameplay/stories_list.html` template.
+    The template groups stories of the current page by world with ``{% regroup %}``.
 
     **Context**
 
     ``stories_list``
-        All :model:`gameplay.Story` objects across the user's worlds.
+        :model:`gameplay.Story` objects of the current page, with ``world`` fetched
+        and annotated with ``participants_count`` and ``events_count``.
 
-    ``worlds_list``
-        All :model:`worlds.World` objects owned by the current user.
+    ``page_obj`` / ``paginator`` / ``is_paginated``
+        Pagination of the stories, ``STORIES_PER_PAGE`` per page.
+
+    ``stories``
+        All of the user's :model:`gameplay.Story` objects, choices of the story
+        filter of the event search form.
     """
     model = Story
     template_name = "gameplay/stories_list.html"
     context_object_name = "stories_list"
+    paginate_by = STORIES_PER_PAGE
+
+    def get_queryset(self):
+        return (Story.objects.for_user(self.request.user)#type: ignore
+                .select_related("world")
+                .with_counts()
+                .order_by("world__name", "world_id", "title", "pk"))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["stories"] = Story.objects.for_user(self.request.user).only("pk", "title").order_by("title")#type: ignore
+        return context
+
+
+class EventSearchView(LoginRequiredMixin, ListView):
+    """
+    Search the events of all stories of the current user.
+
+    Events are found with the full-text index of ``gameplay.search``, ranked best
+    first, with matches highlighted in a snippet of the event text.
+
+    Expects query parameters:
+    - ``q`` (str): Search text. Quoted parts are phrases, a trailing ``*`` searches for a prefix
+    - ``story`` (int, optional): Only search the events of this story
+
+    **Template:**
+    Renders the :template:`gameplay/event_search.html` template.
+
+    **Context**
+
+    ``results``
+        A list of ``gameplay.search.EventHit``, empty if nothing was searched.
+
+    ``query`` / ``story``
+        The submitted search parameters, ``story`` is None if not given.
+
+    ``stories``
+        The user's :model:`gameplay.Story` objects, choices of the story filter.
+    """
+    template_name = "gameplay/event_search.html"
+    context_object_name = "results"
 
     def get_queryset(self):
-        user = self.request.user
-        user_worlds = user.world_set.all()#type:ignore
-        stories = []
-        for world in user_worlds:
-            stories += world.story_set.all()
-        return stories
-    
-    def get_context_data(self, *args, **kwargs):
-        context = super().get_context_data(*args, **kwargs)
-        context["worlds_list"] = self.request.user.world_set.all()#type: ignore
+        self.query = self.request.GET.get("q", "").strip()
+        try:
+            self.story = int(self.request.GET.get("story", ""))
+        except ValueError:
+            self.story = None
+        return search.search_events(self.request.user.pk, self.query, self.story)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["query"] = self.query
+        context["story"] = self.story
+        context["stories"] = Story.objects.for_user(self.request.user).order_by("title")#type: ignore
         return context
 
 
@@ -51,23 +111,72 @@ class StoryDetailView(DetailView):
     """
     Display a story and allow adding narrative events.
 
-    This view displays the full :model:`gameplay.Story` including all
-    :model:`gameplay.Event` instances in chronological order.
+    This view displays a :model:`gameplay.Story` with one page of its
+    :model:`gameplay.Event` instances in chronological order. The latest events
+    are shown first; ``?before=<seq>`` shows the events before an event and
+    ``?after=<seq>`` the events after it, see ``Story.timeline``.
 
     POST requests create new events. The event text is provided via the
     ``text`` form field.
 
     **Template:**
     Renders the default detail template for :model:`gameplay.Story`.
+
+    **Context**
+
+    ``story``
+        The :model:`gameplay.Story`.
+
+    ``timeline``
+        The ``TimelinePage`` of events shown, ``EVENTS_PER_PAGE`` at most.
     """
     model = Story
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["timeline"] = self.object.timeline(#type: ignore
+            before=self.get_cursor("before"), after=self.get_cursor("after"))
+        return context
+
+    def get_cursor(self, name) -> int | None:
+        value = self.request.GET.get(name)
+        if value is None:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise BadRequest(f"'{name}' must be an event number")
+
     def post(self, request, *args, **kwargs):
         event_text = request.POST.get("text", '')
 
         new_event = Event.objects.create(text=event_text, story=self.get_object())
-        return redirect(self.request.path_info)
+        return redirect(f"{self.request.path_info}#event-{new_event.seq}")
+
 
+@login_required
+def export_story(request: HttpRequest, pk: int) -> StreamingHttpResponse:
+    """
+    Download a story of the user, streamed event by event.
+
+    ``?format=`` is ``md`` (Markdown, the default) or ``jsonl`` (JSON Lines), see
+    ``gameplay.export``. With ``?gzip=1`` the file is compressed on the fly.
+    Responds with 400 on an unknown format and 404 if the user has no such story.
+    """
+    story = get_object_or_404(Story.objects.for_user(request.user).select_related("world"), pk=pk)#type: ignore
+    try:
+        exporter, extension, content_type = export.FORMATS[request.GET.get("format", "md")]
+    except KeyError:
+        raise BadRequest(f"format must be one of: {', '.join(export.FORMATS)}")
+
+    chunks = exporter(story)
+    filename = f"{slugify(story.title) or 'story'}.{extension}"
+    if request.GET.get("gzip"):
+        chunks, content_type, filename = export.gzip_chunks(chunks), "application/gzip", f"{filename}.gz"
+
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
 
 
 class CreateStoryView(LoginRequiredMixin, CreateView):
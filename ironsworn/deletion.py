@@ -0,0 +1,160 @@
+"""
+Set-based deletion of stories, worlds, characters and whole accounts.
+
+Django's ``delete()`` collects every related row in Python before deleting,
+and sends ``pre_delete``/``post_delete`` for each of them, in one transaction.
+For a campaign with a long event history this loads the whole history into
+memory and holds the database write lock until the end.
+
+The functions here delete the same subtrees with plain ``DELETE`` statements
+of at most ``CHUNK_SIZE`` rows, children before parents, each chunk in its own
+short transaction. Only the ids of one chunk are held in memory. No signals are
+sent; what the receivers would have done is done per chunk instead:
+
+- events are removed from the event search index, see ``gameplay.search``
+- events of deleted characters keep their stories, their ``character`` is cleared
+- cached sheets of deleted characters are invalidated, see ``characters.sheet_cache``
+
+A deletion interrupted between chunks leaves a consistent, partially deleted
+subtree: running it again finishes the job.
+
+Deleting a ``User`` with ``User.delete()``, as the admin does, still collects and
+deletes an account on the ``default`` shard in one transaction, see ``delete_user_data``.
+
+Rows are deleted from the current shard, see ``ironsworn.routers``; ``delete_user``
+and ``delete_user_data`` pick the shard of the user themselves.
+"""
+from collections.abc import Callable, Iterable
+from contextvars import ContextVar
+
+from django.contrib.auth.models import User
+from django.db import connections, models, transaction
+
+from characters import sheet_cache
+from characters.models import (Character, Vow, Bond, MinorQuest, Debility, ArchivedTrack,
+                               CharacterAsset, CharacterAssetAbility, CharacterAssetComponent)
+from gameplay import search
+from gameplay.models import Story, Event, StoryParticipant
+from worlds.models import World, WorldTruth
+
+from . import routers
+
+CHUNK_SIZE = 1000
+
+# user whose worlds and characters ``delete_user`` deleted, while it deletes the ``User``
+_deleted_user: ContextVar[int | None] = ContextVar("deleted_user", default=None)
+
+
+def _chunks(ids: Iterable[int]) -> Iterable[list[int]]:
+    ids = list(ids)
+    for start in range(0, len(ids), CHUNK_SIZE):
+        yield ids[start:start + CHUNK_SIZE]
+
+def _delete_ids(using: str, model: type[models.Model], ids: list[int]) -> int:
+    """a single DELETE of rows of ``model`` by primary key"""
+    with connections[using].cursor() as cursor:
+        quote = cursor.db.ops.quote_name
+        cursor.execute(
+            f"DELETE FROM {quote(model._meta.db_table)} "
+            f"WHERE {quote(model._meta.pk.column)} IN ({', '.join(['%s'] * len(ids))})",#type: ignore
+            ids
+        )
+        return cursor.rowcount
+
+def _delete_chunked(queryset: models.QuerySet, before_delete: Callable[[list[int]], None] | None = None) -> int:
+    """
+    Delete the rows of ``queryset`` ``CHUNK_SIZE`` at a time, one transaction per chunk.
+    ``before_delete`` is called with the ids of every chunk, in its transaction.
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic(using=queryset.db):
+            ids = list(queryset.values_list("pk", flat=True).order_by()[:CHUNK_SIZE])
+            if not ids:
+                return deleted
+            if before_delete is not None:
+                before_delete(ids)
+            deleted += _delete_ids(queryset.db, queryset.model, ids)
+
+
+def delete_stories(story_ids: Iterable[int]) -> int:
+    """Delete stories with their events and participants. Returns the number of rows deleted."""
+    deleted = 0
+    for stories in _chunks(story_ids):
+        deleted += _delete_chunked(Event.objects.filter(story_id__in=stories), search.unindex_events)
+        deleted += _delete_chunked(StoryParticipant.objects.filter(story_id__in=stories))
+        deleted += _delete_chunked(Story.objects.filter(pk__in=stories))
+    return deleted
+
+def delete_worlds(world_ids: Iterable[int]) -> int:
+    """Delete worlds with their truths and stories. Returns the number of rows deleted."""
+    deleted = 0
+    for worlds in _chunks(world_ids):
+        deleted += delete_stories(Story.objects.filter(world_id__in=worlds).values_list("pk", flat=True))
+        deleted += _delete_chunked(WorldTruth.objects.filter(world_id__in=worlds))
+        deleted += _delete_chunked(World.objects.filter(pk__in=worlds))
+    return deleted
+
+def _clear_event_characters(characters: list[int]):
+    """``Event.character`` is ``SET_NULL``: events of deleted characters stay in their stories"""
+    while True:
+        with transaction.atomic(using=routers.db_for(Event)):
+            events = list(Event.objects.filter(character_id__in=characters).values_list("pk", flat=True)[:CHUNK_SIZE])
+            if not events:
+                return
+            Event.objects.filter(pk__in=events).update(character=None)
+
+def delete_characters(character_ids: Iterable[int]) -> int:
+    """
+    Delete characters with their vows, bonds, quests, archived tracks, debilities,
+    assets and story participations. Returns the number of rows deleted.
+    """
+    deleted = 0
+    for characters in _chunks(character_ids):
+        _clear_event_characters(characters)
+        deleted += _delete_chunked(StoryParticipant.objects.filter(participant_id__in=characters))
+        for model in (Vow, Bond, MinorQuest, ArchivedTrack, Debility):
+            deleted += _delete_chunked(model.objects.filter(character_id__in=characters))
+        deleted += _delete_chunked(CharacterAssetAbility.objects.filter(character_asset__character_id__in=characters))
+        deleted += _delete_chunked(CharacterAssetComponent.objects.filter(character_asset__character_id__in=characters))
+        deleted += _delete_chunked(CharacterAsset.objects.filter(character_id__in=characters))
+        deleted += _delete_chunked(Character.objects.filter(pk__in=characters))
+        for character_id in characters:
+            sheet_cache.bump_version(character_id)
+    return deleted
+
+def delete_user_data(user_id: int) -> int:
+    """
+    Delete the worlds and characters of an account from its shard. Returns the number of rows deleted.
+
+    Also run for every ``User`` deleted with ``User.delete()``, e.g. in the admin, by
+    ``characters.signals.delete_user_data``, as ``User.delete()`` only collects related
+    rows in the ``default`` database. There it runs inside the transaction of
+    ``User.delete()``, after the rows in ``default`` are collected: for a user on the
+    ``default`` shard, the whole account is loaded and deleted in one transaction.
+    Large accounts are deleted with ``delete_user``.
+    """
+    with routers.use_user_shard(user_id):
+        deleted = delete_worlds(World.objects.filter(user_id=user_id).values_list("pk", flat=True))
+        deleted += delete_characters(Character.objects.filter(user_id=user_id).values_list("pk", flat=True))
+    return deleted
+
+def user_data_deleted(user_id: int) -> bool:
+    """whether ``delete_user`` already deleted the worlds and characters of the user being deleted"""
+    return _deleted_user.get() == user_id
+
+def delete_user(user: User) -> int:
+    """
+    Delete an account with its worlds and characters. Returns the number of rows deleted.
+
+    Rows of other apps related to the user, such as admin log entries, are left
+    to ``User.delete()``, which runs last, when the large subtrees are gone. Its
+    ``pre_delete`` receiver skips the worlds and characters, see ``user_data_deleted``.
+    """
+    deleted = delete_user_data(user.pk)
+    token = _deleted_user.set(user.pk)
+    try:
+        count, _ = user.delete()
+    finally:
+        _deleted_user.reset(token)
+    return deleted + count
@@ -0,0 +1,53 @@
+"""
+Helpers shared by the SQLite FTS5 full-text search of the apps.
+
+User input is never passed to ``MATCH`` as is: ``build_query`` turns it into an
+expression of quoted terms, so FTS5 syntax characters in the input can't raise
+errors or change the meaning of the query.
+
+Snippets are produced by FTS5 with the ``SNIPPET_START`` / ``SNIPPET_END`` control
+characters around matches. ``highlight`` escapes the snippet and only then turns
+the markers into ``<mark>`` tags, so indexed text can't inject HTML.
+"""
+import re
+
+from django.utils.html import escape
+from django.utils.safestring import SafeString, mark_safe
+
+SNIPPET_START = "\x02"
+SNIPPET_END = "\x03"
+SNIPPET_ELLIPSIS = "…"
+SNIPPET_TOKENS = 16
+
+_PART = re.compile(r'"([^"]*)"?|(\S+)')
+_WORD = re.compile(r"\w+")
+
+
+def is_supported(connection) -> bool:
+    """FTS5 tables exist on SQLite databases only"""
+    return connection.vendor == "sqlite"
+
+def build_query(text: str) -> str:
+    """
+    Build an FTS5 ``MATCH`` expression from user input.
+
+    - ``"double quoted"`` parts are searched as phrases
+    - other words are searched as terms, words joined by punctuation (``face-danger``) as phrases
+    - a trailing ``*`` searches for a prefix: ``vow*`` matches "vow" and "vowed"
+
+    All parts must match. Returns an empty string if the input holds nothing searchable.
+    """
+    parts = []
+    for match in _PART.finditer(text):
+        phrase, word = match.groups()
+        words = _WORD.findall(phrase if phrase is not None else word)
+        if not words:
+            continue
+        prefix = "*" if phrase is None and word.endswith("*") else ""
+        parts.append('"' + " ".join(words) + '"' + prefix)
+    return " AND ".join(parts)
+
+def highlight(snippet: str | None) -> SafeString:
+    """Escape an FTS5 snippet and mark matches with ``<mark>`` tags"""
+    escaped = escape(snippet or "")
+    return mark_safe(escaped.replace(SNIPPET_START, "<mark>").replace(SNIPPET_END, "</mark>"))
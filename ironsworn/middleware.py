@@ -0,0 +1,37 @@
+from django.db import DEFAULT_DB_ALIAS
+from django.urls import reverse
+
+from . import routers
+
+ADMIN_SHARD_PARAM = "shard"
+ADMIN_SHARD_SESSION_KEY = "admin_shard"
+
+
+class ShardMiddleware:
+    """
+    Route the queries of a request to the shard of the logged in user, see ``ironsworn.routers``.
+
+    In the admin, change lists show every shard, see ``ironsworn.shard_admin``; the
+    shard picked with ``?shard=``, by the links to an object or the shard filter,
+    is kept in the session for the next admin pages.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with routers.use_shard(self.shard_for(request)):
+            return self.get_response(request)
+
+    def shard_for(self, request) -> str:
+        user = request.user
+        if user.is_staff and request.path.startswith(reverse("admin:index")):
+            shard = request.GET.get(ADMIN_SHARD_PARAM)
+            if shard in routers.shard_aliases():
+                request.session[ADMIN_SHARD_SESSION_KEY] = shard
+            shard = request.session.get(ADMIN_SHARD_SESSION_KEY)
+            if shard in routers.shard_aliases():
+                return shard
+        if user.is_authenticated:
+            return routers.shard_for_user(user.pk)
+        return DEFAULT_DB_ALIAS
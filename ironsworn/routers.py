@@ -0,0 +1,99 @@
+"""
+Routing of user data to per-user SQLite shards.
+
+SQLite takes one write lock per database file, so all writes of all players
+queue behind each other. With ``SHARD_COUNT`` above 1, the rows of the
+``characters``, ``worlds`` and ``gameplay`` apps are partitioned by user across
+that many database files, so players on different shards write concurrently.
+Accounts, sessions, the admin log, the rules and other shared rows, such as
+world templates, stay in the ``default`` database, which is also shard 0;
+the other shards are the ``shard_<n>`` databases.
+
+A user is placed on a shard with ``domain.sharding.jump_hash`` of their id,
+so changing ``SHARD_COUNT`` moves only some users; the ``rebalance_shards``
+command moves their rows.
+
+Queries on sharded models go to the shard of the current user. It is set for
+each request by ``ironsworn.middleware.ShardMiddleware`` and elsewhere, in
+commands and tests, with ``use_shard`` or ``use_user_shard``. An object loaded
+from a shard keeps using it for its related sharded objects. Raw SQL and
+transactions must use the database of the model they touch, see ``db_for``.
+
+Relations between shards and the shared database aren't enforced by the
+databases, those foreign keys are declared with ``db_constraint=False``.
+Ids are unique across shards, see ``ironsworn.shards``.
+"""
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, models, router
+
+from domain import sharding
+
+SHARDED_APPS = frozenset({"characters", "worlds", "gameplay"})
+# models of the sharded apps that aren't user data
+SHARED_MODELS = frozenset({"characters.vowsimulationresult", "worlds.worldtemplate", "worlds.worldtemplatetruth"})
+
+_current_shard: ContextVar[str | None] = ContextVar("current_shard", default=None)
+
+
+def shard_aliases(shard_count: int | None = None) -> list[str]:
+    """Database aliases of the shards, the ``default`` database first"""
+    if shard_count is None:
+        shard_count = settings.SHARD_COUNT
+    return [DEFAULT_DB_ALIAS] + [f"shard_{n}" for n in range(1, shard_count)]
+
+def shard_for_user(user_id: int, shard_count: int | None = None) -> str:
+    """Database alias of the shard of a user"""
+    aliases = shard_aliases(shard_count)
+    return aliases[sharding.jump_hash(user_id, len(aliases))]
+
+def current_shard() -> str:
+    return _current_shard.get() or DEFAULT_DB_ALIAS
+
+@contextmanager
+def use_shard(alias: str) -> Iterator[str]:
+    """Route queries on sharded models to the shard ``alias``"""
+    token = _current_shard.set(alias)
+    try:
+        yield alias
+    finally:
+        _current_shard.reset(token)
+
+def use_user_shard(user_id: int):
+    """Route queries on sharded models to the shard of a user"""
+    return use_shard(shard_for_user(user_id))
+
+def is_sharded(model: type[models.Model]) -> bool:
+    return model._meta.app_label in SHARDED_APPS and model._meta.label_lower not in SHARED_MODELS
+
+def db_for(model: type[models.Model], instance: models.Model | None = None) -> str:
+    """Alias of the database holding ``model`` rows, for raw SQL and ``transaction.atomic``"""
+    return router.db_for_write(model, instance=instance)
+
+
+class ShardRouter:
+    """Database router of the sharded apps, enabled in ``DATABASE_ROUTERS``"""
+
+    def _db(self, model, **hints):
+        if not is_sharded(model):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is not None and is_sharded(instance.__class__) and instance._state.db:
+            return instance._state.db
+        return current_shard()
+
+    db_for_read = _db
+    db_for_write = _db
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_sharded(obj1.__class__) and is_sharded(obj2.__class__):
+            return obj1._state.db == obj2._state.db
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == DEFAULT_DB_ALIAS:
+            return True
+        return app_label in SHARDED_APPS and f"{app_label}.{model_name}" not in SHARED_MODELS
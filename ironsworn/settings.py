@@ -76,6 +76,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'ironsworn.middleware.ShardMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -110,6 +111,22 @@ DATABASES = {
     }
 }
 
+# Number of databases the characters, worlds and gameplay data is partitioned across by user,
+# see ironsworn.routers. The default database is shard 0 and also holds the shared data.
+# After changing it, run the migrate_shards and rebalance_shards commands.
+SHARD_COUNT = 1
+
+# shard_1 is declared even with a single shard, in memory, so the tests can use a second shard database
+DATABASES.update({
+    f'shard_{n}': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'shard_{n}.sqlite3' if n < SHARD_COUNT else ':memory:',
+    }
+    for n in range(1, max(SHARD_COUNT, 2))
+})
+
+DATABASE_ROUTERS = ['ironsworn.routers.ShardRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
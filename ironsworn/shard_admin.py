@@ -0,0 +1,117 @@
+from functools import cached_property
+from urllib.parse import urlencode
+
+from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+
+from . import routers
+from .middleware import ADMIN_SHARD_PARAM
+
+
+def picked_shard(request) -> str | None:
+    """the shard a change list is narrowed to with ``?shard=``, None to list every shard"""
+    shard = request.GET.get(ADMIN_SHARD_PARAM)
+    return shard if shard in routers.shard_aliases() else None
+
+
+class ShardListFilter(admin.SimpleListFilter):
+    """
+    Narrow the change list of a sharded model to one shard, see ``ironsworn.routers``.
+    Without it, ``ShardedModelAdmin`` lists the rows of every shard.
+    """
+    title = "shard"
+    parameter_name = ADMIN_SHARD_PARAM
+
+    def lookups(self, request, model_admin):
+        return [(alias, alias) for alias in routers.shard_aliases()]
+
+    def has_output(self):
+        return len(self.lookup_choices) > 1
+
+    def queryset(self, request, queryset):
+        if self.value() in routers.shard_aliases():
+            return queryset.using(self.value())
+        return queryset
+
+
+class ShardedRows:
+    """
+    The rows of a queryset on every shard as one sequence, for the paginator of a change list.
+
+    The shards are concatenated, highest first: as every shard has its own range
+    of ids, see ``ironsworn.shards``, the rows are in descending id order. A slice
+    only queries the shards it covers.
+    """
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    @cached_property
+    def counts(self) -> list[tuple[str, int]]:
+        return [(alias, self.queryset.using(alias).count()) for alias in reversed(routers.shard_aliases())]
+
+    def count(self) -> int:
+        return sum(count for _, count in self.counts)
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, index: slice) -> list:
+        start, stop, _ = index.indices(self.count())
+        rows = []
+        for alias, count in self.counts:
+            if start < count and stop > 0:
+                rows.extend(self.queryset.using(alias)[max(start, 0):min(stop, count)])
+            start, stop = start - count, stop - count
+        return rows
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def _clone(self):
+        return self
+
+
+class ShardedChangeList(ChangeList):
+    """
+    Change list of the rows of every shard, by id, unless narrowed to one shard
+    with ``ShardListFilter``. Links to the rows pick their shard, which
+    ``ironsworn.middleware.ShardMiddleware`` keeps for the next admin pages.
+    """
+
+    def get_ordering(self, request, queryset):
+        if picked_shard(request) is None:
+            return ["-pk"]
+        return super().get_ordering(request, queryset)
+
+    def get_results(self, request):
+        if picked_shard(request) is None:
+            self.queryset = ShardedRows(self.queryset)
+            self.root_queryset = ShardedRows(self.root_queryset)
+        super().get_results(request)
+
+    def url_for_result(self, result):
+        return f"{super().url_for_result(result)}?{urlencode({ADMIN_SHARD_PARAM: result._state.db})}"
+
+
+class ShardedModelAdmin(admin.ModelAdmin):
+    """
+    Admin of a sharded model, see ``ShardedChangeList``.
+
+    Columns can only be sorted, and actions only run, on a change list narrowed to
+    one shard: neither can span the databases of several shards.
+    """
+    list_filter = (ShardListFilter,)
+
+    def get_changelist(self, request, **kwargs):
+        return ShardedChangeList
+
+    def get_sortable_by(self, request):
+        if picked_shard(request) is None:
+            return ()
+        return super().get_sortable_by(request)
+
+    def get_actions(self, request):
+        if picked_shard(request) is None:
+            return {}
+        return super().get_actions(request)
@@ -0,0 +1,185 @@
+"""
+Maintenance of the shard databases, see ``ironsworn.routers``.
+
+Ids of sharded rows are unique across shards, so that caches keyed by id, such as
+``characters.sheet_cache``, never mix up rows of different shards: ``reserve_ids``
+starts the ids of shard ``n`` at ``n * SHARD_ID_SPAN``, for the SQLite
+``AUTOINCREMENT`` tables of the sharded models.
+
+``move_user`` moves the rows of a user to another shard when a change of
+``SHARD_COUNT`` places them elsewhere. The source shard is attached to the
+connection of the target and the rows are copied set-based, one
+``INSERT ... SELECT`` per table, with new ids from the range of the target and
+foreign keys translated through temporary id maps, so memory use doesn't depend
+on the number of rows. The copy is a single transaction on the target; once the
+copied rows are counted on the target, they are deleted from the source with
+``ironsworn.deletion``.
+"""
+from django.apps import apps
+from django.db import connections, models, transaction
+
+from characters.models import (Character, Vow, Bond, MinorQuest, Debility, ArchivedTrack,
+                               CharacterAsset, CharacterAssetAbility, CharacterAssetComponent)
+from gameplay import search
+from gameplay.models import Story, Event, StoryParticipant
+from worlds.models import World, WorldTruth
+
+from . import deletion, routers
+
+SHARD_ID_SPAN = 2**40
+
+# (model, column of the parent row, parent model or None for rows of the user), parents first
+MOVE_PLAN: list[tuple[type[models.Model], str, type[models.Model] | None]] = [
+    (Character, "user_id", None),
+    (Vow, "character_id", Character),
+    (Bond, "character_id", Character),
+    (MinorQuest, "character_id", Character),
+    (ArchivedTrack, "character_id", Character),
+    (Debility, "character_id", Character),
+    (CharacterAsset, "character_id", Character),
+    (CharacterAssetAbility, "character_asset_id", CharacterAsset),
+    (CharacterAssetComponent, "character_asset_id", CharacterAsset),
+    (World, "user_id", None),
+    (WorldTruth, "world_id", World),
+    (Story, "world_id", World),
+    (Event, "story_id", Story),
+    (StoryParticipant, "story_id", Story),
+]
+
+_SOURCE = "move_source"
+
+
+def reserve_ids(alias: str):
+    """Start the ids of the sharded tables of shard ``alias`` at the beginning of its range"""
+    connection = connections[alias]
+    start = routers.shard_aliases().index(alias) * SHARD_ID_SPAN
+    if start == 0 or connection.vendor != "sqlite":
+        return
+    with transaction.atomic(using=alias), connection.cursor() as cursor:
+        for model in apps.get_models():
+            if not routers.is_sharded(model):
+                continue
+            table = model._meta.db_table
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = %s", [table])
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)", [table, start])
+            elif row[0] < start:
+                cursor.execute("UPDATE sqlite_sequence SET seq = %s WHERE name = %s", [start, table])
+
+
+def _map_table(model: type[models.Model]) -> str:
+    return f"temp.move_{model._meta.db_table}"
+
+def _move_rows(cursor, model: type[models.Model], parent_column: str, parent: type[models.Model] | None,
+               user_id: int) -> int:
+    """
+    Copy the rows of ``model`` of the user from the attached source into the target
+    with new ids, recorded in the id map of the model. Returns the number of rows copied.
+    """
+    quote = cursor.db.ops.quote_name
+    table = quote(model._meta.db_table)
+    pk = quote(model._meta.pk.column)#type: ignore
+    id_map = _map_table(model)
+    moved = {related for related, _, _ in MOVE_PLAN}
+
+    if parent is None:
+        selection, params = f"s.{quote(parent_column)} = %s", [user_id]
+    else:
+        selection, params = f"s.{quote(parent_column)} IN (SELECT old FROM {_map_table(parent)})", []
+
+    # new ids follow the largest id the target ever used for the table
+    cursor.execute(
+        f"SELECT MAX(COALESCE((SELECT seq FROM main.sqlite_sequence WHERE name = %s), 0), "
+        f"COALESCE((SELECT MAX({pk}) FROM main.{table}), 0))",
+        [model._meta.db_table]
+    )
+    last_id = cursor.fetchone()[0]
+    cursor.execute(f"CREATE TABLE {id_map} (old INTEGER PRIMARY KEY, new INTEGER NOT NULL)")
+    cursor.execute(
+        f"INSERT INTO {id_map} (old, new) SELECT s.{pk}, %s + ROW_NUMBER() OVER (ORDER BY s.{pk}) "
+        f"FROM {_SOURCE}.{table} s WHERE {selection}",
+        [last_id] + params
+    )
+
+    columns, values = [], []
+    for field in model._meta.concrete_fields:
+        columns.append(quote(field.column))
+        if field.primary_key:
+            values.append("m.new")
+        elif field.is_relation and field.related_model in moved:
+            values.append(f"(SELECT new FROM {_map_table(field.related_model)} WHERE old = s.{quote(field.column)})")#type: ignore
+        else:
+            values.append(f"s.{quote(field.column)}")
+    cursor.execute(
+        f"INSERT INTO main.{table} ({', '.join(columns)}) "
+        f"SELECT {', '.join(values)} FROM {_SOURCE}.{table} s JOIN {id_map} m ON m.old = s.{pk}"
+    )
+    return cursor.rowcount
+
+def _user_lookup(model: type[models.Model]) -> str:
+    """lookup of the user id of the rows of ``model``, through its parents in ``MOVE_PLAN``"""
+    parent_column, parent = next((column, parent) for moved, column, parent in MOVE_PLAN if moved is model)
+    field = next(field for field in model._meta.concrete_fields if field.column == parent_column)
+    return field.attname if parent is None else f"{field.name}__{_user_lookup(parent)}"
+
+def _row_counts(alias: str, user_id: int) -> dict[str, int]:
+    """number of rows of the user on shard ``alias``, per table of the plan"""
+    return {
+        model._meta.db_table: model.objects.using(alias).filter(**{_user_lookup(model): user_id}).count()
+        for model, _, _ in MOVE_PLAN
+    }
+
+def _check_copy(user_id: int, source: str, target: str, expected: dict[str, int]):
+    """raise ``ValueError`` unless ``target`` holds the ``expected`` number of rows of the user"""
+    found = _row_counts(target, user_id)
+    if found != expected:
+        differences = ", ".join(f"{table} {found[table]}/{expected[table]}"
+                                for table in expected if found[table] != expected[table])
+        raise ValueError(f"Rows of user {user_id} on {target} don't match {source}: {differences}")
+
+def _copy_rows(user_id: int, source: str, target: str, expected: dict[str, int]) -> int:
+    connection = connections[target]
+    copied = 0
+    with connection.cursor() as cursor:
+        # ATTACH and DETACH can't run in a transaction
+        cursor.execute(f"ATTACH DATABASE %s AS {_SOURCE}", [str(connections[source].settings_dict["NAME"])])
+        try:
+            with transaction.atomic(using=target):
+                for model, parent_column, parent in MOVE_PLAN:
+                    copied += _move_rows(cursor, model, parent_column, parent, user_id)
+                cursor.execute(f"SELECT new FROM {_map_table(Story)}")
+                search.index_stories([story_id for story_id, in cursor.fetchall()], target)
+                _check_copy(user_id, source, target, expected)
+        finally:
+            for model, _, _ in MOVE_PLAN:
+                cursor.execute(f"DROP TABLE IF EXISTS {_map_table(model)}")
+            cursor.execute(f"DETACH DATABASE {_SOURCE}")
+    return copied
+
+def move_user(user_id: int, source: str, target: str) -> int:
+    """
+    Move the characters and worlds of a user, with all their rows, from shard ``source`` to ``target``.
+    Returns the number of rows copied.
+
+    Moved rows get new ids. The rows are only deleted from the source once the
+    target holds as many rows of the user as the source, table by table; otherwise
+    ``ValueError`` is raised and nothing is deleted. A move interrupted after the
+    copy is committed finishes when run again. Moves are meant to run while the
+    site is down: rows the user created on the target, or a deletion from the
+    source interrupted halfway, fail the check and need a look.
+    """
+    expected = _row_counts(source, user_id)
+    if not any(expected.values()):
+        return 0
+
+    copied = 0
+    if any(_row_counts(target, user_id).values()):
+        _check_copy(user_id, source, target, expected)
+    else:
+        copied = _copy_rows(user_id, source, target, expected)
+
+    with routers.use_shard(source):
+        deletion.delete_worlds(World.objects.filter(user_id=user_id).values_list("pk", flat=True))
+        deletion.delete_characters(Character.objects.filter(user_id=user_id).values_list("pk", flat=True))
+    return copied
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import AssetDefinition, AssetAbilityDefinition, AssetComponentDefinition, Move
+from .models import AssetDefinition, AssetAbilityDefinition, AssetComponentDefinition, Move, OracleTable, OracleRow
 # Register your models here.
 class AbilityInline(admin.TabularInline):
     model = AssetAbilityDefinition
@@ -18,4 +18,13 @@ class AssetDefinitionAdmin(admin.ModelAdmin):
     inlines = [AbilityInline, CustomAbilityInline]
 
 
-admin.site.register(Move)
\ No newline at end of file
+admin.site.register(Move)
+
+class OracleRowInline(admin.TabularInline):
+    model = OracleRow
+    extra = 0
+
+@admin.register(OracleTable)
+class OracleTableAdmin(admin.ModelAdmin):
+    search_fields = ("title",)
+    inlines = [OracleRowInline]
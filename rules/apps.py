@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class RulesConfig(AppConfig):
     name = 'rules'
+
+    def ready(self):
+        from django.core.signals import request_started
+
+        from . import registry, signals
+        request_started.connect(registry.refresh_if_stale, dispatch_uid="rules_refresh_if_stale")
@@ -8,6 +8,7 @@ class Migration(migrations.Migration):
 
     dependencies = [
         ('rules', '0008_rename_name_assetabilitydefinition_title'),
+        ('characters', '0010_remove_characterassetability_custom_asset_ability_and_more'),
     ]
 
     operations = [
@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-18 16:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rules', '0015_alter_move_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OracleTable',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(help_text='Oracle table name used in Ironsworn Rules Reference, e.g. `Action` or `Theme`', max_length=50, unique=True, verbose_name='Oracle name')),
+                ('description', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['title'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OracleRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('floor', models.PositiveSmallIntegerField(help_text='Lowest d100 roll of the row')),
+                ('ceiling', models.PositiveSmallIntegerField(help_text='Highest d100 roll of the row')),
+                ('result', models.TextField()),
+                ('table', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rows', to='rules.oracletable')),
+            ],
+            options={
+                'ordering': ['table', 'floor'],
+                'constraints': [models.CheckConstraint(condition=models.Q(('ceiling__lte', 100), ('floor__gte', 1), ('floor__lte', models.F('ceiling'))), name='oraclerow_range_within_d100')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-18 16:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def create_rules_version(apps, schema_editor):
+    RulesVersion = apps.get_model('rules', 'RulesVersion')
+    RulesVersion.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rules', '0016_oracles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RulesVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('generation', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(create_rules_version, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-18 17:05
+
+from django.db import migrations
+
+
+def create_move_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS rules_move_fts "
+        "USING fts5(title, trigger_text, outcome_text, tokenize = 'porter unicode61')"
+    )
+    schema_editor.execute(
+        "INSERT INTO rules_move_fts (rowid, title, trigger_text, outcome_text) "
+        "SELECT id, title, trigger_text, outcome_text FROM rules_move"
+    )
+
+
+def drop_move_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS rules_move_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rules', '0017_rulesversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_move_fts, drop_move_fts),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
 
 
 
@@ -119,4 +121,72 @@ class Move(models.Model):
         return self.title
     
     class Meta:
-        ordering = ["category", "title"]
\ No newline at end of file
+        ordering = ["category", "title"]
+
+class OracleTable(models.Model):
+    """
+    A rules-level oracle table, rolled on with a d100 to answer questions and inspire the fiction.
+
+    Each table consists of :model:`rules.OracleRow` objects covering the d100 range.
+    For rolling, tables are compiled into in-memory lookup arrays by ``rules.oracles``.
+    """
+    title = models.CharField(max_length=50, unique=True,
+        verbose_name="Oracle name",
+        help_text="Oracle table name used in Ironsworn Rules Reference, e.g. `Action` or `Theme`")
+    description = models.TextField(null=True, blank=True)
+
+    def __str__(self):
+        return self.title
+
+    class Meta:
+        ordering = ["title"]
+
+class OracleRow(models.Model):
+    """
+    A row of a :model:`rules.OracleTable`.
+
+    A row is the result of every d100 roll between ``floor`` and ``ceiling``, both inclusive.
+    The rows of a table should cover 1-100 without gaps or overlaps.
+    """
+    table = models.ForeignKey(OracleTable, on_delete=models.CASCADE, related_name='rows')
+    floor = models.PositiveSmallIntegerField(help_text="Lowest d100 roll of the row")
+    ceiling = models.PositiveSmallIntegerField(help_text="Highest d100 roll of the row")
+    result = models.TextField()
+
+    def __str__(self):
+        return f"{self.table.title} {self.floor}-{self.ceiling}: {self.result[:20]}"
+
+    class Meta:
+        ordering = ["table", "floor"]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(floor__gte=1, floor__lte=models.F("ceiling"), ceiling__lte=100),
+                name="oraclerow_range_within_d100"
+            )
+        ]
+
+
+class RulesVersion(models.Model):
+    """
+    Generation number of the rules data, stored in a single row.
+
+    Bumped by ``rules.signals`` whenever an asset definition, move or oracle table changes,
+    so every process can tell whether its in-memory copy of the rules, see ``rules.registry``,
+    is stale with a single primary key lookup.
+    """
+    generation = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Rules generation {self.generation}"
+
+    @classmethod
+    def current(cls) -> int:
+        """Returns the current generation"""
+        return cls.objects.filter(pk=1).values_list("generation", flat=True).first() or 0
+
+    @classmethod
+    def bump(cls):
+        """Increment the generation in the database with ``F()``, so concurrent bumps are never lost"""
+        if not cls.objects.filter(pk=1).update(generation=F("generation") + 1, updated_at=timezone.now()):
+            cls.objects.get_or_create(pk=1, defaults={"generation": 1})
@@ -0,0 +1,35 @@
+"""
+In-memory cache of compiled oracle tables.
+
+Each :model:`rules.OracleTable` is read from the database once per process and
+compiled into a ``domain.oracle.CompiledOracle``. Rolls, including bulk rolls,
+are then served from memory. The cache is invalidated by ``rules.signals``
+whenever a table or one of its rows changes, and in other processes together
+with the rules registry, see ``rules.registry``.
+"""
+from domain.oracle import CompiledOracle
+
+from .models import OracleRow
+
+_compiled: dict[int, CompiledOracle] = {}
+
+
+def get_oracle(table_id: int) -> CompiledOracle:
+    """
+    Returns the compiled oracle of the table with ``table_id``, compiling it on first use.
+
+    Raises:
+        ValueError: If the rows of the table don't cover 1-100 exactly once.
+    """
+    oracle = _compiled.get(table_id)
+    if oracle is None:
+        rows = OracleRow.objects.filter(table_id=table_id).values_list("floor", "ceiling", "result")
+        oracle = _compiled[table_id] = CompiledOracle(rows)
+    return oracle
+
+def invalidate(table_id: int | None = None):
+    """Drop the compiled oracle of ``table_id``, or every compiled oracle if not given"""
+    if table_id is None:
+        _compiled.clear()
+    else:
+        _compiled.pop(table_id, None)
@@ -0,0 +1,141 @@
+"""
+Process-wide, immutable registry of rules data.
+
+Asset definitions, with their abilities and components, and moves are read from
+the database once per process into frozen dataclasses, indexed by id and title.
+Forms, library pages and the character sheet read rules from the registry
+instead of querying the database.
+
+Rules change only through the admin. Every change bumps the generation number
+stored in :model:`rules.RulesVersion`, see ``rules.signals``, and drops the registry
+of the current process. Every process compares the stored generation
+with the one it last saw at the start of each request (a single-row primary key
+lookup) and reloads when it has moved on, see ``refresh_if_stale``. Compiled oracle
+tables, see ``rules.oracles``, are dropped together with the registry.
+"""
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from . import oracles
+from .models import AssetDefinition, AssetAbilityDefinition, AssetComponentDefinition, Move, RulesVersion
+
+
+@dataclass(frozen=True, slots=True)
+class AbilityRules:
+    """A :model:`rules.AssetAbilityDefinition`"""
+    id: int
+    asset_id: int
+    title: str | None
+    description: str
+    initially_active: bool
+
+@dataclass(frozen=True, slots=True)
+class ComponentRules:
+    """A :model:`rules.AssetComponentDefinition`"""
+    id: int
+    asset_id: int
+    title: str
+
+@dataclass(frozen=True, slots=True)
+class AssetRules:
+    """A :model:`rules.AssetDefinition` with its abilities and components"""
+    id: int
+    title: str
+    description: str
+    type: str
+    abilities: tuple[AbilityRules, ...]
+    components: tuple[ComponentRules, ...]
+
+@dataclass(frozen=True, slots=True)
+class MoveRules:
+    """A :model:`rules.Move`"""
+    id: int
+    title: str
+    category: str
+    trigger_text: str
+    outcome_text: str
+    roll_type: str
+
+@dataclass(frozen=True, slots=True)
+class Registry:
+    """All rules data at ``generation``. Mappings are read-only."""
+    generation: int
+    assets: tuple[AssetRules, ...]
+    moves: tuple[MoveRules, ...]# ordered as `Move.Meta.ordering`
+    assets_by_id: MappingProxyType
+    assets_by_title: MappingProxyType
+    abilities_by_id: MappingProxyType
+    components_by_id: MappingProxyType
+    moves_by_id: MappingProxyType
+    moves_by_title: MappingProxyType
+
+
+_registry: Registry | None = None
+# generation seen by the last request of this process
+_generation: int | None = None
+
+
+def load() -> Registry:
+    """Read all rules data from the database, in five queries"""
+    # read generation first: a change made while loading makes the registry stale, not wrongly fresh
+    generation = RulesVersion.current()
+
+    abilities: dict[int, list[AbilityRules]] = {}
+    for values in AssetAbilityDefinition.objects.order_by("pk").values_list(
+            "id", "asset_id", "title", "description", "initially_active"):
+        ability = AbilityRules(*values)
+        abilities.setdefault(ability.asset_id, []).append(ability)
+
+    components: dict[int, list[ComponentRules]] = {}
+    for values in AssetComponentDefinition.objects.order_by("pk").values_list("id", "asset_id", "title"):
+        component = ComponentRules(*values)
+        components.setdefault(component.asset_id, []).append(component)
+
+    assets = tuple(
+        AssetRules(id, title, description, type, tuple(abilities.get(id, ())), tuple(components.get(id, ())))
+        for id, title, description, type in AssetDefinition.objects.order_by("pk").values_list(
+            "id", "title", "description", "type")
+    )
+    moves = tuple(
+        MoveRules(*values)
+        for values in Move.objects.values_list("id", "title", "category", "trigger_text", "outcome_text", "roll_type")
+    )
+
+    return Registry(
+        generation=generation,
+        assets=assets,
+        moves=moves,
+        assets_by_id=MappingProxyType({asset.id: asset for asset in assets}),
+        assets_by_title=MappingProxyType({asset.title: asset for asset in assets}),
+        abilities_by_id=MappingProxyType({a.id: a for asset in assets for a in asset.abilities}),
+        components_by_id=MappingProxyType({c.id: c for asset in assets for c in asset.components}),
+        moves_by_id=MappingProxyType({move.id: move for move in moves}),
+        moves_by_title=MappingProxyType({move.title: move for move in moves}),
+    )
+
+def get_registry() -> Registry:
+    """Returns the registry of this process, loading it on first use"""
+    global _registry
+    registry = _registry
+    if registry is None:
+        registry = _registry = load()
+    return registry
+
+def invalidate():
+    """Drop the registry and compiled oracles of this process, they are reloaded on next use"""
+    global _registry
+    _registry = None
+    oracles.invalidate()
+
+def refresh_if_stale(**kwargs):
+    """
+    Drop the registry and compiled oracles of this process if rules changed since
+    the last request, possibly in another process.
+
+    Connected to ``request_started``. Costs one primary key lookup per request.
+    """
+    global _generation
+    generation = RulesVersion.current()
+    if generation != _generation:
+        invalidate()
+        _generation = generation
@@ -0,0 +1,116 @@
+"""
+Full-text search of :model:`rules.Move` backed by the ``rules_move_fts`` FTS5 table.
+
+The table indexes ``title``, ``trigger_text`` and ``outcome_text`` with the move id
+as rowid. It is created and filled by a migration and kept in sync by
+``rules.signals`` on every move save and delete. Results are ranked with BM25,
+title matches weighing the most.
+
+On databases without FTS5, search falls back to case-insensitive substring
+matching, unranked and without snippets.
+"""
+from dataclasses import dataclass
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.safestring import SafeString
+
+from ironsworn import fts
+
+from . import registry
+from .models import Move
+
+FTS_TABLE = "rules_move_fts"
+MAX_RESULTS = 50
+
+# BM25 weights of title, trigger_text and outcome_text
+_WEIGHTS = (10.0, 4.0, 1.0)
+
+
+@dataclass(frozen=True, slots=True)
+class MoveHit:
+    """A move found by ``search_moves`` with highlighted title and text snippets"""
+    move: registry.MoveRules
+    title: SafeString
+    trigger_snippet: SafeString
+    outcome_snippet: SafeString
+
+
+def index_move(move: Move):
+    """Add or replace a move in the search index"""
+    if not fts.is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [move.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, trigger_text, outcome_text) VALUES (%s, %s, %s, %s)",
+            [move.pk, move.title, move.trigger_text, move.outcome_text]
+        )
+
+def unindex_move(move_id: int):
+    """Remove a move from the search index"""
+    if not fts.is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [move_id])
+
+
+def search_moves(text: str, category: str = "", roll_type: str = "", limit: int = MAX_RESULTS) -> list[MoveHit]:
+    """
+    Returns moves matching ``text``, best first, optionally filtered by ``category`` and ``roll_type``.
+
+    ``text`` is user input, see ``ironsworn.fts.build_query`` for the supported syntax.
+    """
+    query = fts.build_query(text)
+    if not query:
+        return []
+    if not fts.is_supported(connection):
+        return _search_moves_fallback(text, category, roll_type, limit)
+
+    filters, params = [], []
+    if category:
+        filters.append("AND m.category = %s")
+        params.append(category)
+    if roll_type:
+        filters.append("AND m.roll_type = %s")
+        params.append(roll_type)
+
+    marks = [fts.SNIPPET_START, fts.SNIPPET_END]
+    snippet_args = marks + [fts.SNIPPET_ELLIPSIS, fts.SNIPPET_TOKENS]
+    sql = f"""
+        SELECT m.id,
+               highlight({FTS_TABLE}, 0, %s, %s),
+               snippet({FTS_TABLE}, 1, %s, %s, %s, %s),
+               snippet({FTS_TABLE}, 2, %s, %s, %s, %s)
+        FROM {FTS_TABLE} JOIN rules_move m ON m.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s {" ".join(filters)}
+        ORDER BY bm25({FTS_TABLE}, {", ".join(map(str, _WEIGHTS))})
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, marks + snippet_args + snippet_args + [query] + params + [limit])
+        rows = cursor.fetchall()
+
+    moves = registry.get_registry().moves_by_id
+    return [
+        MoveHit(moves[move_id], fts.highlight(title), fts.highlight(trigger), fts.highlight(outcome))
+        for move_id, title, trigger, outcome in rows
+        if move_id in moves
+    ]
+
+def _search_moves_fallback(text: str, category: str, roll_type: str, limit: int) -> list[MoveHit]:
+    """substring search for databases without FTS5"""
+    moves = Move.objects.all()
+    for word in text.replace('"', " ").replace("*", " ").split():
+        moves = moves.filter(Q(title__icontains=word) | Q(trigger_text__icontains=word) | Q(outcome_text__icontains=word))
+    if category:
+        moves = moves.filter(category=category)
+    if roll_type:
+        moves = moves.filter(roll_type=roll_type)
+
+    rules = registry.get_registry().moves_by_id
+    return [
+        MoveHit(rules[pk], fts.highlight(rules[pk].title), fts.highlight(rules[pk].trigger_text), fts.highlight(""))
+        for pk in moves.values_list("pk", flat=True)[:limit]
+        if pk in rules
+    ]
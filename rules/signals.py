@@ -0,0 +1,37 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import oracles, registry, search
+from .models import AssetDefinition, AssetAbilityDefinition, AssetComponentDefinition, Move, OracleTable, OracleRow, RulesVersion
+
+@receiver([post_save, post_delete], sender=OracleTable)
+def invalidate_oracle_table(sender, instance, **kwargs):
+    """Drop the compiled copy of a changed or deleted :model:`rules.OracleTable`"""
+    oracles.invalidate(instance.pk)
+
+@receiver([post_save, post_delete], sender=OracleRow)
+def invalidate_oracle_row(sender, instance, **kwargs):
+    """Drop the compiled copy of the table a changed or deleted :model:`rules.OracleRow` belongs to"""
+    oracles.invalidate(instance.table_id)
+
+@receiver(post_save, sender=Move)
+def index_move(sender, instance, **kwargs):
+    """Add a saved :model:`rules.Move` to the move search index, see ``rules.search``"""
+    search.index_move(instance)
+
+@receiver(post_delete, sender=Move)
+def unindex_move(sender, instance, **kwargs):
+    """Remove a deleted :model:`rules.Move` from the move search index"""
+    search.unindex_move(instance.pk)
+
+def bump_rules_generation(sender, instance, **kwargs):
+    """
+    Bump the :model:`rules.RulesVersion` generation after any change to rules data and
+    drop the rules registry of this process. Other processes drop theirs on their next request.
+    """
+    RulesVersion.bump()
+    registry.invalidate()
+
+for model in (AssetDefinition, AssetAbilityDefinition, AssetComponentDefinition, Move, OracleTable, OracleRow):
+    post_save.connect(bump_rules_generation, sender=model, dispatch_uid=f"bump_rules_generation_on_save_{model.__name__}")
+    post_delete.connect(bump_rules_generation, sender=model, dispatch_uid=f"bump_rules_generation_on_delete_{model.__name__}")
@@ -1,3 +1,235 @@
-from django.test import TestCase
+from dataclasses import FrozenInstanceError
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from domain import odds
+from ironsworn import fts
+
+from characters.forms import InitialAssetsForm
+
+from . import oracles, registry, search
+from .models import AssetDefinition, AssetAbilityDefinition, AssetComponentDefinition, Move, OracleTable, OracleRow, RulesVersion
+
+
+class MoveDetailOddsTest(TestCase):
+    def make_move(self, title, roll_type):
+        return Move.objects.create(title=title, category="adventure", trigger_text="When you...",
+                                   outcome_text="On a strong hit...", roll_type=roll_type)
+
+    def test_action_move_has_action_odds(self):
+        move = self.make_move("Face Danger", "action")
+        response = self.client.get(reverse("rules:move-detail", args=[move.pk]))
+        self.assertIs(response.context["odds_table"], odds.action_odds_table())
+        self.assertContains(response, "Stat + Adds")
+
+    def test_progress_move_has_progress_odds(self):
+        move = self.make_move("Fulfill Your Vow", "progress")
+        response = self.client.get(reverse("rules:move-detail", args=[move.pk]))
+        self.assertIs(response.context["odds_table"], odds.progress_odds_table())
+
+    def test_no_roll_move_has_no_odds(self):
+        move = self.make_move("Write Your Epilogue", "none")
+        response = self.client.get(reverse("rules:move-detail", args=[move.pk]))
+        self.assertIsNone(response.context["odds_table"])
+        self.assertNotContains(response, "Strong Hit")
+
+
+class OracleTest(TestCase):
+    def setUp(self):
+        self.table = OracleTable.objects.create(title="Region")
+        OracleRow.objects.create(table=self.table, floor=1, ceiling=60, result="Barrier Islands")
+        OracleRow.objects.create(table=self.table, floor=61, ceiling=100, result="Ragged Coast")
+        oracles.invalidate()
+
+    def test_bulk_roll(self):
+        response = self.client.get(reverse("rules:oracle-roll", args=[self.table.pk]), {"times": 1000})
+        data = response.json()
+        self.assertEqual(len(data["results"]), 1000)
+        for roll, result in zip(data["rolls"], data["results"]):
+            self.assertEqual(result, "Barrier Islands" if roll <= 60 else "Ragged Coast")
+
+    def test_rolls_are_served_from_memory(self):
+        registry.refresh_if_stale()
+        oracles.get_oracle(self.table.pk)
+        # the rules generation is checked, the table isn't read
+        with self.assertNumQueries(1):
+            self.client.get(reverse("rules:oracle-roll", args=[self.table.pk]), {"times": 1000})
+
+    def test_row_change_invalidates_compiled_table(self):
+        oracles.get_oracle(self.table.pk)
+        OracleRow.objects.filter(result="Ragged Coast").get().delete()
+        OracleRow.objects.create(table=self.table, floor=61, ceiling=100, result="Havens")
+        self.assertIn("Havens", oracles.get_oracle(self.table.pk).results)
+
+    def test_invalid_times(self):
+        url = reverse("rules:oracle-roll", args=[self.table.pk])
+        self.assertEqual(self.client.get(url, {"times": "many"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"times": 0}).status_code, 400)
+
+    def test_missing_and_incomplete_tables(self):
+        self.assertEqual(self.client.get(reverse("rules:oracle-roll", args=[999])).status_code, 404)
+        empty = OracleTable.objects.create(title="Empty")
+        self.assertEqual(self.client.get(reverse("rules:oracle-roll", args=[empty.pk])).status_code, 409)
+
+    def test_ask_the_oracle_page(self):
+        response = self.client.get(reverse("rules:oracles-list"), {"odds": "likely"})
+        self.assertEqual(response.context["asked_odds"], "likely")
+        self.assertIn(response.context["answer"], {True, False})
+
+    def test_roll_on_table_page(self):
+        response = self.client.get(reverse("rules:oracles-list"), {"roll": self.table.pk})
+        self.assertIn(response.context["result"], {"Barrier Islands", "Ragged Coast"})
+
+
+class RegistryTest(TestCase):
+    def setUp(self):
+        registry.invalidate()
+        self.asset = AssetDefinition.objects.create(title="Hawk", description="Your hawk", type="companion")
+        AssetAbilityDefinition.objects.create(asset=self.asset, title="Keen", description="...", initially_active=True)
+        AssetComponentDefinition.objects.create(asset=self.asset, title="Name")
+        self.move = Move.objects.create(title="Face Danger", category="adventure", trigger_text="When you...",
+                                        outcome_text="On a strong hit...", roll_type="action")
+
+    def test_indexes(self):
+        rules = registry.get_registry()
+        self.assertIs(rules.assets_by_title["Hawk"], rules.assets_by_id[self.asset.pk])
+        self.assertEqual([a.title for a in rules.assets_by_id[self.asset.pk].abilities], ["Keen"])
+        self.assertEqual(rules.moves_by_title["Face Danger"].id, self.move.pk)
+        with self.assertRaises(FrozenInstanceError):
+            rules.moves[0].title = "Secure an Advantage"#type: ignore
+
+    def test_loaded_once(self):
+        registry.get_registry()
+        with self.assertNumQueries(0):
+            registry.get_registry()
+            InitialAssetsForm()
+
+    def test_save_bumps_generation(self):
+        generation = registry.get_registry().generation
+        self.asset.title = "Raven"
+        self.asset.save()
+        rules = registry.get_registry()
+        self.assertEqual(rules.generation, generation + 1)
+        self.assertIn("Raven", rules.assets_by_title)
+
+    def test_change_in_another_process(self):
+        registry.refresh_if_stale()
+        registry.get_registry()
+        # no signals: as if the change was made by another process
+        Move.objects.filter(pk=self.move.pk).update(title="Secure an Advantage")
+        RulesVersion.objects.update(generation=F("generation") + 1)
+
+        self.assertIn("Face Danger", registry.get_registry().moves_by_title)
+        registry.refresh_if_stale()
+        self.assertIn("Secure an Advantage", registry.get_registry().moves_by_title)
+
+    def test_library_and_moves_pages(self):
+        self.assertContains(self.client.get(reverse("rules:assets-library")), "Your hawk")
+        self.assertContains(self.client.get(reverse("rules:move-reference")), reverse("rules:move-detail", args=[self.move.pk]))
+        self.assertEqual(self.client.get(reverse("rules:move-detail", args=[self.move.pk + 1])).status_code, 404)
+
+
+class AssetLibraryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.invalidate()
+        self.asset = AssetDefinition.objects.create(title="Hawk", description="Your hawk", type="companion")
+        AssetAbilityDefinition.objects.create(asset=self.asset, title="Keen", description="...", initially_active=True)
+        self.url = reverse("rules:assets-library")
+
+    def test_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertTrue(response.has_header("ETag"))
+        self.assertFalse(response.has_header("Last-Modified"))
+
+        # only the rules generation is checked at the start of the request
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, headers={"if-none-match": response["ETag"]})
+        self.assertEqual(response.status_code, 304)
+
+    def test_rules_change_modifies_library(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.asset.description = "Your falcon"
+        self.asset.save()
+
+        response = self.client.get(self.url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Your falcon")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_depends_on_session(self):
+        etag = self.client.get(self.url)["ETag"]
+        user = User.objects.create_user(username="player", password="pass")
+        self.client.force_login(user)
+        response = self.client.get(self.url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Hello player")
+
+    def test_if_modified_since_after_login(self):
+        self.client.get(self.url)
+        self.client.force_login(User.objects.create_user(username="player", password="pass"))
+        response = self.client.get(self.url, headers={"if-modified-since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+        self.assertEqual(response.status_code, 200)
+
+
+class FtsQueryTest(SimpleTestCase):
+    def test_words_and_phrases(self):
+        self.assertEqual(fts.build_query('face "iron vow"'), '"face" AND "iron vow"')
+
+    def test_prefix(self):
+        self.assertEqual(fts.build_query("vow*"), '"vow"*')
+
+    def test_syntax_is_neutralized(self):
+        self.assertEqual(fts.build_query('face-danger OR) NEAR( "'), '"face danger" AND "OR" AND "NEAR"')
+        self.assertEqual(fts.build_query('* () "'), "")
+
+    def test_highlight_escapes_text(self):
+        snippet = f"<b>{fts.SNIPPET_START}vow{fts.SNIPPET_END}</b>"
+        self.assertEqual(fts.highlight(snippet), "&lt;b&gt;<mark>vow</mark>&lt;/b&gt;")
+
+
+class MoveSearchTest(TestCase):
+    def setUp(self):
+        registry.invalidate()
+        self.swear = Move.objects.create(title="Swear an Iron Vow", category="quest", roll_type="action",
+            trigger_text="When you swear upon iron to complete a quest...", outcome_text="On a strong hit, you are emboldened")
+        self.fulfill = Move.objects.create(title="Fulfill Your Vow", category="quest", roll_type="progress",
+            trigger_text="When you achieve what you believe to be the fulfillment of your vow...", outcome_text="On a strong hit, your quest is complete")
+        self.danger = Move.objects.create(title="Face Danger", category="adventure", roll_type="action",
+            trigger_text="When you attempt something risky or react to an imminent threat...", outcome_text="On a strong hit, you are successful")
+
+    def titles(self, *args, **kwargs):
+        return [hit.move.title for hit in search.search_moves(*args, **kwargs)]
+
+    def test_ranked_by_title(self):
+        self.assertEqual(self.titles("vow")[:2], ["Fulfill Your Vow", "Swear an Iron Vow"])
+
+    def test_prefix_and_phrase(self):
+        self.assertEqual(self.titles("emb*"), ["Swear an Iron Vow"])
+        self.assertEqual(self.titles('"imminent threat"'), ["Face Danger"])
+
+    def test_filters(self):
+        self.assertEqual(self.titles("strong", category="adventure"), ["Face Danger"])
+        self.assertEqual(self.titles("vow", roll_type="progress"), ["Fulfill Your Vow"])
+
+    def test_snippets_are_highlighted(self):
+        hit = search.search_moves('"imminent threat"')[0]
+        self.assertIn("<mark>imminent threat</mark>", hit.trigger_snippet)
+
+    def test_index_follows_saves_and_deletes(self):
+        self.danger.title = "Secure an Advantage"
+        self.danger.save()
+        self.assertEqual(self.titles("advantage"), ["Secure an Advantage"])
+        self.assertEqual(self.titles("danger"), [])
+
+        self.danger.delete()
+        self.assertEqual(self.titles("imminent"), [])
+
+    def test_search_page(self):
+        response = self.client.get(reverse("rules:move-search"), {"q": "vow", "category": "quest"})
+        self.assertContains(response, "<mark>Vow</mark>", html=False)
+        self.assertNotContains(response, "Face Danger")
@@ -1,11 +1,14 @@
 from django.urls import path
 
-from .views import AssetLibraryView, MoveReferenceView, MoveDetailView
+from .views import AssetLibraryView, MoveReferenceView, MoveSearchView, MoveDetailView, OracleListView, oracle_roll
 
 app_name = 'rules'
 
 urlpatterns = [
     path('library/', AssetLibraryView.as_view(), name='assets-library'),
     path('moves/', MoveReferenceView.as_view(), name='move-reference'),
+    path('moves/search/', MoveSearchView.as_view(), name='move-search'),
     path('moves/<int:pk>/', MoveDetailView.as_view(), name='move-detail'),
+    path('oracles/', OracleListView.as_view(), name='oracles-list'),
+    path('oracles/<int:pk>/roll/', oracle_roll, name='oracle-roll'),
 ]
\ No newline at end of file
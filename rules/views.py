@@ -1,8 +1,37 @@
-from django.shortcuts import render
+import hashlib
+
+from django.conf import settings
+from django.http import HttpRequest, JsonResponse, Http404
+from django.shortcuts import render, get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
 from django.views.generic import ListView, DetailView
 
-from .models import AssetDefinition, Move
+from domain import odds, oracle
+
+from . import oracles, registry, search
+from .models import Move, OracleTable
+
+MAX_BULK_ROLLS = 10_000
 # Create your views here.
+def rules_etag(request: HttpRequest, *args, **kwargs) -> str:
+    """
+    ETag of pages rendered from rules data only.
+
+    Changes with the rules generation and with the session and CSRF cookies,
+    as the navbar of every page depends on the logged in user.
+    Read from the rules registry and request cookies, no queries besides the
+    generation check that ``registry.refresh_if_stale`` runs for every request.
+    """
+    cookies = "|".join(request.COOKIES.get(name, "") for name in (settings.SESSION_COOKIE_NAME, settings.CSRF_COOKIE_NAME))
+    digest = hashlib.blake2b(cookies.encode(), digest_size=8).hexdigest()
+    return f'"rules-{registry.get_registry().generation}-{digest}"'
+
+
+# no Last-Modified: the rules change time alone would answer 304 to If-Modified-Since
+# across a login or logout, with the navbar of the other user
+@method_decorator([vary_on_cookie, condition(etag_func=rules_etag)], name="get")
 class AssetLibraryView(ListView):
     """
     Display the full library of available Ironsworn assets.
@@ -11,6 +40,12 @@ class AssetLibraryView(ListView):
     browsable reference, allowing players to review and select assets
     for their characters.
 
+    Assets are read from the rules registry and the rendered library is cached
+    until the rules change, keyed by the rules generation. Responses carry an ``ETag``
+    derived from the registry and the session, so repeat visitors get
+    a ``304 Not Modified`` without rendering; the only query is the rules generation
+    check of ``registry.refresh_if_stale``, run for every request.
+
     **Template:**
     
     Renders the :template:`rules/assets_library.html` template.
@@ -18,12 +53,23 @@ class AssetLibraryView(ListView):
     **Context**
 
     ``assets_list``
-        A queryset of :model:`rules.AssetDefinition` objects is available as ``{{assets_list}}`` context variable
+        A tuple of ``rules.registry.AssetRules``, one per :model:`rules.AssetDefinition`,
+        is available as ``{{assets_list}}`` context variable. Read from the rules registry, not the database.
+
+    ``rules_generation``
+        Generation of the rules registry, the cache key of the rendered library.
     """
      
     template_name = 'rules/assets_library.html'
-    model = AssetDefinition
     context_object_name = 'assets_list'
+
+    def get_queryset(self):
+        return registry.get_registry().assets
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["rules_generation"] = registry.get_registry().generation
+        return context
     
 class MoveReferenceView(ListView):
     """
@@ -40,13 +86,75 @@ class MoveReferenceView(ListView):
     **Context**
 
     ``moves_list``
-        A queryset of :model:`rules.Move` objects is available as ``{{moves_list}}`` context variable
+        A tuple of ``rules.registry.MoveRules``, one per :model:`rules.Move`, is available
+        as ``{{moves_list}}`` context variable. Read from the rules registry, not the database.
+
+    ``categories`` / ``roll_types``
+        Choices of the move search form filters, see ``MoveSearchView``.
     """
      
     template_name = 'rules/move_reference.html'
-    model = Move
     context_object_name = 'moves_list'
 
+    def get_queryset(self):
+        return registry.get_registry().moves
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["categories"] = Move.MOVES_CATEGORIES
+        context["roll_types"] = Move.ROLL_TYPES
+        return context
+
+class MoveSearchView(ListView):
+    """
+    Search moves by their name, trigger and outcome text.
+
+    Moves are found with the full-text index of ``rules.search``, ranked best first,
+    with matches highlighted in the title and in snippets of the trigger and outcome.
+
+    Expects query parameters:
+    - ``q`` (str): Search text. Quoted parts are phrases, a trailing ``*`` searches for a prefix
+    - ``category`` (str, optional): One of ``Move.MOVES_CATEGORIES``
+    - ``roll_type`` (str, optional): One of ``Move.ROLL_TYPES``
+
+    **Template:**
+    Renders the :template:`rules/move_search.html` template.
+
+    **Context**
+
+    ``results``
+        A list of ``rules.search.MoveHit``, empty if nothing was searched.
+
+    ``query`` / ``category`` / ``roll_type``
+        The submitted search parameters.
+
+    ``categories`` / ``roll_types``
+        Choices of the category and roll type filters.
+    """
+    template_name = 'rules/move_search.html'
+    context_object_name = 'results'
+
+    def get_queryset(self):
+        self.query = self.request.GET.get("q", "").strip()
+        self.category = self.request.GET.get("category", "")
+        self.roll_type = self.request.GET.get("roll_type", "")
+
+        if self.category not in dict(Move.MOVES_CATEGORIES):
+            self.category = ""
+        if self.roll_type not in dict(Move.ROLL_TYPES):
+            self.roll_type = ""
+
+        return search.search_moves(self.query, self.category, self.roll_type)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["query"] = self.query
+        context["category"] = self.category
+        context["roll_type"] = self.roll_type
+        context["categories"] = Move.MOVES_CATEGORIES
+        context["roll_types"] = Move.ROLL_TYPES
+        return context
+
 class MoveDetailView(DetailView):
     """
     Display detailed rules text for a single Ironsworn move.
@@ -60,6 +168,108 @@ class MoveDetailView(DetailView):
     **Context**
     
     ``move``
-        The instance of :model:`rules.Move` is available as ``{{move}}`` context variable.
+        The ``rules.registry.MoveRules`` of the :model:`rules.Move` is available as ``{{move}}`` context variable.
+        Read from the rules registry, not the database.
+
+    ``odds_table``
+        For moves with ``action`` or ``progress`` roll type: a read-only mapping of
+        stat + adds (action) or progress score (progress) to the exact
+        :class:`domain.odds.OutcomeOdds` of the roll. ``None`` for other moves.
+    """
+    template_name = 'rules/move_detail.html'
+    context_object_name = 'move'
+
+    def get_object(self, queryset=None):
+        move = registry.get_registry().moves_by_id.get(self.kwargs["pk"])
+        if move is None:
+            raise Http404("No move found")
+        return move
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        #tables are memoized by the domain module, nothing is computed per request
+        if self.object.roll_type == "action":
+            context["odds_table"] = odds.action_odds_table()
+        elif self.object.roll_type == "progress":
+            context["odds_table"] = odds.progress_odds_table()
+        else:
+            context["odds_table"] = None
+
+        return context
+
+class OracleListView(ListView):
+    """
+    Display all oracle tables and the Ask the Oracle move.
+
+    Rolls are made on the compiled in-memory copy of a table, see ``rules.oracles``.
+
+    **Template:**
+    Renders the :template:`rules/oracle_list.html` template.
+
+    **Context**
+
+    ``oracles_list``
+        A queryset of :model:`rules.OracleTable` objects.
+
+    ``odds_choices``
+        A list of Ask the Oracle odds and the lowest d100 roll answering "yes".
+
+    ``rolled_table`` / ``roll`` / ``result``
+        The table rolled on, the d100 roll and its result,
+        if the ``roll`` query parameter holds the id of a table.
+
+    ``asked_odds`` / ``roll`` / ``answer`` / ``match``
+        The odds asked, the d100 roll, the yes/no answer and match status,
+        if the ``odds`` query parameter holds one of the Ask the Oracle odds.
     """
-    model = Move
\ No newline at end of file
+    template_name = 'rules/oracle_list.html'
+    model = OracleTable
+    context_object_name = 'oracles_list'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["odds_choices"] = list(oracle.ASK_THE_ORACLE.items())
+
+        table_id = self.request.GET.get("roll", "")
+        odds_name = self.request.GET.get("odds", "")
+
+        if table_id.isdigit():
+            context["rolled_table"] = get_object_or_404(OracleTable, pk=table_id)
+            try:
+                context["roll"], context["result"] = oracles.get_oracle(int(table_id)).roll()
+            except ValueError as e:
+                context["roll"], context["result"] = "-", f"Incomplete table. {e}"
+        elif odds_name in oracle.ASK_THE_ORACLE:
+            context["asked_odds"] = odds_name
+            context["roll"], context["answer"], context["match"] = oracle.ask_the_oracle(odds_name)
+
+        return context
+
+def oracle_roll(request: HttpRequest, pk: int) -> JsonResponse:
+    """
+    Roll on an oracle table one or many times and return the results as JSON.
+
+    Expects optional query parameter:
+    - ``times`` (int): Number of rolls, between 1 and ``MAX_BULK_ROLLS``; defaults to 1
+
+    Rolls are made on the compiled in-memory copy of the table, so the database is
+    touched at most once per process and table, not once per roll.
+
+    Response: ``{"table": pk, "rolls": [int, ...], "results": [str, ...]}``
+    """
+    try:
+        times = int(request.GET.get("times", 1))
+    except ValueError:
+        return JsonResponse({"error": "times must be an integer"}, status=400)
+    if not 1 <= times <= MAX_BULK_ROLLS:
+        return JsonResponse({"error": f"times must be between 1 and {MAX_BULK_ROLLS}"}, status=400)
+
+    try:
+        compiled = oracles.get_oracle(pk)
+    except ValueError as e:
+        get_object_or_404(OracleTable, pk=pk)
+        return JsonResponse({"error": str(e)}, status=409)
+
+    rolls, results = compiled.roll_many(times)
+    return JsonResponse({"table": pk, "rolls": rolls.tolist(), "results": results})
@@ -1,13 +1,21 @@
 from django.contrib import admin
 
+from ironsworn.shard_admin import ShardedModelAdmin
 
-from .models import World, WorldTruth
+from .models import World, WorldTruth, WorldTemplate, WorldTemplateTruth
 
 class TruthInline(admin.TabularInline):
     model = WorldTruth
     extra = 0
 
 @admin.register(World)
-class WorldAdmin(admin.ModelAdmin):
+class WorldAdmin(ShardedModelAdmin):
     inlines = [TruthInline]
 
+class TemplateTruthInline(admin.TabularInline):
+    model = WorldTemplateTruth
+    extra = 0
+
+@admin.register(WorldTemplate)
+class WorldTemplateAdmin(admin.ModelAdmin):
+    inlines = [TemplateTruthInline]
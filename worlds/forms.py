@@ -1,8 +1,17 @@
 from django import forms
 
-from .models import World, WorldTruth
+from .models import World, WorldTruth, WorldTemplate
 
 class NewWorldForm(forms.ModelForm):
+    """
+    Form for a new world, optionally started from a :model:`worlds.WorldTemplate`.
+
+    Worlds without a template have their truths answered next, see
+    ``WorldTruthsForm``.
+    """
+    template = forms.ModelChoiceField(queryset=WorldTemplate.objects.order_by("title"), required=False,
+                                      empty_label="Answer the truths myself", label="Truths")
+
     class Meta:
         model = World
         fields = ["name", "description"]
@@ -30,4 +39,11 @@ class WorldTruthsForm(forms.Form):
         for key, label in WorldTruth.QUESTIONS:
             self.fields[f"{key}_answer"] = forms.CharField(label=label, widget=forms.Textarea(attrs={"class": "form-control"}), required=True)
 
-            self.fields[f"{key}_quest_starter" ] = forms.CharField(label=" ", widget=forms.Textarea(attrs={"class": "form-control", "placeholder":"Quest starter"}), required=False)
\ No newline at end of file
+            self.fields[f"{key}_quest_starter" ] = forms.CharField(label=" ", widget=forms.Textarea(attrs={"class": "form-control", "placeholder":"Quest starter"}), required=False)
+
+    def truths(self):
+        """``(question, answer, quest_starter)`` of every question, see ``worlds.services.set_truths``"""
+        return [
+            (key, self.cleaned_data[f"{key}_answer"], self.cleaned_data.get(f"{key}_quest_starter"))
+            for key, _ in WorldTruth.QUESTIONS
+        ]
\ No newline at end of file
@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 16:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worlds', '0002_alter_worldtruth_question_alter_worldtruth_world'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorldTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=100, unique=True)),
+                ('description', models.TextField(blank=True, default='')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WorldTemplateTruth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question', models.TextField(choices=[('old_world', 'The Old World'), ('iron', 'Iron'), ('legacies', 'Legacies'), ('communities', 'Communities'), ('leaders', 'Leaders'), ('defense', 'Defense'), ('religion', 'Religion'), ('mysticism', 'Mysticism'), ('firsborns', 'The Fisrtborns'), ('beasts', 'Beasts'), ('horrors', 'The Horrors')])),
+                ('answer', models.TextField()),
+                ('quest_starter', models.TextField(blank=True, null=True)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='truths', to='worlds.worldtemplate')),
+            ],
+            options={
+                'unique_together': {('template', 'question')},
+            },
+        ),
+    ]
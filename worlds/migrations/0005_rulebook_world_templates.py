@@ -0,0 +1,78 @@
+# Generated by Django 6.0 on 2026-10-18 18:20
+
+from django.db import migrations
+
+# One template per option of the rulebook's truths: every question has three options,
+# template N answers every question with its option N. Answers are short summaries.
+TEMPLATES = [
+    ("Ironlands: first options", "Each truth answered with the first option of the rulebook.", {
+        "old_world": "A plague swept the Old World. The survivors fled across the sea to the Ironlands.",
+        "iron": "Iron is plentiful in the hills. Iron tools and blades are common, and vows are sworn on them.",
+        "legacies": "We are the first people to settle here. The land was empty of humans when we came.",
+        "communities": "Communities are few and scattered, small steadings cut off from each other by the wilds.",
+        "leaders": "Each community chooses its own leader. There is no higher authority.",
+        "defense": "Every community defends itself. The Ironsworn answer the calls for aid.",
+        "religion": "Few keep faith. The old gods were left behind in the Old World.",
+        "mysticism": "Magic is rare and distrusted, and most call it superstition.",
+        "firsborns": "The firstborn have passed into legend.",
+        "beasts": "Natural beasts are danger enough. Monsters are only tales.",
+        "horrors": "The dead stay dead. Horrors are stories told by the fire.",
+    }),
+    ("Ironlands: second options", "Each truth answered with the second option of the rulebook.", {
+        "old_world": "Famine ruined the Old World. It could no longer feed us, so we sailed for the Ironlands.",
+        "iron": "Iron is scarce. Iron weapons are prized, and those who hold them are respected.",
+        "legacies": "Others came before us. Their ruins and barrows dot the land.",
+        "communities": "Villages and a handful of larger settlements trade along rough roads.",
+        "leaders": "Warlords and chieftains rule several settlements by strength.",
+        "defense": "Sworn warbands patrol the roads and the edges of the wilds.",
+        "religion": "The gods of the Old World are still worshipped, in many forms.",
+        "mysticism": "Mystics and seers are few but real, and their gifts come at a price.",
+        "firsborns": "The elves and giants keep to the deep wilds and the mountains, wary of us.",
+        "beasts": "Monstrous beasts stalk the wilds, rarely seen.",
+        "horrors": "Something dark walks the wilds at night, and few who meet it return.",
+    }),
+    ("Ironlands: third options", "Each truth answered with the third option of the rulebook.", {
+        "old_world": "Invaders overran the Old World. Those who escaped crossed the sea to the Ironlands.",
+        "iron": "The land is named for its hard grey hills. Iron is dug from bogs and ore, and there is never enough.",
+        "legacies": "Earlier settlers still live in the Ironlands, wary of newcomers.",
+        "communities": "Communities band together in fortified towns behind palisades.",
+        "leaders": "A council of elders from the larger settlements keeps an uneasy peace.",
+        "defense": "A few settlements keep trained wardens, stretched thin.",
+        "religion": "New gods of the Ironlands demand offerings and vows.",
+        "mysticism": "Ancient power lingers in places and relics of the land.",
+        "firsborns": "The firstborn are many and hostile, and resent our coming.",
+        "beasts": "Monsters are common, and every journey risks one.",
+        "horrors": "The dead rise and haunt the land. The horrors are real and many.",
+    }),
+]
+
+
+def add_templates(apps, schema_editor):
+    db = schema_editor.connection.alias
+    WorldTemplate = apps.get_model("worlds", "WorldTemplate")
+    WorldTemplateTruth = apps.get_model("worlds", "WorldTemplateTruth")
+    for title, description, answers in TEMPLATES:
+        template, _ = WorldTemplate.objects.using(db).get_or_create(title=title, defaults={"description": description})
+        WorldTemplateTruth.objects.using(db).bulk_create([
+            WorldTemplateTruth(template=template, question=question, answer=answer)
+            for question, answer in answers.items()
+        ], ignore_conflicts=True)
+
+
+def remove_templates(apps, schema_editor):
+    WorldTemplate = apps.get_model("worlds", "WorldTemplate")
+    WorldTemplate.objects.using(schema_editor.connection.alias).filter(
+        title__in=[title for title, _, _ in TEMPLATES]
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('worlds', '0004_unconstrained_shared_keys'),
+    ]
+
+    operations = [
+        # templates are shared, they are only added to the default database, see ironsworn.routers
+        migrations.RunPython(add_templates, remove_templates, hints={"model_name": "worldtemplate"}),
+    ]
@@ -12,7 +12,8 @@ class World(models.Model):
     name = models.CharField(max_length=100, default="Ironlands")
     description = models.TextField(null=True, blank=True)
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # not enforced across shards, see ironsworn.routers
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_constraint=False)
 
     def __str__(self):
         return f"{self.name}({self.pk})"
@@ -44,3 +45,32 @@ class WorldTruth(models.Model):
     answer = models.TextField(help_text="An answer that determines a key aspect of the world")
     quest_starter = models.TextField(null=True, blank=True, help_text="A situation emegrent from the answer that can lead to a quest")
 
+
+class WorldTemplate(models.Model):
+    """
+    A reusable set of answers to the world truth questions.
+
+    Templates are presets: one per option of the rulebook's truths, added by a
+    migration, and more maintained in the admin. A new :model:`worlds.World` can be started from a template, which
+    copies its :model:`worlds.WorldTemplateTruth` rows into the world's truths,
+    see ``worlds.services.create_world``.
+    """
+    title = models.CharField(max_length=100, unique=True)
+    description = models.TextField(blank=True, default="")
+
+    def __str__(self):
+        return self.title
+
+
+class WorldTemplateTruth(models.Model):
+    """
+    An answer of a :model:`worlds.WorldTemplate` to one of ``WorldTruth.QUESTIONS``.
+    """
+    template = models.ForeignKey(WorldTemplate, on_delete=models.CASCADE, related_name="truths")
+    question = models.TextField(choices=WorldTruth.QUESTIONS)
+    answer = models.TextField()
+    quest_starter = models.TextField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("template", "question")
+
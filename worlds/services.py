@@ -0,0 +1,107 @@
+"""
+Creation and copying of :model:`worlds.World` objects, their truths and stories.
+
+Rows are written set-based: truths of a world with a single INSERT, whatever
+the number of questions, and copies with ``INSERT ... SELECT`` statements that
+never bring the copied rows into Python, in the same transaction as the rest
+of the change. Statements go to the shard of the world, see ``ironsworn.routers``.
+"""
+from collections.abc import Iterable
+
+from django.contrib.auth.models import User
+from django.db import connections, models, transaction
+
+from gameplay import search
+from ironsworn import routers
+from gameplay.models import Story, Event, StoryParticipant
+
+from .models import World, WorldTruth, WorldTemplate, WorldTemplateTruth
+
+
+def set_truths(world: World, truths: Iterable[tuple[str, str, str | None]]) -> list[WorldTruth]:
+    """
+    Replace the truths of ``world``.
+
+    ``truths`` are ``(question, answer, quest_starter)`` tuples, questions are
+    keys of ``WorldTruth.QUESTIONS``.
+    """
+    truths_manager = WorldTruth.objects.using(routers.db_for(WorldTruth, world))
+    with transaction.atomic(using=truths_manager.db):
+        truths_manager.filter(world=world).delete()
+        return truths_manager.bulk_create([
+            WorldTruth(world=world, question=question, answer=answer, quest_starter=quest_starter)
+            for question, answer, quest_starter in truths
+        ])
+
+def clone_template(world: World, template: WorldTemplate) -> int:
+    """
+    Copy the truths of ``template`` into ``world`` with a single INSERT ... SELECT.
+    Returns the number of truths copied.
+
+    Templates are shared by all users, in the default database: when ``world`` is
+    on another shard, the truths are read and inserted with ``set_truths`` instead.
+    """
+    db = routers.db_for(WorldTruth, world)
+    if db != routers.db_for(WorldTemplateTruth):
+        return len(set_truths(world, template.truths.values_list("question", "answer", "quest_starter")))#type: ignore
+
+    columns = "question, answer, quest_starter"
+    with connections[db].cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {WorldTruth._meta.db_table} (world_id, {columns}) "
+            f"SELECT %s, {columns} FROM {WorldTemplateTruth._meta.db_table} WHERE template_id = %s",
+            [world.pk, template.pk]
+        )
+        return cursor.rowcount
+
+def create_world(user: User, name: str, description: str | None = None, template: WorldTemplate | None = None) -> World:
+    """Create a world of ``user``, with the truths of ``template`` if given"""
+    with transaction.atomic(using=routers.db_for(World)):
+        world = World.objects.create(user=user, name=name, description=description)
+        if template is not None:
+            clone_template(world, template)
+    return world
+
+def _copy_rows(cursor, model: type[models.Model], parent_column: str, parent_id: int,
+               match_column: str, match_value: int) -> int:
+    """
+    ``INSERT ... SELECT`` the rows of ``model`` where ``match_column`` is ``match_value``,
+    with new ids and ``parent_column`` set to ``parent_id``. Returns the id of the last row.
+    """
+    quote = cursor.db.ops.quote_name
+    columns = ", ".join(
+        quote(field.column) for field in model._meta.concrete_fields
+        if not field.primary_key and field.column != parent_column
+    )
+    table = quote(model._meta.db_table)
+    cursor.execute(
+        f"INSERT INTO {table} ({quote(parent_column)}, {columns}) "
+        f"SELECT %s, {columns} FROM {table} WHERE {quote(match_column)} = %s",
+        [parent_id, match_value]
+    )
+    return cursor.lastrowid
+
+def fork_world(world: World, name: str | None = None) -> World:
+    """
+    Copy ``world`` with its truths and stories, and the stories' events and participants.
+
+    The copy belongs to the same user and keeps the characters, moves, event numbers
+    and roll streams of the original, so past rolls of a forked story re-derive the
+    same results. Events are copied with one ``INSERT ... SELECT`` per story and added
+    to the event search index the same way, so the time taken grows with the number
+    of events but memory doesn't.
+    """
+    db = routers.db_for(World, world)
+    with transaction.atomic(using=db), connections[db].cursor() as cursor:
+        fork = World.objects.using(db).create(user_id=world.user_id, name=name or world.name, description=world.description)#type: ignore
+        _copy_rows(cursor, WorldTruth, "world_id", fork.pk, "world_id", world.pk)
+
+        forked_stories = []
+        for story_id in Story.objects.using(db).filter(world=world).order_by("pk").values_list("pk", flat=True):
+            forked_story_id = _copy_rows(cursor, Story, "world_id", fork.pk, "id", story_id)
+            _copy_rows(cursor, Event, "story_id", forked_story_id, "story_id", story_id)
+            _copy_rows(cursor, StoryParticipant, "story_id", forked_story_id, "story_id", story_id)
+            forked_stories.append(forked_story_id)
+
+        search.index_stories(forked_stories, db)
+    return fork
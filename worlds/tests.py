@@ -1,3 +1,129 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from characters.models import Character
+from gameplay import search
+from gameplay.models import Story, Event, StoryParticipant
+
+from .models import World, WorldTruth, WorldTemplate, WorldTemplateTruth
+from .services import create_world, fork_world
+
+
+class WorldTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="player", password="pass")
+        self.client.force_login(self.user)
+        self.template = WorldTemplate.objects.create(title="Rulebook")
+        WorldTemplateTruth.objects.bulk_create([
+            WorldTemplateTruth(template=self.template, question=question, answer=f"{label} of the rulebook")
+            for question, label in WorldTruth.QUESTIONS
+        ])
+
+
+class WorldTruthsTest(WorldTestCase):
+    def truths_data(self, answer):
+        return {f"{question}_answer": answer for question, _ in WorldTruth.QUESTIONS}
+
+    def test_truths_are_saved_in_one_insert(self):
+        world = World.objects.create(user=self.user)
+        url = reverse("worlds:set-truths", args=[world.pk])
+        # rules generation, session, user, world, savepoint, delete, insert, release
+        with self.assertNumQueries(8):
+            response = self.client.post(url, self.truths_data("Iron is sacred"))
+        self.assertRedirects(response, reverse("worlds:world-detail", args=[world.pk]))
+        self.assertEqual(world.truths.count(), len(WorldTruth.QUESTIONS))#type: ignore
+
+    def test_resubmitting_replaces_truths(self):
+        world = World.objects.create(user=self.user)
+        url = reverse("worlds:set-truths", args=[world.pk])
+        self.client.post(url, self.truths_data("Iron is sacred"))
+        self.client.post(url, self.truths_data("Iron is scarce"))
+        self.assertEqual(set(world.truths.values_list("answer", flat=True)), {"Iron is scarce"})#type: ignore
+
+    def test_only_own_worlds(self):
+        world = World.objects.create(user=User.objects.create_user(username="other", password="pass"))
+        response = self.client.post(reverse("worlds:set-truths", args=[world.pk]), self.truths_data("Mine now"))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(world.truths.exists())#type: ignore
+
+
+class WorldTemplateTest(WorldTestCase):
+    def test_create_world_from_template(self):
+        # savepoint, world, truths, release
+        with self.assertNumQueries(4):
+            world = create_world(self.user, "Ironlands", template=self.template)
+        self.assertEqual(
+            dict(world.truths.values_list("question", "answer")),#type: ignore
+            dict(self.template.truths.values_list("question", "answer")),#type: ignore
+        )
+
+    def test_new_world_page(self):
+        response = self.client.post(reverse("worlds:world-create"), {"name": "Ironlands", "template": self.template.pk})
+        world = World.objects.get(user=self.user)
+        self.assertRedirects(response, reverse("worlds:world-detail", args=[world.pk]))
+        self.assertContains(self.client.get(response.url), "The Old World of the rulebook")#type: ignore
+
+    def test_new_world_without_template(self):
+        response = self.client.post(reverse("worlds:world-create"), {"name": "Ironlands"})
+        world = World.objects.get(user=self.user)
+        self.assertRedirects(response, reverse("worlds:set-truths", args=[world.pk]))
+        self.assertFalse(world.truths.exists())#type: ignore
+
+    def test_rulebook_presets_answer_every_question(self):
+        presets = WorldTemplate.objects.exclude(pk=self.template.pk)
+        self.assertEqual(presets.count(), 3)
+        for preset in presets:
+            self.assertEqual(set(preset.truths.values_list("question", flat=True)), {q for q, _ in WorldTruth.QUESTIONS})#type: ignore
+
+
+class ForkWorldTest(WorldTestCase):
+    def setUp(self):
+        super().setUp()
+        self.world = create_world(self.user, "Ironlands", template=self.template)
+        self.character = Character.objects.create(user=self.user, name="Kara", description="")
+        self.story = Story.objects.create(world=self.world, title="Iron Vow", prologue="It begins")
+        StoryParticipant.objects.create(story=self.story, participant=self.character)
+        Event.objects.bulk_create([Event(story=self.story, character=self.character, text=f"Kara meets the Firstborn {i}")
+                                   for i in range(5)])
+        self.story.action_roll(2)
+
+    def test_fork_copies_subtree(self):
+        fork = fork_world(self.world, "Ironlands (fork)")
+        self.assertEqual(fork.truths.count(), len(WorldTruth.QUESTIONS))#type: ignore
+
+        story = Story.objects.get(world=fork)
+        self.assertNotEqual(story.pk, self.story.pk)
+        self.assertEqual((story.rng_seed, story.roll_count, story.last_event_seq), (self.story.rng_seed, 1, 5))
+        self.assertEqual(list(story.participants.all()), [self.character])
+        self.assertEqual(
+            list(story.events.values_list("seq", "character_id", "text")),#type: ignore
+            list(self.story.events.values_list("seq", "character_id", "text")),#type: ignore
+        )
+        # the original is untouched
+        self.assertEqual(self.story.events.count(), 5)#type: ignore
+
+    def test_forked_events_are_searchable_and_numbered(self):
+        fork = fork_world(self.world)
+        story = Story.objects.get(world=fork)
+        hits = search.search_events(self.user.pk, "firstborn", story_id=story.pk)
+        self.assertEqual(len(hits), 5)
+        self.assertEqual(Event.objects.create(story=story, text="Next").seq, 6)
+
+    def test_query_count_does_not_depend_on_events(self):
+        # savepoint, world, truths, stories, story + events + participants, search index, release
+        with self.assertNumQueries(9):
+            fork_world(self.world)
+        Event.objects.bulk_create([Event(story=self.story, text=f"More {i}") for i in range(500)])
+        with self.assertNumQueries(9):
+            fork_world(self.world)
+
+    def test_fork_page(self):
+        response = self.client.post(reverse("worlds:world-fork", args=[self.world.pk]))
+        fork = World.objects.exclude(pk=self.world.pk).get()
+        self.assertRedirects(response, reverse("worlds:world-detail", args=[fork.pk]))
+        self.assertEqual(fork.name, "Ironlands (fork)")
+
+        other = User.objects.create_user(username="other", password="pass")
+        self.client.force_login(other)
+        self.assertEqual(self.client.post(reverse("worlds:world-fork", args=[self.world.pk])).status_code, 404)
@@ -1,13 +1,11 @@
 from django.urls import path
-from django.views.generic import DetailView, ListView
-
-from .models import World
-from .views import NewWorldView, set_wordlTruths, WorldsListView
+from .views import NewWorldView, fork_world_view, set_wordlTruths, WorldDetailView, WorldsListView
 
 app_name = "worlds"
 urlpatterns = [
     path("all/", WorldsListView.as_view(), name="worlds-list"),
-    path("<int:pk>", DetailView.as_view(model=World), name="world-detail"),
+    path("<int:pk>", WorldDetailView.as_view(), name="world-detail"),
     path("create/", NewWorldView.as_view(), name='world-create'),
-    path("<int:pk>/truths/", set_wordlTruths, name="set-truths")
+    path("<int:pk>/truths/", set_wordlTruths, name="set-truths"),
+    path("<int:pk>/fork/", fork_world_view, name="world-fork"),
 ]
\ No newline at end of file
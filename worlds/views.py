@@ -1,13 +1,15 @@
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models.query import QuerySet
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse_lazy, reverse
-from django.views.generic import CreateView, ListView
+from django.views.generic import CreateView, DetailView, ListView
 from django.http import HttpRequest
+from django.views.decorators.http import require_POST
 
 from .forms import NewWorldForm, WorldTruthsForm
 from .models import World, WorldTruth
+from .services import create_world, fork_world, set_truths
 
 
 class WorldsListView(LoginRequiredMixin, ListView):
@@ -30,8 +32,9 @@ class NewWorldView(LoginRequiredMixin, CreateView):
     Create a new world.
 
     This view allows a user to create a new :model:`worlds.World`.
-    After successful creation, redirects to the world truths form where
-    the user answers worldbuilding questions.
+    If a :model:`worlds.WorldTemplate` is chosen, the world is created with the
+    template's truths and the user is redirected to the world. Otherwise,
+    redirects to the world truths form where the user answers worldbuilding questions.
 
     **Template:**
     Renders the :template:`generic_form.html` template.
@@ -41,10 +44,27 @@ class NewWorldView(LoginRequiredMixin, CreateView):
     template_name = "generic_form.html"
     
     def form_valid(self, form) :
-        new_world: World = form.save(commit=False)
-        new_world.user = self.request.user #type: ignore
-        new_world.save()
+        template = form.cleaned_data["template"]
+        new_world = create_world(self.request.user, form.cleaned_data["name"],#type: ignore
+                                 form.cleaned_data["description"], template)
+        if template is not None:
+            return redirect("worlds:world-detail", pk=new_world.pk)
         return redirect("worlds:set-truths", pk=new_world.pk)
+
+
+class WorldDetailView(DetailView):
+    """
+    Display a world and its truths.
+
+    **Template:**
+    Renders the default detail template for :model:`worlds.World`.
+
+    **Context**
+
+    ``world``
+        The :model:`worlds.World`, with its truths prefetched.
+    """
+    queryset = World.objects.prefetch_related("truths")
     
 
 @login_required
@@ -55,26 +75,35 @@ def set_wordlTruths(request: HttpRequest, pk: int):
     This view presents a form for the user to answer predefined worldbuilding
     questions and optionally provide quest starters for each.
 
-    On POST with valid form data, creates :model:`worlds.WorldTruth` instances
-    for all questions with the user's answers, then redirects to the world detail view.
+    On POST with valid form data, replaces the :model:`worlds.WorldTruth` instances
+    of the world with the user's answers to all questions in a single transaction,
+    see ``worlds.services.set_truths``, then redirects to the world detail view.
 
-    The world is identified by the ``pk`` URL parameter.
+    The world is identified by the ``pk`` URL parameter and must belong to the user.
 
     **Template:**
     Renders the :template:`worlds/worldtruths_form.html` template.
     """
     form = WorldTruthsForm(request.POST or None)
-    world=World.objects.get(id=pk)
+    world = get_object_or_404(World, id=pk, user=request.user)
     if request.method == "POST":
         if form.is_valid():
-            for question, _ in WorldTruth.QUESTIONS:
-                WorldTruth.objects.create(
-                    world=world,
-                    question = question,
-                    answer = form.cleaned_data.get(f"{question}_answer"),
-                    quest_starter = form.cleaned_data.get(f"{question}_quest_starter")
-                )
-            
+            set_truths(world, form.truths())
             return redirect("worlds:world-detail", pk=pk)
 
-    return render(request, "worlds/worldtruths_form.html", {"world": world, "form": form})
\ No newline at end of file
+    return render(request, "worlds/worldtruths_form.html", {"world": world, "form": form})
+
+
+@login_required
+@require_POST
+def fork_world_view(request: HttpRequest, pk: int):
+    """
+    Fork a world of the user: copy it with its truths, stories and their events,
+    see ``worlds.services.fork_world``, then redirect to the copy.
+
+    The world is identified by the ``pk`` URL parameter and must belong to the user.
+    """
+    world = get_object_or_404(World, id=pk, user=request.user)
+    fork = fork_world(world, request.POST.get("name") or f"{world.name} (fork)")
+    return redirect("worlds:world-detail", pk=fork.pk)
+